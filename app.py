@@ -8,20 +8,9 @@ import re
 import time
 from flask import Flask, render_template, jsonify, request, session, redirect, url_for
 from config import Config
-from core.btc_price import btc_price_service
-from core.opinion_config import get_proxy_dict, get_env_accounts, has_proxy, OPINION_API_KEY, OPINION_PROXY
-
-# BSC RPC가 서버에서 막힐 때 Opinion 프록시로 RPC도 나가게 함 (Web3/requests가 HTTP_PROXY 사용)
-# 비활성화: .env에 BSC_RPC_USE_PROXY=0
-if os.getenv("BSC_RPC_USE_PROXY", "1").strip() != "0":
-    for _aid, _eoa, _ak, _proxy, _ in get_env_accounts():
-        if _proxy and get_proxy_dict(_proxy):
-            _px = get_proxy_dict(_proxy)
-            _url = _px.get("https") or _px.get("http")
-            if _url and not os.environ.get("HTTPS_PROXY"):
-                os.environ["HTTPS_PROXY"] = _url
-                os.environ["HTTP_PROXY"] = _url
-                break
+from core.btc_price import UnknownFeedError, btc_price_service
+from core.bsc_rpc_pool import rpc_proxies_for
+from core.opinion_config import get_env_accounts, has_proxy, OPINION_API_KEY, OPINION_PROXY
 
 # Configure logging
 logging.basicConfig(
@@ -100,7 +89,13 @@ from core.opinion_client import (
     get_trades,
 )
 from core.opinion_btc_topic import get_latest_bitcoin_up_down_market
-from core.opinion_manual_trade import get_1h_market_for_trade, execute_manual_trade
+from core.opinion_market_catalog import ROLLOVER_POLL_SEC, market_catalog
+from core.opinion_manual_trade import execute_manual_trade
+from core.opinion_multi_pair import (
+    start_multi_pair_job, get_multi_pair_job, stop_multi_pair_job, list_multi_pair_jobs,
+)
+from core.opinion_slicer import start_slice_job, get_slice_job, stop_slice_job, list_slice_jobs
+from core.opinion_trade_status import trade_status_service
 from core.opinion_errors import get_auto_error_message, interpret_opinion_api_response
 from core.opinion_clob_order import get_clob_debug_info
 from core.opinion_auto_trader import opinion_auto_trader
@@ -118,6 +113,34 @@ def _start_ws_background():
             opinion_ws_client.start_ws(OPINION_API_KEY)
     except Exception as e:
         logger.warning("Opinion WS 미시작: %s", e)
+    try:
+        market_catalog.start()
+    except Exception as e:
+        logger.warning("마켓 카탈로그 갱신 미시작: %s", e)
+    try:
+        from core.bsc_rpc_pool import bsc_rpc_pool
+        bsc_rpc_pool.start()
+    except Exception as e:
+        logger.warning("BSC RPC 프로버 미시작: %s", e)
+    try:
+        from core.opinion_clob_order import start_approval_refresher
+        start_approval_refresher()
+    except Exception as e:
+        logger.warning("CLOB 승인 상태 확인 미시작: %s", e)
+    try:
+        from core.okx_balance import balance_cache
+        balance_cache.start(
+            lambda: [acc.eoa for acc in opinion_account_manager.get_all()],
+            lambda: {acc.eoa: rpc_proxies_for(getattr(acc, 'proxy', None))
+                     for acc in opinion_account_manager.get_all() if acc.eoa},
+        )
+    except Exception as e:
+        logger.warning("잔고 캐시 갱신 미시작: %s", e)
+    try:
+        from core.bsc_transfer_watcher import transfer_watcher
+        transfer_watcher.start(lambda: [acc.eoa for acc in opinion_account_manager.get_all()])
+    except Exception as e:
+        logger.warning("USDT Transfer 로그 감시 미시작: %s", e)
 
 
 _start_ws_background()  # 모듈 임포트 시 한 번 실행
@@ -134,13 +157,10 @@ def _opinion_auth():
 def opinion_proxy_status():
     """프록시 설정 여부. 없으면 UI에서 '프록시를 추가해 주세요' 알림용."""
     out = {'has_proxy': has_proxy()}
-    # BSC RPC 프록시 디버깅: HTTPS_PROXY가 설정돼 있으면 앞 20자만 표시
-    hp = os.environ.get('HTTPS_PROXY') or os.environ.get('HTTP_PROXY')
-    if hp:
-        out['bsc_rpc_proxy_set'] = True
-        out['bsc_rpc_proxy_preview'] = hp[:30] + '...' if len(hp) > 30 else hp[:20]
-    else:
-        out['bsc_rpc_proxy_set'] = False
+    # BSC RPC 프록시 디버깅: 계정별로 Client/잔고 조회에 주입되는지 (프로세스 환경변수는 사용 안 함)
+    rpc_proxy_accounts = [aid for aid, _eoa, _ak, proxy, _ in get_env_accounts() if rpc_proxies_for(proxy)]
+    out['bsc_rpc_proxy_set'] = bool(rpc_proxy_accounts)
+    out['bsc_rpc_proxy_accounts'] = rpc_proxy_accounts
     return jsonify(out)
 
 
@@ -224,15 +244,32 @@ def opinion_btc_up_down():
         if cutoff_sec is not None:
             slug = _opinion_market_slug_et(cutoff_sec)
             payload['market_url'] = f"https://app.opinion.trade/market/{slug}"
-            if cutoff_sec < int(time.time()):
+            now_sec = int(time.time())
+            if cutoff_sec < now_sec:
                 payload['market_ended'] = True
-                payload['notice'] = '이 구간은 종료되었습니다. 다음 1시간 마켓이 Opinion에 아직 열리지 않았을 수 있어요. 1~2분 뒤 위 "불러오기"를 눌러 보세요.'
+                payload['notice'] = '이 구간은 종료되었습니다. 다음 1시간 마켓이 Opinion에 열리면 자동으로 다시 불러옵니다.'
+                # 롤오버 구간에서는 카탈로그가 짧은 주기로 조회 중 → 그 주기에 맞춰 재조회
+                payload['reloadAfterSec'] = ROLLOVER_POLL_SEC * 2
+            else:
+                # 다음 마켓은 카탈로그가 cutoff 전에 미리 준비 → cutoff 직후 메모리 조회만으로 전환
+                payload['reloadAfterSec'] = cutoff_sec - now_sec + 2
         return jsonify(payload)
     except Exception as e:
         logger.exception('btc-up-down error: %s', e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/opinion/series')
+def opinion_series():
+    """등록된 모든 시리즈(.env OPINION_SERIES)의 현재/다음 마켓 + 카탈로그 상태. 메모리 조회만 함."""
+    try:
+        from core.opinion_btc_topic import get_all_series_markets
+        return jsonify({'success': True, 'series': get_all_series_markets(), 'catalog': market_catalog.status()})
+    except Exception as e:
+        logger.exception('opinion series: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 def _opinion_cutoff_seconds(market: dict) -> int | None:
     """시장 종료 시각(Unix 초). cutoffAt 또는 collection.current.endTime."""
     cur = market.get("collection") and market.get("collection").get("current")
@@ -330,7 +367,8 @@ def opinion_btc_price_gap():
                 'topicId': topic_id,
                 'startTimestamp': start_ts,
             }), 404
-        current_price = btc_price_service.get_current_price()
+        quote = btc_price_service.get_price_quote()
+        current_price = quote['price']
         gap = round(current_price - start_price, 2)
         cur = market.get("collection") and market.get("collection").get("current")
         period_label = (cur.get("period") or "").strip() or None if cur else None
@@ -350,6 +388,8 @@ def opinion_btc_price_gap():
             'periodLabel': period_label,
             'startPrice': start_price,
             'currentPrice': current_price,
+            'currentPriceAgeSec': quote['age_sec'],
+            'currentPriceSource': quote['source'],
             'gap': gap,
             'startTimestamp': start_ts,
         })
@@ -365,7 +405,8 @@ def opinion_manual_trade_status():
         topic_id = request.args.get('topic_id', type=int)
         shares = request.args.get('shares', 10, type=int)
         shares = max(1, min(shares, 1000))
-        status = get_1h_market_for_trade(topic_id=topic_id, skip_time_check=True, shares=shares)
+        # 백그라운드에서 갱신 중인 스냅샷 조회 (첫 요청만 동기 계산)
+        status = trade_status_service.get(topic_id=topic_id, shares=shares)
         return jsonify({'success': status.get('success', False), **status})
     except Exception as e:
         logger.exception('opinion manual trade status: %s', e)
@@ -413,23 +454,10 @@ def opinion_manual_trade_execute():
             return str(obj)
         result = _to_serializable(result)
         try:
-            from core.trade_history import append_trade
-            import time
+            from core.trade_history import record_round_trip
             # 자전 완료(양쪽 체결)된 거래만 Overall에 기록. 미체결(Maker만 접수)은 제외.
             if result.get("round_trip_completed") is True:
-                rec = {
-                    "ts": int(time.time()),
-                    "direction": result.get("direction"),
-                    "shares": result.get("shares"),
-                    "maker_amount_usd": result.get("maker_amount_usd"),
-                    "taker_amount_usd": result.get("taker_amount_usd"),
-                    "maker_order_id": result.get("maker_order_id"),
-                    "taker_order_id": result.get("taker_order_id"),
-                    "success": True,
-                    "round_trip_completed": True,
-                    "source": "manual",
-                }
-                append_trade(rec)
+                record_round_trip(result, "manual")
         except Exception as e2:
             logger.debug("trade_history append: %s", e2)
         return jsonify(result), 200
@@ -438,6 +466,129 @@ def opinion_manual_trade_execute():
         return jsonify({'success': False, 'error': str(e)}), 200
 
 
+@app.route('/api/opinion/manual-trade/execute-multi', methods=['GET', 'POST', 'OPTIONS'])
+def opinion_manual_trade_execute_multi():
+    """
+    다중 페어 자전거래. POST Body: topic_id(선택), total_shares, shares_per_trade(기본 10), direction(UP|DOWN),
+    max_pairs(선택) → job_id 즉시 반환 (백그라운드 실행). GET: 보관 중인 작업 목록.
+    """
+    if request.method == 'OPTIONS':
+        return '', 200
+    if request.method == 'GET':
+        return jsonify({'success': True, 'jobs': list_multi_pair_jobs()})
+    try:
+        data = request.get_json() or {}
+        topic_id = data.get('topic_id')
+        direction = (data.get('direction') or '').strip().upper()
+        if topic_id is not None:
+            try:
+                topic_id = int(topic_id)
+            except (TypeError, ValueError):
+                topic_id = None
+        try:
+            total_shares = int(data.get('total_shares', 0))
+            shares_per_trade = int(data.get('shares_per_trade', 10))
+            max_pairs = int(data['max_pairs']) if data.get('max_pairs') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'total_shares / shares_per_trade / max_pairs는 숫자여야 합니다.'}), 400
+        if total_shares < 1:
+            return jsonify({'success': False, 'error': 'total_shares는 1 이상이어야 합니다.'}), 400
+        total_shares = min(total_shares, 100000)
+        shares_per_trade = max(1, min(shares_per_trade, 1000))
+        if direction and direction not in ('UP', 'DOWN'):
+            return jsonify({'success': False, 'error': 'direction은 UP 또는 DOWN이어야 합니다.'}), 400
+        # 체결된 라운드는 작업 스레드에서 거래 기록(source=multi)에 추가
+        result = start_multi_pair_job(
+            topic_id=topic_id,
+            total_shares=total_shares,
+            shares_per_trade=shares_per_trade,
+            direction=direction or None,
+            max_pairs=max_pairs,
+        )
+        return jsonify(result), 200
+    except Exception as e:
+        logger.exception('opinion manual trade execute-multi: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 200
+
+
+@app.route('/api/opinion/manual-trade/execute-multi/<job_id>')
+def opinion_manual_trade_execute_multi_status(job_id):
+    """다중 페어 자전거래 진행 상태 (UI 폴링용): 처리·체결 라운드, 체결 수량, 페어별 결과."""
+    job = get_multi_pair_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/opinion/manual-trade/execute-multi/<job_id>/stop', methods=['POST'])
+def opinion_manual_trade_execute_multi_stop(job_id):
+    """다중 페어 자전거래 중지 요청 (진행 중인 라운드는 마무리 후 종료)."""
+    if not stop_multi_pair_job(job_id):
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'success': True, 'job': get_multi_pair_job(job_id)})
+
+
+@app.route('/api/opinion/manual-trade/slice', methods=['GET', 'POST', 'OPTIONS'])
+def opinion_manual_trade_slice():
+    """
+    분할 자전거래. POST Body: topic_id(선택), target_shares, direction(UP|DOWN), account_id(Maker, 선택),
+    taker_account_id(선택), max_slice_shares(선택) → job_id 즉시 반환. GET: 보관 중인 작업 목록.
+    """
+    if request.method == 'OPTIONS':
+        return '', 200
+    if request.method == 'GET':
+        return jsonify({'success': True, 'jobs': list_slice_jobs()})
+    try:
+        data = request.get_json() or {}
+        topic_id = data.get('topic_id')
+        direction = (data.get('direction') or '').strip().upper()
+        if topic_id is not None:
+            try:
+                topic_id = int(topic_id)
+            except (TypeError, ValueError):
+                topic_id = None
+        try:
+            target_shares = int(data.get('target_shares', 0))
+            maker_id = int(data['account_id']) if data.get('account_id') is not None else None
+            taker_id = int(data['taker_account_id']) if data.get('taker_account_id') is not None else None
+            max_slice = int(data['max_slice_shares']) if data.get('max_slice_shares') is not None else None
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'error': 'target_shares / account_id / max_slice_shares는 숫자여야 합니다.'}), 400
+        if target_shares < 1:
+            return jsonify({'success': False, 'error': 'target_shares는 1 이상이어야 합니다.'}), 400
+        if direction and direction not in ('UP', 'DOWN'):
+            return jsonify({'success': False, 'error': 'direction은 UP 또는 DOWN이어야 합니다.'}), 400
+        result = start_slice_job(
+            topic_id=topic_id,
+            target_shares=target_shares,
+            direction=direction or None,
+            maker_account_id=maker_id,
+            taker_account_id=taker_id,
+            max_slice_shares=max_slice,
+        )
+        return jsonify(result), 200
+    except Exception as e:
+        logger.exception('opinion manual trade slice: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 200
+
+
+@app.route('/api/opinion/manual-trade/slice/<job_id>')
+def opinion_manual_trade_slice_status(job_id):
+    """분할 자전거래 진행 상태 (UI 폴링용): 체결 수량·진행률·조각별 결과·평균 체결 시간."""
+    job = get_slice_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'success': True, 'job': job})
+
+
+@app.route('/api/opinion/manual-trade/slice/<job_id>/stop', methods=['POST'])
+def opinion_manual_trade_slice_stop(job_id):
+    """분할 자전거래 중지 요청 (체결 대기 중인 조각은 마무리 후 종료)."""
+    if not stop_slice_job(job_id):
+        return jsonify({'success': False, 'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'success': True, 'job': get_slice_job(job_id)})
+
+
 @app.route('/api/opinion/auto/start', methods=['POST'])
 def opinion_auto_start():
     """자동 거래 시작. Body: shares(기본 10), account_id(선택, 미사용)."""
@@ -559,19 +710,23 @@ def _opinion_overall_volume(range_key: str):
 def _opinion_overall_usdt():
     """모든 Opinion 계정 EOA의 USDT 잔액 합계 + 계정별."""
     try:
-        from core.okx_balance import get_usdt_balance_for_address
+        from core.okx_balance import get_usdt_balances_cached
     except ImportError:
         return None
     accounts = opinion_account_manager.get_all()
     by_account = []
     total = 0.0
+    # 잔고 캐시(백그라운드 갱신) 우선, 없는 계정만 Multicall 1회로 조회 (실패한 주소만 단건 보완)
+    try:
+        balances = get_usdt_balances_cached(
+            [acc.eoa for acc in accounts],
+            proxies_by_address={acc.eoa: rpc_proxies_for(getattr(acc, 'proxy', None)) for acc in accounts if acc.eoa},
+        )
+    except Exception as e:
+        logger.warning('overall usdt balances: %s', e)
+        balances = {}
     for acc in accounts:
-        bal = None
-        try:
-            proxies = {'http': acc.proxy, 'https': acc.proxy} if getattr(acc, 'proxy', None) else None
-            bal = get_usdt_balance_for_address(acc.eoa, proxies=proxies)
-        except Exception:
-            pass
+        bal = (balances.get(acc.eoa) or (None, None))[0] if acc.eoa else None
         val = round(float(bal), 2) if bal is not None else None
         by_account.append({'id': acc.id, 'eoa_short': (acc.eoa or '')[:10] + '...', 'balance': val})
         if val is not None:
@@ -593,6 +748,26 @@ def opinion_trade_history():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/opinion/trade-latency')
+def opinion_trade_latency():
+    """
+    거래 단계별 지연 요약 (p50/p95/p99/max ms) + 적응형 타이밍 현재 값(timing). Query: limit(기본 200),
+    source=recent(메모리, 실패 포함)|history(거래 기록, 체결만), kind=manual|auto|multi|slice(선택).
+    """
+    try:
+        from core.trade_trace import get_summary
+        limit = max(1, min(1000, request.args.get('limit', 200, type=int)))
+        source = (request.args.get('source') or 'recent').strip().lower()
+        if source not in ('recent', 'history'):
+            return jsonify({'success': False, 'error': 'source는 recent 또는 history여야 합니다.'}), 400
+        kind = (request.args.get('kind') or '').strip().lower() or None
+        from core.opinion_trade_timing import trade_timing
+        return jsonify({'success': True, **get_summary(limit=limit, source=source, kind=kind), 'timing': trade_timing.status()})
+    except Exception as e:
+        logger.exception('opinion trade-latency: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @app.route('/api/opinion/overall')
 def opinion_overall():
     """Overall 카드: 총 거래량 또는 USDT 총합. Query: metric=volume|usdt, range=6h|1d|7d|30d."""
@@ -744,15 +919,34 @@ def opinion_trades(wallet_address):
 
 @app.route('/api/btc/price')
 def get_btc_price():
-    """Get current BTC price (Pyth 실시간)."""
+    """Get current BTC price (Pyth 실시간). Query: symbol(기본 BTC, ETH/SOL 등 구독 중인 피드). age_sec/source 포함."""
     try:
-        price = btc_price_service.get_current_price()
-        return jsonify({'success': True, 'price': price})
+        symbol = (request.args.get('symbol') or 'BTC').strip().upper()
+        quote = btc_price_service.get_price_quote(symbol)
+        return jsonify({
+            'success': True,
+            'symbol': symbol,
+            'price': quote['price'],
+            'age_sec': quote['age_sec'],
+            'source': quote['source'],
+        })
+    except UnknownFeedError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         logger.error("BTC price error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/btc/stream-health')
+def get_btc_stream_health():
+    """Pyth 시세 스트림 상태 (재연결 횟수, 틱 간격 p50/p95/p99, 재연결 후 첫 틱까지 시간)."""
+    try:
+        return jsonify({'success': True, **btc_price_service.get_stream_health()})
+    except Exception as e:
+        logger.exception('btc stream health: %s', e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 if __name__ == '__main__':
     import os
     logger.info("ℹ️ 오봇(O-Bot) Opinion 전용 모드")
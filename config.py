@@ -46,7 +46,13 @@ class Config:
     # Pyth Network (BTC Price)
     PYTH_API_URL = os.getenv('PYTH_API_URL', 'https://hermes.pyth.network/api/latest_price_feeds')
     BTC_PRICE_FEED_ID = os.getenv('BTC_PRICE_FEED_ID', '0xe62df6c8b4a85fe1a67db44dc12de5db330f7ac66b72dc658afedf0f4a415b43')
-    
+    ETH_PRICE_FEED_ID = os.getenv('ETH_PRICE_FEED_ID', '0xff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace')
+    SOL_PRICE_FEED_ID = os.getenv('SOL_PRICE_FEED_ID', '0xef0d8b6fda2ceba41da15d4095d1da392a0d2f8ed0c6c7bc0f4cfac8c280b56d')
+    # 하나의 Pyth WS 연결로 구독할 자산 (쉼표 구분). 위 *_PRICE_FEED_ID가 있는 심볼만 사용
+    PYTH_STREAM_SYMBOLS = [
+        s.strip().upper() for s in os.getenv('PYTH_STREAM_SYMBOLS', 'BTC,ETH,SOL').split(',') if s.strip()
+    ]
+
     # Trading Parameters
     MIN_PRICE_GAP = int(os.getenv('MIN_PRICE_GAP', 200))  # $200
     MIN_BALANCE = float(os.getenv('MIN_BALANCE', 20))  # $20
@@ -56,7 +62,19 @@ class Config:
     POST_MAKER_DELAY_SEC = float(os.getenv('POST_MAKER_DELAY_SEC', '0.2'))  # Maker 직후 대기(초)
     WASH_TRADE_POLL_INTERVAL_SEC = float(os.getenv('WASH_TRADE_POLL_INTERVAL_SEC', '0.4'))  # 체결 폴링 간격
     WASH_TRADE_POLL_TIMEOUT_SEC = float(os.getenv('WASH_TRADE_POLL_TIMEOUT_SEC', '10'))  # 미체결 시 취소까지 대기
+    ADAPTIVE_TIMING_ENABLED = os.getenv('ADAPTIVE_TIMING_ENABLED', 'true').lower() in ('1', 'true', 'yes')  # 관측 지연으로 Maker 대기·폴링·timeout 단축 (위 3개 값이 상한)
+    ADAPTIVE_TIMING_MIN_SAMPLES = int(os.getenv('ADAPTIVE_TIMING_MIN_SAMPLES', '20'))  # 이 수만큼 왕복이 관측되기 전에는 설정값 사용
+    ADAPTIVE_TIMING_MAX_UNFILLED_RATE = float(os.getenv('ADAPTIVE_TIMING_MAX_UNFILLED_RATE', '0.05'))  # 최근 미체결 비율이 이보다 높으면 설정값으로 복귀
     USE_TAKER_MARKET_ORDER = os.getenv('USE_TAKER_MARKET_ORDER', 'true').lower() in ('1', 'true', 'yes')  # Taker MARKET 주문 사용
+    STATUS_LATENCY_BUDGET_SEC = float(os.getenv('STATUS_LATENCY_BUDGET_SEC', '3'))  # 거래 상태 조회 병렬 단계 지연 예산(초)
+    TRADE_STATUS_REFRESH_SEC = float(os.getenv('TRADE_STATUS_REFRESH_SEC', '0.25'))  # 거래 상태 입력(WS 호가·BTC 시세) 변경 확인 주기(초). 바뀐 topic만 재계산
+    TRADE_STATUS_MAX_AGE_SEC = float(os.getenv('TRADE_STATUS_MAX_AGE_SEC', '2'))  # 실행 시 재사용할 스냅샷 최대 나이(초, 입력이 그대로면 나이와 무관하게 재사용)
+    MULTI_PAIR_MAX_PAIRS = int(os.getenv('MULTI_PAIR_MAX_PAIRS', '10'))  # 다중 페어 자전거래 동시 페어 수 상한
+    MULTI_PAIR_ROUNDS_PER_SEC = float(os.getenv('MULTI_PAIR_ROUNDS_PER_SEC', '2'))  # 전체 페어 합산 초당 자전거래 시작 상한 (0이면 제한 없음)
+    SLICE_MIN_SHARES = int(os.getenv('SLICE_MIN_SHARES', '10'))  # 분할 자전거래 조각 최소 수량 (호가 깊이 모를 때도 이 값)
+    SLICE_MAX_SHARES = int(os.getenv('SLICE_MAX_SHARES', '200'))  # 분할 자전거래 조각 최대 수량
+    SLICE_DEPTH_FRACTION = float(os.getenv('SLICE_DEPTH_FRACTION', '0.5'))  # 조각 수량 = Maker 가격 부근 호가 잔량 × 이 비율
+    SLICE_MAX_TARGET_SHARES = int(os.getenv('SLICE_MAX_TARGET_SHARES', '20000'))  # 분할 자전거래 1회 목표 수량 상한
 
     # 잔고 조회 실패 시에도 진행 (BSC/OKX 접속 불가 시 .env에 SKIP_BALANCE_CHECK=1 설정)
     SKIP_BALANCE_CHECK = os.getenv('SKIP_BALANCE_CHECK', '').strip().lower() in ('1', 'true', 'yes')
@@ -0,0 +1,290 @@
+"""
+BSC RPC 풀 - 여러 공개 RPC를 지연(EWMA)·오류율로 점수화해 가장 좋은 곳으로 보내고,
+느린 호출은 두 번째 RPC로 헤지(hedge)해 먼저 온 응답 사용.
+
+- 백그라운드 프로버가 BSC_RPC_PROBE_SEC마다 전체 RPC에 eth_blockNumber → 점수 갱신
+- 실제 호출 결과도 점수에 반영 (성공 지연 / 실패). 프록시 경유 호출은 점수에 넣지 않음 (직접 연결 순위 기준)
+- 연속 실패한 RPC는 잠시(쿨다운) 순위에서 뒤로
+- best_url(): CLOB SDK Client용 (자주 바뀌면 Client 캐시가 무효화되므로 히스테리시스 적용)
+- call(): 잔고 조회 등 JSON-RPC 직접 호출용 (헤지 포함)
+- 프록시는 프로세스 환경변수가 아니라 호출(계정)마다 명시적으로 전달 (rpc_proxies_for)
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.opinion_config import get_proxy_dict
+
+logger = logging.getLogger(__name__)
+
+BSC_RPC_URL = (os.getenv("BSC_RPC_URL", "https://bsc-dataseed.binance.org/") or "").strip() or "https://bsc-dataseed.binance.org/"
+# BSC RPC 대체 URL (쉼표 구분, 비어 있으면 아래 기본 목록 사용)
+_BSC_RPC_FALLBACK_RAW = (os.getenv("BSC_RPC_FALLBACKS") or "").strip()
+BSC_RPC_FALLBACKS = [u.strip() for u in _BSC_RPC_FALLBACK_RAW.split(",") if u.strip()] or [
+    "https://bsc-dataseed1.binance.org/",
+    "https://bsc-dataseed2.binance.org/",
+    "https://bsc-dataseed.bnbchain.org",
+    "https://bsc-dataseed-public.bnbchain.org",
+    "https://bsc-rpc.publicnode.com",
+    "https://1rpc.io/bnb",
+    "https://bsc.drpc.org",
+    "https://bsc.publicnode.com",
+    "https://bsc-dataseed.nariox.org",
+    "https://bsc-dataseed.defibit.io",
+    "https://binance.nodereal.io",
+    "https://bsc-mainnet.public.blastapi.io",
+]
+
+# 계정 프록시로 BSC RPC도 보낼지 (서버에서 RPC 막혀 있을 때). 끄려면 BSC_RPC_USE_PROXY=0
+BSC_RPC_USE_PROXY = os.getenv("BSC_RPC_USE_PROXY", "1").strip() != "0"
+
+# 프로브 주기(초)
+BSC_RPC_PROBE_SEC = max(5, int(os.getenv("BSC_RPC_PROBE_SEC", "30").strip() or "30"))
+# 헤지 지연(ms). 0이면 자동: 1순위 RPC EWMA 지연의 3배 (최소 HEDGE_MIN_MS)
+BSC_RPC_HEDGE_MS = int(os.getenv("BSC_RPC_HEDGE_MS", "0").strip() or "0")
+HEDGE_MIN_MS = 150
+RPC_TIMEOUT_SEC = 8
+EWMA_ALPHA = 0.3
+# 연속 실패 N회 이상이면 쿨다운 (점점 길게, 최대 COOLDOWN_MAX_SEC)
+COOLDOWN_AFTER_FAILURES = 3
+COOLDOWN_BASE_SEC = 30
+COOLDOWN_MAX_SEC = 600
+# best_url 교체 조건: 새 1순위 점수가 현재 선호 RPC 점수의 이 비율보다 낮을 때만 (Client 재생성 최소화)
+PREFERRED_SWITCH_RATIO = 0.6
+
+
+class RpcCallError(Exception):
+    """모든 RPC에서 호출 실패 (마지막 오류 메시지 포함)."""
+
+
+def rpc_proxies_for(proxy_str: Optional[str]) -> Optional[Dict[str, str]]:
+    """계정 프록시 문자열 → BSC RPC용 requests proxies dict. 프록시 없음/BSC_RPC_USE_PROXY=0이면 None."""
+    if not BSC_RPC_USE_PROXY or not proxy_str:
+        return None
+    return get_proxy_dict(proxy_str) or None
+
+
+def _all_urls() -> List[str]:
+    urls = [BSC_RPC_URL]
+    for u in BSC_RPC_FALLBACKS:
+        if u and u not in urls:
+            urls.append(u)
+    return urls
+
+
+class BscRpcPool:
+    """RPC별 {"latency_ms"(EWMA), "error_rate"(EWMA 0~1), "failures", "cooldown_until", "last_error"}."""
+
+    def __init__(self, urls: List[str]):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {
+            # 초기값: 설정 순서대로 약간씩 불리하게 → 측정 전에는 .env BSC_RPC_URL 우선
+            u: {"latency_ms": 300.0 + i * 10, "error_rate": 0.0, "failures": 0, "cooldown_until": 0.0,
+                "last_error": None, "samples": 0}
+            for i, u in enumerate(urls)
+        }
+        self._preferred: Optional[str] = urls[0] if urls else None
+        self._session: Optional[requests.Session] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(4, len(urls)), thread_name_prefix="bsc-rpc")
+        # 프로브 전용 (죽은 RPC 프로브가 최대 RPC_TIMEOUT_SEC 동안 워커를 잡아도 실제 호출·헤지가 줄서지 않도록)
+        self._probe_executor = ThreadPoolExecutor(max_workers=max(4, len(urls)), thread_name_prefix="bsc-rpc-probe")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=len(self._stats) or 4, pool_maxsize=8)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            # 환경변수 HTTP(S)_PROXY 무시 (BSC RPC는 직접 연결, 필요하면 call(proxies=...))
+            s.trust_env = False
+            self._session = s
+        return self._session
+
+    # ---------- 점수 ----------
+
+    @staticmethod
+    def _score(st: Dict[str, Any]) -> float:
+        """낮을수록 좋음. 지연 × (1 + 4 × 오류율)."""
+        return st["latency_ms"] * (1.0 + 4.0 * st["error_rate"])
+
+    def record(self, url: str, latency_ms: Optional[float], ok: bool, error: Optional[str] = None) -> None:
+        with self._lock:
+            st = self._stats.get(url)
+            if st is None:
+                return
+            st["samples"] += 1
+            st["error_rate"] = (1 - EWMA_ALPHA) * st["error_rate"] + EWMA_ALPHA * (0.0 if ok else 1.0)
+            if ok:
+                st["latency_ms"] = (1 - EWMA_ALPHA) * st["latency_ms"] + EWMA_ALPHA * float(latency_ms or 0)
+                st["failures"] = 0
+                st["cooldown_until"] = 0.0
+            else:
+                st["failures"] += 1
+                st["last_error"] = (error or "")[:120]
+                if st["failures"] >= COOLDOWN_AFTER_FAILURES:
+                    backoff = COOLDOWN_BASE_SEC * (2 ** (st["failures"] - COOLDOWN_AFTER_FAILURES))
+                    st["cooldown_until"] = time.time() + min(COOLDOWN_MAX_SEC, backoff)
+
+    def report_failure(self, url: str, error: Optional[str] = None) -> None:
+        """외부(SDK 등)에서 이 RPC로 실패했을 때 알림."""
+        self.record(url, None, ok=False, error=error)
+
+    def ranked(self) -> List[str]:
+        """좋은 순서로 정렬된 RPC 목록. 쿨다운 중인 RPC는 맨 뒤."""
+        now = time.time()
+        with self._lock:
+            items = list(self._stats.items())
+        return [u for u, st in sorted(items, key=lambda kv: (kv[1]["cooldown_until"] > now, self._score(kv[1])))]
+
+    def best_url(self) -> str:
+        """
+        CLOB SDK Client용 RPC. 현재 선호 RPC가 쿨다운이거나
+        1순위가 확실히 더 좋을 때(PREFERRED_SWITCH_RATIO)만 교체.
+        """
+        ranked = self.ranked()
+        if not ranked:
+            return BSC_RPC_URL
+        top = ranked[0]
+        now = time.time()
+        with self._lock:
+            cur = self._preferred
+            cur_st = self._stats.get(cur) if cur else None
+            top_st = self._stats[top]
+            if (
+                cur_st is None
+                or cur_st["cooldown_until"] > now
+                or self._score(top_st) < self._score(cur_st) * PREFERRED_SWITCH_RATIO
+            ):
+                if cur != top:
+                    logger.info("BSC RPC 선호 교체: %s → %s", (cur or "-")[:40], top[:40])
+                self._preferred = top
+            return self._preferred
+
+    # ---------- 호출 ----------
+
+    def _post(self, url: str, payload: dict, timeout: float, proxies: Optional[dict]) -> Any:
+        """
+        JSON-RPC 1회. 점수(EWMA)는 직접 연결 호출만 반영
+        (프록시 경유 지연·실패는 프록시 상태라 RPC 순위를 왜곡함).
+        """
+        t0 = time.perf_counter()
+        try:
+            r = self._get_session().post(url, json=payload, timeout=timeout, proxies=proxies or {})
+            r.raise_for_status()
+            data = r.json()
+            if data.get("error"):
+                raise RpcCallError(str(data["error"])[:200])
+            if "result" not in data:
+                raise RpcCallError("no result")
+            if not proxies:
+                self.record(url, (time.perf_counter() - t0) * 1000, ok=True)
+            return data["result"]
+        except Exception as e:
+            if not proxies:
+                self.record(url, None, ok=False, error=f"{type(e).__name__}: {e}")
+            raise
+
+    def _hedge_delay_sec(self, url: str) -> float:
+        if BSC_RPC_HEDGE_MS > 0:
+            return BSC_RPC_HEDGE_MS / 1000.0
+        with self._lock:
+            lat = (self._stats.get(url) or {}).get("latency_ms", 300.0)
+        return max(HEDGE_MIN_MS, 3.0 * lat) / 1000.0
+
+    def call(
+        self,
+        method: str,
+        params: list,
+        timeout: float = RPC_TIMEOUT_SEC,
+        hedge: bool = True,
+        proxies: Optional[dict] = None,
+        attempts: int = 3,
+    ) -> Any:
+        """
+        JSON-RPC 호출. 1순위로 보내고 헤지 지연 안에 응답 없으면 2순위에도 보내 먼저 성공한 결과 반환.
+        둘 다 실패하면 다음 순위로 최대 attempts개 RPC까지 시도. 전부 실패 시 RpcCallError.
+        """
+        payload = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        ranked = self.ranked()[: max(1, attempts)]
+        last_err: Optional[Exception] = None
+        i = 0
+        while i < len(ranked):
+            primary = ranked[i]
+            futures = {self._executor.submit(self._post, primary, payload, timeout, proxies): primary}
+            i += 1
+            done, _ = futures_wait(futures, timeout=self._hedge_delay_sec(primary) if hedge else None)
+            if not done and hedge and i < len(ranked):
+                futures[self._executor.submit(self._post, ranked[i], payload, timeout, proxies)] = ranked[i]
+                i += 1
+            pending = set(futures)
+            while pending:
+                done, pending = futures_wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    try:
+                        return fut.result()
+                    except Exception as e:
+                        last_err = e
+        raise RpcCallError(f"BSC RPC 호출 실패 ({method}): {type(last_err).__name__}: {last_err}")
+
+    # ---------- 프로버 ----------
+
+    def probe_all(self) -> None:
+        """전체 RPC에 eth_blockNumber 병렬 전송 → 점수 갱신."""
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []}
+        futures = [self._probe_executor.submit(self._post, u, payload, RPC_TIMEOUT_SEC, None) for u in list(self._stats)]
+        futures_wait(futures, timeout=RPC_TIMEOUT_SEC + 1)
+
+    def start(self) -> None:
+        """백그라운드 프로버 시작. 이미 동작 중이면 무시."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="bsc-rpc-probe")
+        self._thread.start()
+        logger.info("BSC RPC 프로버 시작 (%d개, %ds 주기)", len(self._stats), BSC_RPC_PROBE_SEC)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=RPC_TIMEOUT_SEC + 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.debug("BSC RPC probe error: %s", e)
+            self._stop.wait(BSC_RPC_PROBE_SEC)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """순위 순 RPC 상태 (UI/스크립트용)."""
+        now = time.time()
+        with self._lock:
+            stats = {u: dict(st) for u, st in self._stats.items()}
+            preferred = self._preferred
+        out = []
+        for u in self.ranked():
+            st = stats[u]
+            out.append({
+                "url": u,
+                "latency_ms": round(st["latency_ms"], 1),
+                "error_rate": round(st["error_rate"], 3),
+                "score": round(self._score(st), 1),
+                "samples": st["samples"],
+                "cooldown_sec": max(0, int(st["cooldown_until"] - now)),
+                "last_error": st["last_error"],
+                "preferred": u == preferred,
+            })
+        return out
+
+
+bsc_rpc_pool = BscRpcPool(_all_urls())
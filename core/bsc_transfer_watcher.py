@@ -0,0 +1,156 @@
+"""
+BSC USDT Transfer 로그 감시 - 계정 주소가 보내거나 받은 Transfer 로그를 블록 구간 eth_getLogs로 따라가며
+잔고 캐시(okx_balance.balance_cache)를 증분 갱신 (balanceOf 폴링 없이 1블록 안에 잔고 변화 반영)
+
+- 선택 기능: BALANCE_LOG_WATCH=1일 때만 app 시작 시 동작
+- BALANCE_LOG_POLL_SEC마다 eth_blockNumber → 새 블록이 있으면 [이전 커서+1, 최신] 구간을
+  from=계정 / to=계정 두 번의 eth_getLogs로 조회 (계정끼리 이체는 (txHash, logIndex)로 중복 제거)
+- 기본은 bsc_rpc_pool(점수·헤지), BALANCE_LOG_RPC_URL을 주면 그 노드로만 (로컬 노드·대역 서버)
+- 처음 시작·BALANCE_LOG_MAX_RANGE 블록 이상 밀림·이어 붙일 수 없는 주소는 Multicall 전체 조회로 맞춘 뒤 이어감
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from core.bsc_rpc_pool import BscRpcPool, bsc_rpc_pool
+from core.okx_balance import BSC_USDT_ADDRESS, balance_cache
+
+logger = logging.getLogger(__name__)
+
+BALANCE_LOG_WATCH = os.getenv("BALANCE_LOG_WATCH", "").strip().lower() in ("1", "true", "yes")
+BALANCE_LOG_POLL_SEC = max(0.2, float(os.getenv("BALANCE_LOG_POLL_SEC", "1").strip() or "1"))
+BALANCE_LOG_RPC_URL = (os.getenv("BALANCE_LOG_RPC_URL") or "").strip()
+# 한 번에 따라갈 최대 블록 수 (공개 RPC eth_getLogs 구간 제한 여유). 더 밀리면 전체 조회로 다시 맞춤
+BALANCE_LOG_MAX_RANGE = 50
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def _topic_for(address: str) -> str:
+    return "0x" + "0" * 24 + address[2:].lower()
+
+
+def _address_from_topic(topic: str) -> str:
+    return "0x" + topic[-40:].lower()
+
+
+class TransferWatcher:
+    """블록 커서 1개로 계정 주소 USDT Transfer 로그를 따라가며 balance_cache에 반영."""
+
+    def __init__(self):
+        self._cursor: Optional[int] = None  # 마지막으로 로그를 다 본 블록
+        self._addresses_fn: Optional[Callable[[], Iterable[Optional[str]]]] = None
+        self._rpc = BscRpcPool([BALANCE_LOG_RPC_URL]) if BALANCE_LOG_RPC_URL else bsc_rpc_pool
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"polls": 0, "logs": 0, "resyncs": 0, "errors": 0, "last_error": None, "last_poll_ms": None}
+        self._lock = threading.Lock()
+
+    def _addresses(self) -> List[str]:
+        addrs = self._addresses_fn() if self._addresses_fn else []
+        return list(dict.fromkeys(a.strip() for a in addrs if a and isinstance(a, str) and len(a.strip()) == 42))
+
+    def _get_logs(self, from_block: int, to_block: int, topics: list) -> List[Dict[str, Any]]:
+        return self._rpc.call("eth_getLogs", [{
+            "fromBlock": hex(from_block),
+            "toBlock": hex(to_block),
+            "address": BSC_USDT_ADDRESS,
+            "topics": topics,
+        }]) or []
+
+    def _transfers(self, addrs: List[str], from_block: int, to_block: int) -> List[Tuple[str, int, float]]:
+        """구간 내 계정 관련 Transfer → [(주소, 블록, 증감액)] (보낸 쪽 -, 받은 쪽 +)."""
+        watched = {a.lower(): a for a in addrs}
+        account_topics = [_topic_for(a) for a in addrs]
+        seen = set()
+        out: List[Tuple[str, int, float]] = []
+        for topics in ([TRANSFER_TOPIC, account_topics], [TRANSFER_TOPIC, None, account_topics]):
+            for log in self._get_logs(from_block, to_block, topics):
+                key = (log.get("transactionHash"), log.get("logIndex"))
+                t = log.get("topics") or []
+                if key in seen or len(t) < 3 or log.get("removed"):
+                    continue
+                seen.add(key)
+                block = int(log["blockNumber"], 16)
+                # BSC USDT 18 decimals
+                amount = int(log.get("data") or "0x0", 16) / 1e18
+                src, dst = _address_from_topic(t[1]), _address_from_topic(t[2])
+                if src in watched:
+                    out.append((watched[src], block, -amount))
+                if dst in watched:
+                    out.append((watched[dst], block, amount))
+        return out
+
+    def _resync(self, addrs: List[str], head: int) -> None:
+        """
+        Multicall 전체 조회로 캐시를 맞추고 커서를 조회 블록으로 (이후 로그만 이어 붙임).
+        Multicall을 받은 RPC가 head보다 뒤처졌을 수 있어 커서는 캐시 블록 중 가장 낮은 값 (head 이하).
+        """
+        balance_cache.refresh(addrs)
+        blocks = [(balance_cache.get(a) or {}).get("block") for a in addrs]
+        self._cursor = min([head] + [b for b in blocks if b is not None])
+        with self._lock:
+            self._stats["resyncs"] += 1
+
+    def poll_once(self) -> int:
+        """새 블록 구간 1회 처리. Returns: 반영한 Transfer 수."""
+        addrs = self._addresses()
+        if not addrs:
+            return 0
+        head = int(self._rpc.call("eth_blockNumber", [], hedge=False), 16)
+        with self._lock:
+            self._stats["polls"] += 1
+        if self._cursor is None or head - self._cursor > BALANCE_LOG_MAX_RANGE:
+            self._resync(addrs, head)
+            return 0
+        if head <= self._cursor:
+            return 0
+        from_block = self._cursor + 1
+        transfers = self._transfers(addrs, from_block, head)
+        stale = balance_cache.apply_transfers(addrs, from_block, head, transfers)
+        if stale:
+            balance_cache.refresh(stale)
+        self._cursor = head
+        with self._lock:
+            self._stats["logs"] += len(transfers)
+        return len(transfers)
+
+    def start(self, addresses_fn: Callable[[], Iterable[Optional[str]]]) -> None:
+        """감시 시작 (BALANCE_LOG_WATCH=1일 때만). 이미 동작 중이면 무시."""
+        self._addresses_fn = addresses_fn
+        if not BALANCE_LOG_WATCH:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="bsc-transfer-watch")
+        self._thread.start()
+        logger.info("USDT Transfer 로그 감시 시작 (%.1fs 주기, RPC=%s)", BALANCE_LOG_POLL_SEC,
+                    BALANCE_LOG_RPC_URL or "bsc_rpc_pool")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                # 구간을 놓쳤을 수 있음 → 다음 회차에 커서가 밀려 있으면 전체 조회로 맞춤
+                with self._lock:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"[:200]
+                logger.debug("Transfer 로그 감시 오류: %s", e)
+            with self._lock:
+                self._stats["last_poll_ms"] = int((time.monotonic() - t0) * 1000)
+            self._stop.wait(BALANCE_LOG_POLL_SEC)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, enabled=BALANCE_LOG_WATCH, cursor=self._cursor)
+
+
+transfer_watcher = TransferWatcher()
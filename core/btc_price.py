@@ -1,13 +1,18 @@
 """
-BTC Price Module - 실시간 Bitcoin 시세 (Pyth Network)
+BTC Price Module - 실시간 시세 (Pyth Network)
 - REST: 한 번 조회 (fallback)
-- WebSocket: Pyth Hermes wss 연결로 실시간 수신, 캐시 갱신
+- WebSocket: Pyth Hermes wss 연결 1개로 여러 피드(BTC/ETH/SOL 등) 실시간 수신, 피드별 캐시 갱신
+- 피드 추가/제거는 연결을 끊지 않고 SUBSCRIBE/UNSUBSCRIBE 메시지로 반영
 """
 import asyncio
 import json
 import logging
+import math
+import random
 import threading
 import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 import requests
 
@@ -15,56 +20,214 @@ from config import Config
 
 logger = logging.getLogger(__name__)
 
-# WebSocket으로 받은 최신 가격 캐시 (스레드에서 갱신)
-_stream_price: float | None = None
-_stream_updated: float = 0.0
+# 구독 대상 피드: 심볼(BTC, ETH, ...) -> feed_id (정규화: 소문자, 0x 제외)
+_feeds: Dict[str, str] = {}
+# WebSocket으로 받은 피드별 최신 가격 캐시 (스레드에서 갱신). feed_id -> (price, updated)
+_stream_state: Dict[str, Tuple[float, float]] = {}
+# 피드별 최근 가격 이력. feed_id -> deque[(updated, price)]
+_stream_history: Dict[str, Deque[Tuple[float, float]]] = {}
+# 연결된 상태에서 즉시 보낼 구독/해제 대기열 (live 전송용)
+_pending_subscribe: Set[str] = set()
+_pending_unsubscribe: Set[str] = set()
+_stream_lock = threading.Lock()
 _stream_stop = threading.Event()
 _stream_thread: threading.Thread | None = None
 
 # 스트림 가격 유효 시간(초). 이 시간 지나면 get_current_price()가 REST로 fallback
 STREAM_PRICE_MAX_AGE = 120
+# 피드당 보관할 가격 이력 개수 (Hermes는 초당 1~3회 갱신 → 약 5~10분)
+STREAM_HISTORY_MAXLEN = 1000
+# 구독/해제 대기열 확인 주기(초). recv 대기 최대 시간
+PENDING_FLUSH_INTERVAL = 1.0
 
-# 특정 시점 가격 캐시 (topic 구간당 1회만 Pyth Benchmarks 호출). key: start_ts(초), value: 가격
-_price_at_ts_cache: dict[int, float] = {}
+# REST fallback: 공유 세션(커넥션 풀) + 피드별 single-flight + 짧은 메모이제이션
+# 스트림이 멈춰도 대시보드 폴링이 Hermes REST 호출 폭주로 이어지지 않도록 함
+REST_PRICE_MEMO_SEC = 2.0
+_rest_session: requests.Session | None = None
+_rest_session_lock = threading.Lock()
+# feed_id -> (price, fetched_at)
+_rest_memo: Dict[str, Tuple[float, float]] = {}
+# feed_id -> 해당 피드 REST 조회 중 잠금 (동시 요청은 한 번만 나가고 나머지는 결과 공유)
+_rest_inflight: Dict[str, threading.Lock] = {}
+
+# 특정 시점 가격 캐시 (topic 구간당 1회만 Pyth Benchmarks 호출). key: (feed_id, start_ts(초)), value: 가격
+_price_at_ts_cache: dict[tuple[str, int], float] = {}
 PYTH_BENCHMARKS_URL = "https://benchmarks.pyth.network"
 
 # Pyth Hermes WebSocket
 PYTH_HERMES_WS_URL = "wss://hermes.pyth.network/ws"
-RECONNECT_DELAY = 5
+# 재연결 대기: 지터 포함 지수 백오프 (0 ~ min(MAX, BASE * 2^시도)). 첫 틱 수신 시 시도 횟수 초기화
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
+# 워치독: 틱 간격(gap) 분포로 정지 판단 임계값을 정함. 임계값 동안 틱이 없으면 강제 재연결
+# 임계값 = clamp(p99 gap * STALL_GAP_MULTIPLIER, STALL_TIMEOUT_MIN, STALL_TIMEOUT_MAX)
+STALL_GAP_MULTIPLIER = 4.0
+STALL_TIMEOUT_MIN = 3.0
+STALL_TIMEOUT_MAX = 30.0
+STALL_TIMEOUT_DEFAULT = 10.0  # gap 표본이 부족할 때
+STALL_MIN_SAMPLES = 20
+
+# 스트림 상태 지표 (_stream_lock 안에서 갱신/조회)
+_stream_stats: Dict[str, object] = {
+    "connected": False,
+    "connects": 0,
+    "reconnects": 0,
+    "stall_reconnects": 0,
+    "last_connect_at": None,
+    "last_tick_at": None,
+    "last_error": None,
+}
+# 소켓 단위 틱 간격(초) 표본 (모든 피드 합산)
+_tick_gaps: Deque[float] = deque(maxlen=2000)
+# 재연결 후 첫 틱까지 걸린 시간(초) 표본
+_first_tick_latencies: Deque[float] = deque(maxlen=100)
+
+
+class UnknownFeedError(ValueError):
+    """등록되지 않은 심볼(피드 ID 없음). 호출 측 입력 오류 → API는 400."""
+
+
+def _norm_feed_id(feed_id: str) -> str:
+    """feed_id 정규화: 소문자, 0x 제거. Hermes WS 응답의 id는 0x 없이 옴."""
+    f = (feed_id or "").strip().lower()
+    return f[2:] if f.startswith("0x") else f
+
+
+def _configured_feeds() -> Dict[str, str]:
+    """Config.PYTH_STREAM_SYMBOLS 중 {SYMBOL}_PRICE_FEED_ID가 설정된 심볼만 {심볼: feed_id}로 반환."""
+    out: Dict[str, str] = {}
+    symbols = getattr(Config, "PYTH_STREAM_SYMBOLS", None) or ["BTC"]
+    if "BTC" not in symbols:
+        symbols = ["BTC"] + list(symbols)
+    for sym in symbols:
+        fid = getattr(Config, f"{sym}_PRICE_FEED_ID", None)
+        if fid:
+            out[sym] = _norm_feed_id(fid)
+    return out
+
+
+def _get_rest_session() -> requests.Session:
+    """Pyth REST(Hermes/Benchmarks)용 공유 세션. keep-alive 커넥션 재사용."""
+    global _rest_session
+    with _rest_session_lock:
+        if _rest_session is None:
+            sess = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _rest_session = sess
+        return _rest_session
+
+
+def _parse_price_info(price_info) -> float | None:
+    """{"price": int, "expo": int} → float 가격."""
+    if not isinstance(price_info, dict):
+        return None
+    p = int(price_info.get("price", 0))
+    expo = int(price_info.get("expo", 0))
+    return float(p * (10 ** expo))
 
 
-def _parse_pyth_price_from_message(data: dict) -> float | None:
+def _parse_pyth_price_from_message(data: dict) -> List[Tuple[str, float]]:
     """
-    Pyth WS 'price_update' 또는 SSE 스타일 payload에서 BTC 가격 추출.
-    - price_feed: { "parsed": [{ "price": { "price": int, "expo": int } }] }
-    - 또는 parsed[0].price (price, expo)
+    Pyth WS 'price_update' 또는 SSE 스타일 payload에서 (feed_id, 가격) 목록 추출.
+    - price_feed: { "id": "...", "price": { "price": int, "expo": int } }
+    - 또는 parsed: [{ "id": "...", "price": {...} }, ...] (여러 피드)
     """
+    out: List[Tuple[str, float]] = []
     try:
-        # price_update 스타일
         price_feed = data.get("price_feed") or data.get("parsed")
-        if isinstance(price_feed, list) and price_feed:
-            price_info = price_feed[0].get("price") or price_feed[0]
-        elif isinstance(price_feed, dict):
-            price_info = price_feed.get("price") or price_feed
+        if isinstance(price_feed, dict):
+            entries = [price_feed]
+        elif isinstance(price_feed, list):
+            entries = price_feed
         else:
-            return None
-        if isinstance(price_info, dict):
-            p = int(price_info.get("price", 0))
-            expo = int(price_info.get("expo", 0))
-            return float(p * (10 ** expo))
-        return None
+            return out
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            price = _parse_price_info(entry.get("price") or entry)
+            fid = _norm_feed_id(entry.get("id") or "")
+            if price is not None and fid:
+                out.append((fid, price))
     except (KeyError, IndexError, TypeError, ValueError):
+        pass
+    return out
+
+
+def _record_stream_price(feed_id: str, price: float) -> None:
+    """피드별 최신가·이력 갱신. 구독 해제된 피드의 늦게 온 메시지는 무시."""
+    now = time.time()
+    with _stream_lock:
+        if feed_id not in _feeds.values():
+            return
+        _stream_state[feed_id] = (price, now)
+        hist = _stream_history.get(feed_id)
+        if hist is None:
+            hist = _stream_history[feed_id] = deque(maxlen=STREAM_HISTORY_MAXLEN)
+        hist.append((now, price))
+
+
+def _quote(symbol: str, entry: Tuple[float, float], source: str, now: float) -> Dict[str, object]:
+    """(price, updated_at) → get_price_quote() 응답 dict."""
+    price, updated = entry
+    return {
+        "symbol": symbol,
+        "price": price,
+        "age_sec": round(max(0.0, now - updated), 3),
+        "source": source,
+        "updated_at": updated,
+    }
+
+
+def _percentile(sorted_values: List[float], q: float) -> float | None:
+    """정렬된 표본에서 q(0~100) 백분위 (nearest-rank)."""
+    if not sorted_values:
         return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def _stall_threshold() -> float:
+    """최근 틱 간격 분포 기반 정지 판단 임계값(초)."""
+    with _stream_lock:
+        gaps = sorted(_tick_gaps)
+    if len(gaps) < STALL_MIN_SAMPLES:
+        return STALL_TIMEOUT_DEFAULT
+    p99 = _percentile(gaps, 99) or 0.0
+    return max(STALL_TIMEOUT_MIN, min(STALL_TIMEOUT_MAX, p99 * STALL_GAP_MULTIPLIER))
+
 
+def _reconnect_delay(attempt: int) -> float:
+    """지터 포함 지수 백오프 (full jitter)."""
+    cap = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * (2 ** max(0, attempt)))
+    return random.uniform(0, cap)
 
-async def _btc_ws_loop(feed_id: str):
-    """WebSocket 연결 유지 및 수신 루프. 끊기면 재연결."""
-    global _stream_price, _stream_updated
+
+def _on_stream_tick(connected_at: float, first_tick_seen: bool) -> None:
+    """소켓에서 가격 틱 수신 시 gap·첫 틱 지연 기록."""
+    now = time.time()
+    with _stream_lock:
+        last = _stream_stats.get("last_tick_at")
+        if first_tick_seen and last is not None:
+            _tick_gaps.append(now - last)
+        elif not first_tick_seen:
+            _first_tick_latencies.append(now - connected_at)
+        _stream_stats["last_tick_at"] = now
+
+
+async def _price_ws_loop():
+    """
+    WebSocket 연결 유지 및 수신 루프. 모든 피드를 하나의 연결에서 처리.
+    예외로 끊기거나, 워치독이 정지(임계값 동안 틱 없음)를 감지하면 지터 백오프 후 재연결.
+    """
     try:
         import websockets
     except ImportError:
         logger.warning("websockets 미설치. pip install websockets 후 재시작하면 실시간 시세가 동작합니다.")
         return
+    attempt = 0
     while not _stream_stop.is_set():
         try:
             async with websockets.connect(
@@ -73,46 +236,107 @@ async def _btc_ws_loop(feed_id: str):
                 ping_timeout=10,
                 close_timeout=5,
             ) as ws:
-                # 구독 메시지 전송
-                await ws.send(json.dumps({"type": "subscribe", "ids": [feed_id]}))
-                logger.info("BTC 실시간 시세 WebSocket 연결됨: %s", PYTH_HERMES_WS_URL)
-                async for raw in ws:
-                    if _stream_stop.is_set():
+                connected_at = time.time()
+                first_tick_seen = False
+                last_tick = connected_at
+                # 기존 구독 복원 (재연결 시). 대기열은 비우고 현재 피드 전체를 한 번에 구독
+                with _stream_lock:
+                    ids = sorted(set(_feeds.values()))
+                    _pending_subscribe.clear()
+                    _pending_unsubscribe.clear()
+                    if _stream_stats["connects"]:
+                        _stream_stats["reconnects"] += 1
+                    _stream_stats["connects"] += 1
+                    _stream_stats["connected"] = True
+                    _stream_stats["last_connect_at"] = connected_at
+                if ids:
+                    await ws.send(json.dumps({"type": "subscribe", "ids": ["0x" + f for f in ids]}))
+                logger.info("실시간 시세 WebSocket 연결됨: %s (피드 %d개)", PYTH_HERMES_WS_URL, len(ids))
+                stall_limit = _stall_threshold()
+                stall_limit_at = time.time()
+                while not _stream_stop.is_set():
+                    # 워치독: 임계값 동안 아무 피드도 갱신되지 않으면 조용히 멈춘 소켓으로 보고 재연결
+                    if ids and time.time() - last_tick >= stall_limit:
+                        with _stream_lock:
+                            _stream_stats["stall_reconnects"] += 1
+                        logger.warning(
+                            "시세 WebSocket 정지 감지 (%.1fs 동안 틱 없음, 임계 %.1fs) → 재연결",
+                            time.time() - last_tick, stall_limit,
+                        )
                         break
+                    # live 구독/해제: add_feed/remove_feed 호출 시 재연결 없이 즉시 전송
+                    had_ids = bool(ids)
+                    with _stream_lock:
+                        to_sub = sorted(_pending_subscribe)
+                        _pending_subscribe.clear()
+                        to_unsub = sorted(_pending_unsubscribe)
+                        _pending_unsubscribe.clear()
+                        ids = sorted(set(_feeds.values()))
+                    if to_sub:
+                        await ws.send(json.dumps({"type": "subscribe", "ids": ["0x" + f for f in to_sub]}))
+                    if ids and not had_ids:
+                        # 피드 없이 대기하던 연결에 첫 구독 → 워치독은 구독 시점부터 계산 (바로 정지로 오판하지 않게)
+                        last_tick = time.time()
+                    if to_unsub:
+                        await ws.send(json.dumps({"type": "unsubscribe", "ids": ["0x" + f for f in to_unsub]}))
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=PENDING_FLUSH_INTERVAL)
+                    except asyncio.TimeoutError:
+                        continue
                     try:
                         data = json.loads(raw)
-                        price = _parse_pyth_price_from_message(data)
-                        if price is not None and price > 0:
-                            _stream_price = price
-                            _stream_updated = time.time()
-                            logger.debug("BTC 시세 갱신: $%s", f"{price:,.2f}")
+                        ticked = False
+                        for feed_id, price in _parse_pyth_price_from_message(data):
+                            if price > 0:
+                                _record_stream_price(feed_id, price)
+                                ticked = True
+                                logger.debug("시세 갱신 %s: $%s", feed_id[:8], f"{price:,.2f}")
+                        if ticked:
+                            _on_stream_tick(connected_at, first_tick_seen)
+                            last_tick = time.time()
+                            if not first_tick_seen:
+                                first_tick_seen = True
+                                attempt = 0
                     except json.JSONDecodeError:
                         pass
                     except Exception as e:
-                        logger.debug("BTC WS 메시지 파싱: %s", e)
+                        logger.debug("Pyth WS 메시지 파싱: %s", e)
+                    # 임계값은 gap 분포 변화에 맞춰 30초마다 재계산
+                    if time.time() - stall_limit_at >= 30:
+                        stall_limit = _stall_threshold()
+                        stall_limit_at = time.time()
         except Exception as e:
             if not _stream_stop.is_set():
-                logger.warning("BTC WebSocket 연결 끊김: %s, %s초 후 재연결", e, RECONNECT_DELAY)
+                with _stream_lock:
+                    _stream_stats["last_error"] = str(e)[:200]
+                logger.warning("시세 WebSocket 연결 끊김: %s", e)
+        with _stream_lock:
+            _stream_stats["connected"] = False
         if not _stream_stop.is_set():
-            await asyncio.sleep(RECONNECT_DELAY)
+            delay = _reconnect_delay(attempt)
+            attempt += 1
+            logger.info("시세 WebSocket %.2f초 후 재연결 (시도 %d)", delay, attempt)
+            await asyncio.sleep(delay)
 
 
-def _run_btc_stream():
+def _run_price_stream():
     """백그라운드: asyncio + WebSocket 루프 실행 (스레드 1개에서 이벤트 루프)."""
-    feed_id = getattr(Config, "BTC_PRICE_FEED_ID", "0xe62df6c8b4a85fe1a67db44dc12de5db330f7ac66b72dc658afedf0f4a415b43")
-    logger.info("BTC 실시간 시세 WebSocket 연결 중: %s", PYTH_HERMES_WS_URL)
+    logger.info("실시간 시세 WebSocket 연결 중: %s", PYTH_HERMES_WS_URL)
     try:
-        asyncio.run(_btc_ws_loop(feed_id))
+        asyncio.run(_price_ws_loop())
     except Exception as e:
-        logger.exception("BTC WebSocket 루프 종료: %s", e)
+        logger.exception("시세 WebSocket 루프 종료: %s", e)
 
 
 class BTCPriceService:
-    """실시간 BTC/USD 시세 (Pyth Network REST + WebSocket 스트림)"""
+    """실시간 시세 (Pyth Network REST + WebSocket 스트림). 기본 심볼 BTC, ETH/SOL 등 다중 피드 지원."""
 
     def __init__(self):
         self.api_url = Config.PYTH_API_URL
         self.feed_id = Config.BTC_PRICE_FEED_ID
+        with _stream_lock:
+            for sym, fid in _configured_feeds().items():
+                _feeds.setdefault(sym, fid)
 
     def start_stream(self):
         """Pyth Hermes WebSocket 스트림 시작 (백그라운드 스레드). 한 번만 호출."""
@@ -120,9 +344,9 @@ class BTCPriceService:
         if _stream_thread is not None and _stream_thread.is_alive():
             return
         _stream_stop.clear()
-        _stream_thread = threading.Thread(target=_run_btc_stream, daemon=True)
+        _stream_thread = threading.Thread(target=_run_price_stream, daemon=True, name="pyth-ws")
         _stream_thread.start()
-        logger.info("BTC 실시간 시세 WebSocket 스트림 시작")
+        logger.info("실시간 시세 WebSocket 스트림 시작 (%s)", ", ".join(sorted(_feeds)))
 
     def stop_stream(self):
         """스트림 종료."""
@@ -130,31 +354,169 @@ class BTCPriceService:
         if _stream_thread is not None:
             _stream_thread.join(timeout=3)
 
-    def get_current_price(self):
+    def get_stream_health(self) -> Dict[str, object]:
         """
-        현재 BTC/USD 가격 반환.
-        WebSocket 스트림이 켜져 있고 최근 값이 있으면 캐시 사용, 아니면 REST 한 번 호출.
+        스트림 상태 지표: 연결 여부, 재연결 횟수(정지 감지 포함), 틱 간격 백분위,
+        재연결 후 첫 틱까지 시간, 현재 정지 임계값, 피드별 마지막 갱신 나이.
         """
-        global _stream_price, _stream_updated
         now = time.time()
-        if _stream_price is not None and (now - _stream_updated) <= STREAM_PRICE_MAX_AGE:
-            return _stream_price
-        return self._fetch_via_rest()
+        with _stream_lock:
+            stats = dict(_stream_stats)
+            gaps = sorted(_tick_gaps)
+            firsts = list(_first_tick_latencies)
+            feeds = {sym: _stream_state.get(fid) for sym, fid in _feeds.items()}
+
+        def _ms(v):
+            return round(v * 1000, 1) if v is not None else None
 
-    def get_price_at_timestamp(self, timestamp_sec: int) -> float | None:
+        last_tick = stats.get("last_tick_at")
+        firsts_sorted = sorted(firsts)
+        return {
+            "connected": stats["connected"],
+            "connects": stats["connects"],
+            "reconnects": stats["reconnects"],
+            "stall_reconnects": stats["stall_reconnects"],
+            "last_error": stats["last_error"],
+            "last_tick_age_sec": round(now - last_tick, 3) if last_tick else None,
+            "stall_threshold_sec": round(_stall_threshold(), 3),
+            "gap_ms": {
+                "p50": _ms(_percentile(gaps, 50)),
+                "p95": _ms(_percentile(gaps, 95)),
+                "p99": _ms(_percentile(gaps, 99)),
+                "max": _ms(gaps[-1] if gaps else None),
+                "samples": len(gaps),
+            },
+            "time_to_first_tick_ms": {
+                "last": _ms(firsts[-1] if firsts else None),
+                "p50": _ms(_percentile(firsts_sorted, 50)),
+                "p95": _ms(_percentile(firsts_sorted, 95)),
+                "samples": len(firsts),
+            },
+            "feeds": {
+                sym: (round(now - st[1], 3) if st else None) for sym, st in feeds.items()
+            },
+        }
+
+    def add_feed(self, symbol: str, feed_id: Optional[str] = None) -> bool:
+        """
+        피드 추가 (재연결 없이 live 구독). feed_id 미지정 시 Config.{SYMBOL}_PRICE_FEED_ID 사용.
+        Returns: 추가(또는 feed_id 변경) 시 True, 이미 같은 피드면 False.
         """
-        특정 Unix 시각(초)의 BTC 가격을 Pyth Benchmarks API로 조회. 같은 구간은 캐시해 두고 재호출 안 함.
+        sym = (symbol or "").strip().upper()
+        fid = _norm_feed_id(feed_id or getattr(Config, f"{sym}_PRICE_FEED_ID", "") or "")
+        if not sym or not fid:
+            raise UnknownFeedError(f"피드 ID를 알 수 없습니다: {symbol}")
+        with _stream_lock:
+            old = _feeds.get(sym)
+            if old == fid:
+                return False
+            _feeds[sym] = fid
+            if old and old not in _feeds.values():
+                _pending_unsubscribe.add(old)
+                _pending_subscribe.discard(old)
+                _stream_state.pop(old, None)
+                _stream_history.pop(old, None)
+            _pending_subscribe.add(fid)
+            _pending_unsubscribe.discard(fid)
+        logger.info("시세 피드 추가: %s (%s...)", sym, fid[:8])
+        return True
+
+    def remove_feed(self, symbol: str) -> bool:
+        """피드 제거 (재연결 없이 live 해제). BTC도 제거 가능하지만 get_current_price()는 REST로만 동작."""
+        sym = (symbol or "").strip().upper()
+        with _stream_lock:
+            fid = _feeds.pop(sym, None)
+            if fid is None:
+                return False
+            if fid not in _feeds.values():
+                _pending_unsubscribe.add(fid)
+                _pending_subscribe.discard(fid)
+                _stream_state.pop(fid, None)
+                _stream_history.pop(fid, None)
+        logger.info("시세 피드 제거: %s", sym)
+        return True
+
+    def get_feeds(self) -> Dict[str, str]:
+        """구독 중인 {심볼: feed_id(0x 포함)}."""
+        with _stream_lock:
+            return {sym: "0x" + fid for sym, fid in _feeds.items()}
+
+    def _feed_id_for(self, symbol: str) -> str:
+        """심볼 → 정규화된 feed_id. 스트림에서 제거된 심볼도 Config에 있으면 REST용으로 사용."""
+        sym = (symbol or "BTC").strip().upper()
+        with _stream_lock:
+            fid = _feeds.get(sym)
+        if not fid:
+            fid = _norm_feed_id(getattr(Config, f"{sym}_PRICE_FEED_ID", "") or "")
+        if not fid:
+            raise UnknownFeedError(f"등록되지 않은 시세 피드: {sym}")
+        return fid
+
+    def get_price_quote(
+        self,
+        symbol: str = "BTC",
+        max_age: float = STREAM_PRICE_MAX_AGE,
+        allow_rest: bool = True,
+    ) -> Dict[str, object]:
+        """
+        현재가 + 나이(초) + 출처 반환. 호출 측이 신선도 기준을 직접 정할 수 있음.
+        - 스트림 값이 max_age 이내면 {"source": "stream"}.
+        - 아니면 REST_PRICE_MEMO_SEC 이내 REST 결과 재사용, 그것도 없으면 allow_rest=True일 때만 REST 1회(single-flight).
+        - allow_rest=False면 네트워크 호출 없이 가장 최근 값(오래됐어도)을 그대로 반환. 값이 없으면 price=None.
+        REST 조회 실패 시 예외는 그대로 전달.
+        Returns:
+            {"symbol", "price", "age_sec", "source": "stream"|"rest"|None, "updated_at"}
+        """
+        sym = (symbol or "BTC").strip().upper()
+        fid = self._feed_id_for(sym)
+        now = time.time()
+        with _stream_lock:
+            stream = _stream_state.get(fid)
+            memo = _rest_memo.get(fid)
+        if stream is not None and (now - stream[1]) <= max_age:
+            return _quote(sym, stream, "stream", now)
+        if memo is not None and (now - memo[1]) <= min(max_age, REST_PRICE_MEMO_SEC):
+            return _quote(sym, memo, "rest", now)
+        if not allow_rest:
+            # 가장 최근 값(스트림/REST 중 최신)을 나이와 함께 반환
+            candidates = [(v, src) for v, src in ((stream, "stream"), (memo, "rest")) if v is not None]
+            if not candidates:
+                return {"symbol": sym, "price": None, "age_sec": None, "source": None, "updated_at": None}
+            latest, src = max(candidates, key=lambda c: c[0][1])
+            return _quote(sym, latest, src, now)
+        return _quote(sym, self._fetch_via_rest_single_flight(fid), "rest", time.time())
+
+    def get_current_price(self, symbol: str = "BTC"):
+        """
+        현재 {symbol}/USD 가격 반환.
+        WebSocket 스트림이 켜져 있고 최근 값이 있으면 캐시 사용, 아니면 REST(공유 세션, 동시 호출 1회로 합침).
+        """
+        return self.get_price_quote(symbol)["price"]
+
+    def get_price_history(self, symbol: str = "BTC", since_sec: Optional[float] = None) -> List[Tuple[float, float]]:
+        """스트림으로 받은 최근 가격 이력 [(수신 시각, 가격), ...]. since_sec 지정 시 최근 N초만."""
+        fid = self._feed_id_for(symbol)
+        with _stream_lock:
+            hist = list(_stream_history.get(fid) or ())
+        if since_sec is not None:
+            cutoff = time.time() - float(since_sec)
+            hist = [h for h in hist if h[0] >= cutoff]
+        return hist
+
+    def get_price_at_timestamp(self, timestamp_sec: int, symbol: str = "BTC") -> float | None:
+        """
+        특정 Unix 시각(초)의 가격을 Pyth Benchmarks API로 조회. 같은 구간은 캐시해 두고 재호출 안 함.
         Opinion 토픽 시작 시각에 쓰면 됨.
         """
         ts = int(timestamp_sec)
         if ts <= 0:
             return None
-        if ts in _price_at_ts_cache:
-            return _price_at_ts_cache[ts]
+        fid = self._feed_id_for(symbol)
+        if (fid, ts) in _price_at_ts_cache:
+            return _price_at_ts_cache[(fid, ts)]
         try:
             url = f"{PYTH_BENCHMARKS_URL}/v1/updates/price/{ts}"
-            params = {"ids": [self.feed_id], "parsed": True}
-            resp = requests.get(url, params={"ids": self.feed_id, "parsed": "true"}, timeout=15)
+            resp = _get_rest_session().get(url, params={"ids": "0x" + fid, "parsed": "true"}, timeout=15)
             if resp.status_code == 404:
                 logger.warning("Pyth Benchmarks: 해당 시각(%s) 가격 없음", ts)
                 return None
@@ -167,12 +529,10 @@ class BTCPriceService:
                 price_info = parsed.get("price") or {}
             else:
                 return None
-            p = int(price_info.get("price", 0))
-            expo = int(price_info.get("expo", 0))
-            price = float(p * (10 ** expo))
+            price = _parse_price_info(price_info) or 0.0
             if price > 0:
-                _price_at_ts_cache[ts] = price
-                logger.info("BTC 가격(시점 %s): $%s", ts, f"{price:,.2f}")
+                _price_at_ts_cache[(fid, ts)] = price
+                logger.info("%s 가격(시점 %s): $%s", (symbol or "BTC").upper(), ts, f"{price:,.2f}")
                 return price
         except requests.exceptions.RequestException as e:
             logger.warning("Pyth Benchmarks 조회 실패 (ts=%s): %s", ts, e)
@@ -180,11 +540,30 @@ class BTCPriceService:
             logger.warning("Pyth Benchmarks 파싱 실패 (ts=%s): %s", ts, e)
         return None
 
-    def _fetch_via_rest(self):
+    def _fetch_via_rest_single_flight(self, feed_id: str) -> Tuple[float, float]:
+        """
+        피드별 REST 조회를 하나로 합침. 먼저 온 요청이 조회하는 동안 나머지는 기다렸다가 같은 결과를 사용.
+        Returns: (price, fetched_at)
+        """
+        with _stream_lock:
+            lock = _rest_inflight.setdefault(feed_id, threading.Lock())
+        with lock:
+            with _stream_lock:
+                memo = _rest_memo.get(feed_id)
+            if memo is not None and (time.time() - memo[1]) <= REST_PRICE_MEMO_SEC:
+                return memo
+            price = float(self._fetch_via_rest(feed_id))
+            entry = (price, time.time())
+            with _stream_lock:
+                _rest_memo[feed_id] = entry
+            return entry
+
+    def _fetch_via_rest(self, feed_id: Optional[str] = None):
         """REST API로 한 번 조회 (Pyth latest_price_feeds)."""
+        fid = _norm_feed_id(feed_id or self.feed_id)
         try:
-            params = {"ids[]": self.feed_id}
-            response = requests.get(self.api_url, params=params, timeout=10)
+            params = {"ids[]": "0x" + fid}
+            response = _get_rest_session().get(self.api_url, params=params, timeout=10)
             response.raise_for_status()
             data = response.json()
             if not data or len(data) == 0:
@@ -193,14 +572,14 @@ class BTCPriceService:
             price_data = price_feed.get("price", {})
             price = int(price_data.get("price", 0))
             expo = int(price_data.get("expo", 0))
-            btc_price = price * (10 ** expo)
-            logger.info("BTC 가격(REST): $%s", f"{btc_price:,.2f}")
-            return btc_price
+            value = price * (10 ** expo)
+            logger.info("가격(REST, %s...): $%s", fid[:8], f"{value:,.2f}")
+            return value
         except requests.exceptions.RequestException as e:
-            logger.error("BTC 가격 REST 실패: %s", e)
+            logger.error("가격 REST 실패: %s", e)
             raise
         except (KeyError, IndexError, ValueError) as e:
-            logger.error("BTC 가격 파싱 실패: %s", e)
+            logger.error("가격 파싱 실패: %s", e)
             raise
 
     def get_price_gap(self, start_price):
@@ -0,0 +1,87 @@
+"""
+백그라운드 작업(job) 보관소 - 분할 자전거래(opinion_slicer)·다중 페어 자전거래(opinion_multi_pair) 공용
+- 작업 상태 dict + 중지 이벤트를 job_id로 보관, 갱신·조회는 락 안에서
+- 보관 개수(max_jobs)를 넘으면 오래된 종료 작업(done/stopped/failed)부터 정리
+- 프로세스 메모리에만 보관 → 작업 조회·중지는 작업을 시작한 프로세스에서만 가능 (gunicorn은 워커 1개로 실행)
+"""
+import copy
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATES = ("done", "stopped", "failed")
+
+
+class JobRegistry:
+    """job_id → 상태 dict("_"로 시작하는 키는 내부용, 조회 결과에서 제외) + 중지 이벤트."""
+
+    def __init__(self, kind: str, max_jobs: int = 20):
+        self.kind = kind
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._stop_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def create(self, fields: Dict[str, Any]) -> Tuple[str, threading.Event]:
+        """새 작업 등록 (state 기본 waiting). Returns: (job_id, 중지 이벤트)"""
+        job_id = uuid.uuid4().hex[:12]
+        stop = threading.Event()
+        job = {"job_id": job_id, "state": "waiting", "error": None}
+        job.update(fields)
+        with self._lock:
+            # 오래된 종료 작업부터 정리
+            done = [k for k, v in self._jobs.items() if v["state"] in FINISHED_STATES]
+            for k in done[: max(0, len(self._jobs) + 1 - self.max_jobs)]:
+                self._jobs.pop(k, None)
+                self._stop_events.pop(k, None)
+            self._jobs[job_id] = job
+            self._stop_events[job_id] = stop
+        return job_id, stop
+
+    def run(self, job_id: str, target: Callable[..., None], *args: Any) -> None:
+        """작업 본체를 데몬 스레드로 실행. 처리되지 않은 예외는 state=failed로 기록."""
+        def _target():
+            try:
+                target(*args)
+            except Exception as e:
+                logger.exception("%s 작업 %s 오류: %s", self.kind, job_id, e)
+                self.update(job_id, state="failed", error=str(e))
+
+        threading.Thread(target=_target, daemon=True, name=f"{self.kind}-job-{job_id}").start()
+
+    @contextmanager
+    def edit(self, job_id: str) -> Iterator[Optional[Dict[str, Any]]]:
+        """락을 잡은 채 작업 dict를 직접 수정 (없으면 None). 여러 필드를 함께 바꿀 때."""
+        with self._lock:
+            yield self._jobs.get(job_id)
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태 복사본 (내부용 "_" 키 제외). 없으면 None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return copy.deepcopy({k: v for k, v in job.items() if not k.startswith("_")})
+
+    def stop(self, job_id: str) -> bool:
+        """중지 요청 (이벤트 set). 작업이 없으면 False."""
+        with self._lock:
+            ev = self._stop_events.get(job_id)
+        if ev is None:
+            return False
+        ev.set()
+        return True
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._jobs)
@@ -2,16 +2,27 @@
 OKX Wallet API 연동 - 지갑 주소별 USDT 잔액 조회
 
 - OKX Web3 API 키가 있으면: OKX balance-by-address 사용
-- 없으면: BSC 공개 RPC로 USDT(ERC20) balanceOf 호출 (BNB Chain 기준)
+- 없으면: BSC 공개 RPC로 USDT(ERC20) balanceOf 호출 (BNB Chain 기준). RPC 선택·헤지는 bsc_rpc_pool
+- 여러 주소: get_usdt_balances_with_reason() → Multicall3 tryBlockAndAggregate eth_call 1회로 전부 조회
+  (계정 20개도 왕복 1회). 실패한 주소는 OKX 묶음 조회(주소 여러 개를 서명 요청 1회, 공유 세션),
+  그래도 실패한 주소만 단건 경로(OKX → BSC)로 보완
+- balance_cache: 주소별 잔액을 조회 블록·시각과 함께 메모리에 보관. 백그라운드 갱신(BALANCE_REFRESH_SEC) +
+  자체 체결·취소 시 차감·무효화 → 거래 전 잔고 확인은 메모리로, 여유가 빠듯할 때만 네트워크 조회.
+  BALANCE_LOG_WATCH=1이면 bsc_transfer_watcher가 USDT Transfer 로그로 블록마다 증분 갱신
 """
 import logging
 import os
+import threading
 import time
 import hmac
 import hashlib
 import base64
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+
+from core.bsc_rpc_pool import RpcCallError, bsc_rpc_pool
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +30,31 @@ logger = logging.getLogger(__name__)
 BSC_USDT_ADDRESS = "0x55d398326f99059fF775485246999027B3197955"
 # balanceOf(address) selector: first 4 bytes of keccak256("balanceOf(address)")
 BALANCE_OF_SELECTOR = "0x70a08231"
-# BSC 공개 RPC (무료, rate limit 있음)
-BSC_RPC_URL = os.getenv("BSC_RPC_URL", "https://bsc-dataseed1.binance.org/")
+# Multicall3 (모든 EVM 체인 동일 주소, BSC 배포됨)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+# tryBlockAndAggregate(bool,(address,bytes)[]) selector
+TRY_BLOCK_AND_AGGREGATE_SELECTOR = "0x399542e9"
+# Multicall 1회에 넣을 최대 주소 수 (eth_call gas 한도 여유)
+MULTICALL_MAX_BATCH = 200
+# 잔고 캐시: 백그라운드 갱신 주기(초), 거래 전 확인에 쓸 수 있는 최대 경과(초), 필요 금액 대비 여유 비율
+BALANCE_REFRESH_SEC = max(3, int(os.getenv("BALANCE_REFRESH_SEC", "15").strip() or "15"))
+BALANCE_CACHE_MAX_AGE_SEC = float(os.getenv("BALANCE_CACHE_MAX_AGE_SEC", "60").strip() or "60")
+BALANCE_CACHE_HEADROOM = float(os.getenv("BALANCE_CACHE_HEADROOM", "0.2").strip() or "0.2")
+# 자체 체결 차감분을 유지하는 시간(초): 이 안에 조회한 값은 아직 온체인 정산 전일 수 있어 차감을 다시 적용
+BALANCE_DEBIT_HOLD_SEC = 20.0
 # OKX API base
 OKX_WEB3_BASE = "https://web3.okx.com"
+OKX_BALANCE_PATH = "/api/v5/wallet/asset/all-token-balances-by-address"
+# OKX 잔액 조회 1회에 넣을 최대 주소 수 (address=주소1,주소2,...)
+OKX_MAX_ADDRESSES = max(1, int(os.getenv("OKX_BALANCE_BATCH", "20").strip() or "20"))
 # BSC chain id (OKX)
 CHAIN_ID_BSC = 56
 
 
+_okx_session: Optional[requests.Session] = None
+_okx_session_lock = threading.Lock()
+
+
 def _get_okx_credentials():
     """OKX Web3 API 키가 설정돼 있으면 (key, secret, passphrase) 반환, 없으면 None."""
     key = (os.getenv("OKX_WEB3_API_KEY") or "").strip()
@@ -44,86 +72,13 @@ def _okx_sign(secret_key: str, timestamp: str, method: str, path_with_query: str
     return base64.b64encode(sig).decode("utf-8")
 
 
-def _fetch_usdt_via_okx(address: str, proxies: Optional[dict] = None) -> Optional[float]:
-    """
-    OKX Wallet API로 해당 주소의 토큰 잔액 조회 후 USDT만 합산.
-    실패 시 None 반환.
-    """
-    creds = _get_okx_credentials()
-    if not creds:
-        return None
-    api_key, secret_key, passphrase = creds
-    url = f"{OKX_WEB3_BASE}/api/v5/wallet/asset/all-token-balances-by-address"
-    params = {"address": address, "chains": f"{CHAIN_ID_BSC}", "filter": "1"}
-    query = "&".join(f"{k}={v}" for k, v in params.items())
-    path_with_query = f"/api/v5/wallet/asset/all-token-balances-by-address?{query}"
-    timestamp = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
-    sign = _okx_sign(secret_key, timestamp, "GET", path_with_query)
-    headers = {
-        "OK-ACCESS-KEY": api_key,
-        "OK-ACCESS-SIGN": sign,
-        "OK-ACCESS-TIMESTAMP": timestamp,
-        "OK-ACCESS-PASSPHRASE": passphrase,
-        "Content-Type": "application/json",
-    }
-    try:
-        r = requests.get(url, params=params, headers=headers, proxies=proxies or {}, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        if data.get("code") != "0":
-            logger.warning("OKX balance API error: %s", data.get("msg", data))
-            return None
-        total_usdt = 0.0
-        for item in data.get("data") or []:
-            for asset in item.get("tokenAssets") or []:
-                if (asset.get("symbol") or "").upper() == "USDT":
-                    try:
-                        total_usdt += float(asset.get("balance") or 0)
-                    except (TypeError, ValueError):
-                        pass
-        # 0 USDT도 유효한 잔고이므로 0.0 반환 (total_usdt is not None 일 때만)
-        return total_usdt if total_usdt is not None else None
-    except Exception as e:
-        logger.warning("OKX balance fetch failed for %s: %s", address[:10], e)
-        return None
-
-
 def _fetch_usdt_via_bsc_rpc(address: str, proxies: Optional[dict] = None) -> Optional[float]:
     """
     BSC 공개 RPC로 USDT(ERC20) balanceOf 호출.
     address는 0x 패딩 32바이트로 eth_call에 넣음.
     """
-    if not address or not address.startswith("0x"):
-        return None
-    # ABI: address is 32 bytes, left-padded with zeros (24 zeros + 20-byte address)
-    addr_hex = "0" * 24 + address[2:].lower() if len(address) >= 42 else ""
-    if len(addr_hex) != 64:
-        return None
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "eth_call",
-        "params": [
-            {
-                "to": BSC_USDT_ADDRESS,
-                "data": BALANCE_OF_SELECTOR + addr_hex,
-            },
-            "latest",
-        ],
-    }
-    try:
-        r = requests.post(BSC_RPC_URL, json=payload, proxies={}, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        result = data.get("result")
-        if not result or result == "0x":
-            return 0.0
-        raw = int(result, 16)
-        # BSC USDT 18 decimals
-        return raw / 1e18
-    except Exception as e:
-        logger.warning("BSC RPC balance fetch failed for %s: %s", address[:10], e)
-        return None
+    value, _ = _fetch_usdt_via_bsc_rpc_with_reason(address, proxies)
+    return value
 
 
 def get_usdt_balance_for_address(
@@ -179,52 +134,107 @@ def get_usdt_balance_with_reason(
     return None, reason or "BSC RPC 조회 실패"
 
 
-def _fetch_usdt_via_okx_with_reason(address: str, proxies: Optional[dict] = None) -> Tuple[Optional[float], Optional[str]]:
-    """OKX 조회. (잔액, None) 또는 (None, 실패사유)."""
+def _get_okx_session() -> requests.Session:
+    """OKX Web3 API용 공유 세션 (keep-alive 커넥션 재사용)."""
+    global _okx_session
+    with _okx_session_lock:
+        if _okx_session is None:
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8)
+            sess.mount("https://", adapter)
+            _okx_session = sess
+        return _okx_session
+
+
+def _okx_signed_get(path: str, params: Dict[str, str], proxies: Optional[dict] = None) -> dict:
+    """
+    서명된 OKX GET 1회 (쿼리 문자열을 직접 만들어 서명 대상과 실제 요청 경로를 일치시킴).
+    OKX API 키 미설정이면 ValueError, HTTP 오류는 requests 예외 그대로.
+    """
     creds = _get_okx_credentials()
     if not creds:
-        return None, "OKX API 키 미설정"
+        raise ValueError("OKX API 키 미설정")
     api_key, secret_key, passphrase = creds
-    url = f"{OKX_WEB3_BASE}/api/v5/wallet/asset/all-token-balances-by-address"
-    params = {"address": address, "chains": f"{CHAIN_ID_BSC}", "filter": "1"}
     query = "&".join(f"{k}={v}" for k, v in params.items())
-    path_with_query = f"/api/v5/wallet/asset/all-token-balances-by-address?{query}"
+    path_with_query = f"{path}?{query}"
     timestamp = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
-    sign = _okx_sign(secret_key, timestamp, "GET", path_with_query)
     headers = {
         "OK-ACCESS-KEY": api_key,
-        "OK-ACCESS-SIGN": sign,
+        "OK-ACCESS-SIGN": _okx_sign(secret_key, timestamp, "GET", path_with_query),
         "OK-ACCESS-TIMESTAMP": timestamp,
         "OK-ACCESS-PASSPHRASE": passphrase,
         "Content-Type": "application/json",
     }
+    r = _get_okx_session().get(OKX_WEB3_BASE + path_with_query, headers=headers, proxies=proxies or {}, timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+def _okx_usdt_by_address(data: dict, addresses: List[str]) -> Dict[str, float]:
+    """
+    OKX 잔액 응답 → 주소별 USDT 합계 (키: 입력 주소). 자산 항목의 address로 나누고,
+    주소 1개 조회라 address가 없는 항목은 그 주소로. 응답에 없는 주소는 0 USDT.
+    """
+    by_lower = {a.lower(): a for a in addresses}
+    out = {a: 0.0 for a in addresses}
+    for item in data.get("data") or []:
+        for asset in item.get("tokenAssets") or []:
+            if (asset.get("symbol") or "").upper() != "USDT":
+                continue
+            addr = (asset.get("address") or "").lower()
+            owner = by_lower.get(addr) if addr else (addresses[0] if len(addresses) == 1 else None)
+            if owner is None:
+                continue
+            try:
+                out[owner] += float(asset.get("balance") or 0)
+            except (TypeError, ValueError):
+                pass
+    return out
+
+
+def _fetch_usdt_via_okx_batch(
+    addresses: List[str],
+    proxies: Optional[dict] = None,
+) -> Dict[str, Tuple[Optional[float], Optional[str]]]:
+    """
+    OKX Wallet API 1회(address=주소1,주소2,...)로 여러 주소 USDT 잔액 조회 (최대 OKX_MAX_ADDRESSES개).
+    Returns: {주소: (잔액, None) 또는 (None, 실패사유)} — 요청이 실패하면 모든 주소가 같은 사유
+    """
+    if not addresses:
+        return {}
+    if not _get_okx_credentials():
+        return {a: (None, "OKX API 키 미설정") for a in addresses}
+    params = {"address": ",".join(addresses), "chains": f"{CHAIN_ID_BSC}", "filter": "1"}
+    label = addresses[0][:10] if len(addresses) == 1 else f"{len(addresses)}개 주소"
     try:
-        r = requests.get(url, params=params, headers=headers, proxies=proxies or {}, timeout=10)
-        r.raise_for_status()
-        data = r.json()
+        data = _okx_signed_get(OKX_BALANCE_PATH, params, proxies)
         if data.get("code") != "0":
             msg = data.get("msg") or data.get("message") or str(data.get("code", ""))
             reason = f"OKX API 응답 오류(code={data.get('code')}, msg={msg})"
             logger.warning("OKX balance API error: %s", reason)
-            return None, reason
-        total_usdt = 0.0
-        for item in data.get("data") or []:
-            for asset in item.get("tokenAssets") or []:
-                if (asset.get("symbol") or "").upper() == "USDT":
-                    try:
-                        total_usdt += float(asset.get("balance") or 0)
-                    except (TypeError, ValueError):
-                        pass
-        return total_usdt, None
+            return {a: (None, reason) for a in addresses}
+        return {a: (bal, None) for a, bal in _okx_usdt_by_address(data, addresses).items()}
     except requests.exceptions.Timeout:
-        logger.warning("OKX balance timeout for %s", address[:10])
-        return None, "OKX API 요청 시간 초과"
+        logger.warning("OKX balance timeout for %s", label)
+        reason = "OKX API 요청 시간 초과"
     except requests.exceptions.ProxyError as e:
-        logger.warning("OKX balance proxy error for %s: %s", address[:10], e)
-        return None, "OKX API 프록시 오류"
+        logger.warning("OKX balance proxy error for %s: %s", label, e)
+        reason = "OKX API 프록시 오류"
     except Exception as e:
-        logger.warning("OKX balance fetch failed for %s: %s", address[:10], e)
-        return None, f"OKX API 오류: {type(e).__name__}"
+        logger.warning("OKX balance fetch failed for %s: %s", label, e)
+        reason = f"OKX API 오류: {type(e).__name__}"
+    return {a: (None, reason) for a in addresses}
+
+
+def _fetch_usdt_via_okx_with_reason(address: str, proxies: Optional[dict] = None) -> Tuple[Optional[float], Optional[str]]:
+    """OKX 조회. (잔액, None) 또는 (None, 실패사유)."""
+    return _fetch_usdt_via_okx_batch([address], proxies)[address]
+
+
+def _fetch_usdt_via_okx(address: str, proxies: Optional[dict] = None) -> Optional[float]:
+    """OKX Wallet API로 해당 주소 USDT 잔액. 실패 시 None."""
+    value, _ = _fetch_usdt_via_okx_with_reason(address, proxies)
+    return value
 
 
 def _fetch_usdt_via_bsc_rpc_with_reason(address: str, proxies: Optional[dict] = None) -> Tuple[Optional[float], Optional[str]]:
@@ -234,30 +244,372 @@ def _fetch_usdt_via_bsc_rpc_with_reason(address: str, proxies: Optional[dict] =
     addr_hex = "0" * 24 + address[2:].lower() if len(address) >= 42 else ""
     if len(addr_hex) != 64:
         return None, "주소 길이 오류(42자 아님)"
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "eth_call",
-        "params": [
-            {"to": BSC_USDT_ADDRESS, "data": BALANCE_OF_SELECTOR + addr_hex},
-            "latest",
-        ],
-    }
     try:
-        r = requests.post(BSC_RPC_URL, json=payload, proxies={}, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        result = data.get("result")
+        # 풀 1순위 RPC로 보내고 느리면 2순위로 헤지 (proxies: 계정 프록시, rpc_proxies_for)
+        result = bsc_rpc_pool.call(
+            "eth_call",
+            [{"to": BSC_USDT_ADDRESS, "data": BALANCE_OF_SELECTOR + addr_hex}, "latest"],
+            proxies=proxies,
+        )
         if not result or result == "0x":
             return 0.0, None
         raw = int(result, 16)
+        # BSC USDT 18 decimals
         return raw / 1e18, None
-    except requests.exceptions.Timeout:
-        logger.warning("BSC RPC timeout for %s", address[:10])
-        return None, "BSC RPC 요청 시간 초과"
-    except requests.exceptions.ProxyError as e:
-        logger.warning("BSC RPC proxy error for %s: %s", address[:10], e)
-        return None, "BSC RPC 프록시 오류"
+    except RpcCallError as e:
+        logger.warning("BSC RPC balance fetch failed for %s: %s", address[:10], e)
+        if "Timeout" in str(e):
+            return None, "BSC RPC 요청 시간 초과"
+        if "ProxyError" in str(e):
+            return None, "BSC RPC 프록시 오류"
+        return None, "BSC RPC 오류: 모든 RPC 실패"
     except Exception as e:
         logger.warning("BSC RPC balance fetch failed for %s: %s", address[:10], e)
         return None, f"BSC RPC 오류: {type(e).__name__}"
+
+
+def _balance_of_calldata(address: str) -> Optional[str]:
+    """balanceOf(address) calldata (hex, 0x 포함). 주소 형식 오류면 None."""
+    if not address or not address.startswith("0x") or len(address) != 42:
+        return None
+    return BALANCE_OF_SELECTOR + "0" * 24 + address[2:].lower()
+
+
+def fetch_usdt_balances_multicall(
+    addresses: List[str],
+    proxies: Optional[dict] = None,
+) -> Tuple[Dict[str, Optional[float]], Optional[int]]:
+    """
+    Multicall3.tryBlockAndAggregate(false, [USDT.balanceOf(addr) ...]) eth_call 1회로 여러 주소 잔액 조회.
+    proxies: BSC RPC용 프록시 (rpc_proxies_for 결과, None이면 직접 연결)
+    Returns: ({주소(소문자): 잔액 또는 None(해당 호출 실패)}, 조회 기준 블록 번호)
+    RPC 자체가 실패하면 RpcCallError, eth_abi 미설치면 ImportError (호출 측이 단건 경로로 폴백).
+    """
+    from eth_abi import decode, encode  # eth-account 의존성으로 설치됨
+
+    calls = []
+    for addr in addresses:
+        data = _balance_of_calldata(addr)
+        if data is not None:
+            calls.append((addr, data))
+    if not calls:
+        return {}, None
+    encoded = encode(
+        ["bool", "(address,bytes)[]"],
+        [False, [(BSC_USDT_ADDRESS, bytes.fromhex(data[2:])) for _, data in calls]],
+    )
+    result = bsc_rpc_pool.call(
+        "eth_call",
+        [{"to": MULTICALL3_ADDRESS, "data": TRY_BLOCK_AND_AGGREGATE_SELECTOR + encoded.hex()}, "latest"],
+        proxies=proxies,
+    )
+    if not result or result == "0x":
+        raise RpcCallError("Multicall3 빈 응답")
+    block_number, _block_hash, results = decode(["uint256", "bytes32", "(bool,bytes)[]"], bytes.fromhex(result[2:]))
+    out: Dict[str, Optional[float]] = {}
+    for (addr, _), (ok, ret) in zip(calls, results):
+        # BSC USDT 18 decimals
+        out[addr.lower()] = int.from_bytes(ret[:32], "big") / 1e18 if ok and len(ret) >= 32 else None
+    return out, int(block_number)
+
+
+# 단건 보완 조회 (OKX/BSC) 병렬 실행용
+_fallback_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="balance-fallback")
+
+
+def _single_with_proxy_retry(address: str, proxies: Optional[dict]) -> Tuple[Optional[float], Optional[str]]:
+    """단건 조회. 프록시로 실패하면 프록시 없이 한 번 더."""
+    bal, reason = get_usdt_balance_with_reason(address, proxies)
+    if bal is None and proxies is not None:
+        bal, reason = get_usdt_balance_with_reason(address, None)
+    return bal, reason
+
+
+def _batch_via_multicall(addrs: List[str], proxies_by_address: Dict[str, Optional[dict]]) -> Dict[str, float]:
+    """
+    Multicall3로 조회 (MULTICALL_MAX_BATCH개씩 eth_call 1회). 성공한 주소만 반환, 결과는 블록 번호와 함께 캐시에 반영.
+    묶음 안 계정 중 BSC RPC 프록시가 있으면(BSC_RPC_USE_PROXY) 그 프록시로 먼저, 실패하면 직접 연결로 한 번 더.
+    """
+    out: Dict[str, float] = {}
+    valid = [a for a in addrs if _balance_of_calldata(a) is not None]
+    for i in range(0, len(valid), MULTICALL_MAX_BATCH):
+        chunk = valid[i:i + MULTICALL_MAX_BATCH]
+        proxy = next((proxies_by_address[a] for a in chunk if proxies_by_address.get(a)), None)
+        routes = [proxy, None] if proxy else [None]
+        balances = None
+        for route in routes:
+            try:
+                balances, block = fetch_usdt_balances_multicall(chunk, route)
+                break
+            except Exception as e:
+                logger.warning("Multicall 잔고 조회 실패 (%d개, %s): %s", len(chunk), "프록시" if route else "직접", e)
+        if balances is None:
+            continue
+        for a in chunk:
+            if balances.get(a.lower()) is not None:
+                out[a] = balances[a.lower()]
+                balance_cache.put(a, out[a], block, "multicall")
+    return out
+
+
+def _batch_via_okx(addrs: List[str], proxies_by_address: Dict[str, Optional[dict]]) -> Dict[str, float]:
+    """
+    OKX Wallet API로 조회 (OKX_MAX_ADDRESSES개씩 서명 요청 1회). 키 미설정이면 빈 결과.
+    여러 계정 주소를 한 요청에 묶으므로 계정 프록시는 쓰지 않음 (proxies_by_address는 묶음 경로 공통 인자).
+    """
+    out: Dict[str, float] = {}
+    if not addrs or not _get_okx_credentials():
+        return out
+    for i in range(0, len(addrs), OKX_MAX_ADDRESSES):
+        for a, (bal, _) in _fetch_usdt_via_okx_batch(addrs[i:i + OKX_MAX_ADDRESSES]).items():
+            if bal is not None:
+                out[a] = bal
+                balance_cache.put(a, bal, None, "okx")
+    return out
+
+
+def get_usdt_balances_with_reason(
+    addresses: Iterable[Optional[str]],
+    proxies_by_address: Optional[Dict[str, Optional[dict]]] = None,
+) -> Dict[str, Tuple[Optional[float], Optional[str]]]:
+    """
+    여러 주소 USDT 잔액 + 실패 사유. 키는 입력 주소 그대로.
+    - 묶음 경로를 차례로: BSC Multicall3(MULTICALL_MAX_BATCH개씩 1회) → 남은 주소만 OKX(OKX_MAX_ADDRESSES개씩 1회)
+      → 계정 수와 무관하게 요청 수가 일정
+    - 그래도 남은 주소만 단건 경로(get_usdt_balance_with_reason: OKX → BSC,
+      proxies_by_address의 프록시 → 프록시 없이)로 병렬 보완
+    Returns: {주소: (잔액, None) 또는 (None, 사유)}
+    """
+    proxies_by_address = proxies_by_address or {}
+    addrs = [a.strip() for a in addresses if a and isinstance(a, str)]
+    out: Dict[str, Tuple[Optional[float], Optional[str]]] = {}
+    batch_ok: Dict[str, float] = {}
+    unique = list(dict.fromkeys(addrs))
+    for stage in (_batch_via_multicall, _batch_via_okx):
+        remaining = [a for a in unique if a not in batch_ok]
+        if not remaining:
+            break
+        batch_ok.update(stage(remaining, proxies_by_address))
+    missing = [a for a in unique if a not in batch_ok]
+    futures = {a: _fallback_executor.submit(_single_with_proxy_retry, a, proxies_by_address.get(a)) for a in missing}
+    for a in addrs:
+        if a in batch_ok:
+            out[a] = (batch_ok[a], None)
+        else:
+            try:
+                out[a] = futures[a].result()
+            except Exception as e:
+                out[a] = (None, f"잔고 조회 오류: {type(e).__name__}")
+            if out[a][0] is not None and a in futures:
+                balance_cache.put(a, out[a][0], None, "single")
+    return out
+
+
+class BalanceCache:
+    """
+    주소별 USDT 잔액 캐시. 항목: {balance, block, fetched_at, source} (키: 주소 소문자).
+    - put: 더 오래된 블록의 조회 결과는 무시 (병렬 조회가 늦게 도착해도 최신 값을 덮지 않음).
+      블록 번호를 모르는 단건 조회(OKX/BSC)는 시각 기준으로 반영하고 block=None으로 저장
+      (이전 블록을 물려받으면 Transfer 로그가 이중 반영되므로, 감시기가 전체 조회로 다시 맞추게 함)
+    - debit/invalidate: 자체 체결·취소 직후 호출. 지출 추정액만큼 즉시 차감(보수적)하고 백그라운드 갱신을 깨움.
+      차감분은 BALANCE_DEBIT_HOLD_SEC 동안 이후 조회 값에도 다시 적용 (정산 전 블록 값으로 잔액이 부풀지 않게)
+    - 백그라운드 스레드(start)가 BALANCE_REFRESH_SEC마다 전 계정을 Multicall 1회로 갱신
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._debits: Dict[str, List[Tuple[float, float]]] = {}  # 주소 → [(차감 시각, 금액)]
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._addresses_fn: Optional[Callable[[], Iterable[Optional[str]]]] = None
+        self._proxies_fn: Optional[Callable[[], Dict[str, Optional[dict]]]] = None
+
+    def put(self, address: str, balance: float, block: Optional[int], source: str) -> None:
+        key = address.lower()
+        now = time.time()
+        with self._lock:
+            cur = self._entries.get(key)
+            if cur is not None and block is not None and cur.get("block") is not None and block < cur["block"]:
+                return
+            self._entries[key] = {
+                "balance": float(balance),
+                "block": block,
+                "fetched_at": now,
+                "source": source,
+            }
+
+    def _pending_debit(self, key: str, now: float) -> float:
+        debits = [(t, amt) for t, amt in self._debits.get(key, []) if now - t < BALANCE_DEBIT_HOLD_SEC]
+        if debits:
+            self._debits[key] = debits
+        else:
+            self._debits.pop(key, None)
+        return sum(amt for _, amt in debits)
+
+    def get(self, address: Optional[str], max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        캐시 항목 (balance는 최근 자체 지출 차감 반영). 없거나 max_age(초)보다 오래됐으면 None.
+        Returns: {balance, raw_balance, block, age_sec, source}
+        """
+        if not address:
+            return None
+        key = address.strip().lower()
+        now = time.time()
+        with self._lock:
+            cur = self._entries.get(key)
+            if cur is None:
+                return None
+            age = now - cur["fetched_at"]
+            if max_age is not None and age > max_age:
+                return None
+            debit = self._pending_debit(key, now)
+            return {
+                "balance": cur["balance"] - debit,
+                "raw_balance": cur["balance"],
+                "block": cur["block"],
+                "age_sec": round(age, 2),
+                "source": cur["source"],
+            }
+
+    def debit(self, amounts: Dict[Optional[str], float]) -> None:
+        """자체 주문 체결(또는 체결 여부 불명 취소) 추정 지출액 차감 + 백그라운드 갱신 요청."""
+        now = time.time()
+        with self._lock:
+            for addr, amount in amounts.items():
+                if addr and amount > 0:
+                    self._debits.setdefault(addr.strip().lower(), []).append((now, float(amount)))
+        self._wake.set()
+
+    def apply_transfers(
+        self,
+        addresses: Iterable[str],
+        from_block: int,
+        to_block: int,
+        transfers: List[Tuple[str, int, float]],
+    ) -> List[str]:
+        """
+        Transfer 로그로 잔액 증분 갱신 (bsc_transfer_watcher). transfers: [(주소, 블록, 증감액)],
+        from_block~to_block 전체 로그를 봤다는 전제. 항목 블록이 from_block - 1 이상이면 그 이후 로그만 더하고
+        블록을 to_block으로 올림 (로그 없으면 잔액 그대로, 조회 시각만 갱신).
+        나가는 이체는 같은 금액만큼 보류 중인 자체 지출 차감을 상쇄 (정산이 확인됐으므로).
+        Returns: 이어 붙일 수 없는 주소 (캐시 없음·블록 모름·구간 누락 → 호출 측이 전체 조회로 맞춤)
+        """
+        now = time.time()
+        stale = []
+        with self._lock:
+            for addr in addresses:
+                key = addr.lower()
+                cur = self._entries.get(key)
+                if cur is None or cur.get("block") is None or cur["block"] < from_block - 1:
+                    stale.append(addr)
+                    continue
+                if cur["block"] >= to_block:
+                    continue
+                for t_addr, block, delta in transfers:
+                    if t_addr.lower() != key or block <= cur["block"]:
+                        continue
+                    cur["balance"] += delta
+                    if delta < 0:
+                        self._settle_debits(key, -delta)
+                cur["block"] = to_block
+                cur["fetched_at"] = now
+                cur["source"] = "logs"
+        return stale
+
+    def _settle_debits(self, key: str, amount: float) -> None:
+        """오래된 차감부터 amount만큼 제거 (락 안에서 호출)."""
+        debits = self._debits.get(key) or []
+        while debits and amount > 0:
+            t, amt = debits[0]
+            if amt <= amount + 1e-9:
+                amount -= amt
+                debits.pop(0)
+            else:
+                debits[0] = (t, amt - amount)
+                amount = 0
+        if not debits:
+            self._debits.pop(key, None)
+
+    def invalidate(self, addresses: Iterable[Optional[str]]) -> None:
+        """해당 주소 캐시 제거 (다음 확인은 네트워크 조회) + 백그라운드 갱신 요청."""
+        with self._lock:
+            for addr in addresses:
+                if addr:
+                    self._entries.pop(addr.strip().lower(), None)
+        self._wake.set()
+
+    def refresh(self, addresses: Optional[Iterable[Optional[str]]] = None) -> int:
+        """묶음 경로(Multicall → OKX)로 다시 조회해 캐시 갱신. addresses 생략 시 start()에 준 계정 목록. Returns: 갱신된 주소 수."""
+        if addresses is None:
+            addresses = self._addresses_fn() if self._addresses_fn else []
+        valid = list(dict.fromkeys(a.strip() for a in addresses if a and isinstance(a, str)))
+        proxies_by_address = (self._proxies_fn() if self._proxies_fn else None) or {}
+        updated = _batch_via_multicall(valid, proxies_by_address)
+        updated.update(_batch_via_okx([a for a in valid if a not in updated], proxies_by_address))
+        return len(updated)
+
+    def start(
+        self,
+        addresses_fn: Callable[[], Iterable[Optional[str]]],
+        proxies_fn: Optional[Callable[[], Dict[str, Optional[dict]]]] = None,
+    ) -> None:
+        """
+        백그라운드 갱신 시작. 이미 동작 중이면 무시.
+        addresses_fn: 갱신 대상 주소 목록, proxies_fn: {주소: BSC RPC 프록시(rpc_proxies_for)} (없으면 직접 연결)
+        """
+        self._addresses_fn = addresses_fn
+        self._proxies_fn = proxies_fn
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="balance-refresh")
+        self._thread.start()
+        logger.info("잔고 캐시 갱신 시작 (%ds 주기)", BALANCE_REFRESH_SEC)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.debug("잔고 캐시 갱신 실패: %s", e)
+            self._wake.wait(BALANCE_REFRESH_SEC)
+            self._wake.clear()
+
+    def status(self) -> List[Dict[str, Any]]:
+        """주소별 캐시 상태 (디버깅용)."""
+        with self._lock:
+            keys = list(self._entries)
+        return [dict(self.get(k) or {}, address=k) for k in keys]
+
+
+balance_cache = BalanceCache()
+
+
+def get_usdt_balances_cached(
+    addresses: Iterable[Optional[str]],
+    proxies_by_address: Optional[Dict[str, Optional[dict]]] = None,
+    max_age: Optional[float] = None,
+) -> Dict[str, Tuple[Optional[float], Optional[str]]]:
+    """
+    get_usdt_balances_with_reason과 같은 형식이지만 캐시(max_age초 이내, 기본 BALANCE_CACHE_MAX_AGE_SEC)에
+    있는 주소는 네트워크 조회 없이 반환. 없는 주소만 조회 (조회 결과는 캐시에 반영됨).
+    """
+    max_age = BALANCE_CACHE_MAX_AGE_SEC if max_age is None else max_age
+    addrs = [a.strip() for a in addresses if a and isinstance(a, str)]
+    out: Dict[str, Tuple[Optional[float], Optional[str]]] = {}
+    missing = []
+    for a in addrs:
+        hit = balance_cache.get(a, max_age)
+        if hit is not None:
+            out[a] = (hit["balance"], None)
+        else:
+            missing.append(a)
+    if missing:
+        out.update(get_usdt_balances_with_reason(missing, proxies_by_address))
+    return out
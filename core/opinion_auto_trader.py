@@ -94,6 +94,7 @@ class OpinionAutoTrader:
                     direction=None,
                     maker_account_id=self.maker_account_id,
                     taker_account_id=None,
+                    trace_kind="auto",
                 )
                 self.last_result = result
                 self.total_trades += 1
@@ -107,20 +108,8 @@ class OpinionAutoTrader:
                 try:
                     # 자전 완료(양쪽 체결)된 거래만 Overall에 기록.
                     if result.get("round_trip_completed") is True:
-                        from core.trade_history import append_trade
-                        rec = {
-                            "ts": int(time.time()),
-                            "direction": result.get("direction"),
-                            "shares": result.get("shares"),
-                            "maker_amount_usd": result.get("maker_amount_usd"),
-                            "taker_amount_usd": result.get("taker_amount_usd"),
-                            "maker_order_id": result.get("maker_order_id"),
-                            "taker_order_id": result.get("taker_order_id"),
-                            "success": True,
-                            "round_trip_completed": True,
-                            "source": "auto",
-                        }
-                        append_trade(rec)
+                        from core.trade_history import record_round_trip
+                        record_round_trip(result, "auto")
                 except Exception as e2:
                     logger.debug("trade_history append auto: %s", e2)
             except Exception as e:
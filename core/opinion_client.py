@@ -2,6 +2,9 @@
 Opinion OpenAPI 클라이언트 (프록시·API키 지원)
 """
 import logging
+import os
+import threading
+import time
 from typing import Optional, Dict, Any
 
 import requests
@@ -15,6 +18,42 @@ from core.opinion_config import (
 
 logger = logging.getLogger(__name__)
 
+# 마켓 목록 병렬 페이지 조회(opinion_market_catalog)의 초당 요청 상한 (Opinion OpenAPI 레이트리밋 대비).
+# 거래 경로 요청(오더북·마켓 상세 등)은 제한하지 않음. 0 이하면 제한 없음
+OPINION_API_RATE_LIMIT = float(os.getenv("OPINION_API_RATE_LIMIT", "15").strip() or "15")
+
+
+class RateLimiter:
+    """
+    토큰 버킷. 병렬 페이지 조회 등 동시 요청이 늘어도 초당 rate개를 넘지 않도록 대기. (다중 페어 자전거래 속도 제한에도 사용)
+    버킷 크기는 max(1, rate) → rate < 1(예: 0.5 = 2초에 1회)이어도 토큰 1개가 찰 수 있음.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._capacity = max(1.0, rate)
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> bool:
+        """토큰 1개를 얻을 때까지 대기. stop이 set되면 대기를 멈추고 False (토큰 미사용)."""
+        if self.rate <= 0:
+            return True
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
+
 
 def _headers(api_key: str) -> dict:
     return {
@@ -1,54 +1,59 @@
 """
 Opinion CLOB SDK 주문 연동
 - place_limit_order: LIMIT BUY 주문 (account.api_key + account.proxy, 계정별 CLOB PK/Multisig)
-- cancel_order: 주문 취소
+- prepare_order / submit_prepared_order: 주문 생성·서명을 미리 해 두고 나중에 HTTP 전송만 (자전거래 Taker용)
+- cancel_order: 주문 취소 / cancel_orders: 여러 계정 주문 동시 취소 (공유 마감 시간)
 - get_order_status: 주문 체결 상태 조회
 - 에러 시 opinion_errors.interpret_opinion_api_response() 경유
+- SDK Client는 (계정 id, multisig, rpc, 프록시)별로 캐시해 재사용 (Web3/REST 클라이언트 재생성 비용 제거).
+  자격 증명(.env PK·API 키) 변경, TTL 만료, 전송 오류 시 폐기 후 재생성
+- USDT 사용 승인(allowance) 상태를 계정별로 캐시 → 승인 확인된 계정은 check_approval=False로 주문
+  (BSC 체인 조회를 주문 경로에서 제거). 시작 시·주기적으로 백그라운드 재확인(allowance 조회만, 승인 트랜잭션은
+  주문 경로의 check_approval=True에서만), allowance 오류 시 무효화
 """
 import base64
+import copy
+import hashlib
 import logging
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from typing import Optional, Dict, Any, Iterable, Tuple
 from urllib.parse import urlparse
 
+from core.bsc_rpc_pool import BSC_RPC_FALLBACKS, BSC_RPC_URL, RPC_TIMEOUT_SEC, bsc_rpc_pool, rpc_proxies_for
 from core.opinion_account import OpinionAccount
 from core.opinion_config import get_proxy_dict
 from core.opinion_errors import interpret_opinion_api_response
+from core.trade_trace import span
 
 logger = logging.getLogger(__name__)
 
 # CLOB SDK용 호스트 (OpenAPI 베이스; /openapi 제외)
 OPINION_CLOB_HOST = os.getenv("OPINION_CLOB_HOST", "https://proxy.opinion.trade:8443")
-BSC_RPC_URL = os.getenv("BSC_RPC_URL", "https://bsc-dataseed.binance.org/")
-# BSC RPC 실패 시 시도할 대체 URL (쉼표 구분, 비어 있으면 아래 기본 목록 사용)
-_BSC_RPC_FALLBACK_RAW = (os.getenv("BSC_RPC_FALLBACKS") or "").strip()
-BSC_RPC_FALLBACKS = [u.strip() for u in _BSC_RPC_FALLBACK_RAW.split(",") if u.strip()] or [
-    "https://bsc-dataseed1.binance.org/",
-    "https://bsc-dataseed2.binance.org/",
-    "https://bsc-dataseed.bnbchain.org",
-    "https://bsc-dataseed-public.bnbchain.org",
-    "https://bsc-rpc.publicnode.com",
-    "https://1rpc.io/bnb",
-    "https://bsc.drpc.org",
-    "https://bsc.publicnode.com",
-    "https://bsc-dataseed.nariox.org",
-    "https://bsc-dataseed.defibit.io",
-    "https://binance.nodereal.io",
-    "https://bsc-mainnet.public.blastapi.io",
-]
-
-
-def _set_rpc_proxy_env(account: OpinionAccount) -> None:
-    """BSC RPC가 프록시로 나가도록 HTTP_PROXY/HTTPS_PROXY 설정 (SDK 내부 Web3/requests 사용 시)."""
-    if os.getenv("BSC_RPC_USE_PROXY", "1").strip() == "0":
-        return
-    proxy_dict = get_proxy_dict(account.proxy or "")
-    if not proxy_dict:
-        return
-    url = proxy_dict.get("https") or proxy_dict.get("http")
-    if url:
-        os.environ["HTTPS_PROXY"] = url
-        os.environ["HTTP_PROXY"] = url
+# BSC RPC 목록·순위는 bsc_rpc_pool이 관리 (BSC_RPC_URL / BSC_RPC_FALLBACKS 재노출은 기존 import 호환용)
+# SDK Client 캐시: 이 시간(초) 지나면 재생성 (SDK 내부 마켓/토큰 캐시·연결 풀 갱신)
+CLOB_CLIENT_TTL_SEC = int(os.getenv("CLOB_CLIENT_TTL_SEC", "1800").strip() or "1800")
+CLOB_CLIENT_CACHE_MAX = 32
+# 승인 상태 재확인 주기(초). 이 시간 안에 확인된 계정은 주문 시 on-chain 승인 확인 생략
+CLOB_APPROVAL_RECHECK_SEC = int(os.getenv("CLOB_APPROVAL_RECHECK_SEC", "3600").strip() or "3600")
+# 미리 서명한 주문 유효 시간(초). 이보다 오래되면 전송하지 않고 일반 경로로 새로 서명
+PREPARED_ORDER_MAX_AGE_SEC = 30.0
+# 다리(Maker/Taker)별 취소를 동시에 보내고 이 시간(초)까지 결과 대기
+CLOB_CANCEL_TIMEOUT_SEC = 5.0
+# 계정별 동시 호출용 (취소 등). 요청마다 스레드를 새로 만들지 않도록 공용
+_leg_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="clob-leg")
+# (account_id, multi_sig_addr) → {"approved", "verified_at", "fingerprint", "error"}
+_approval_cache: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+_approval_lock = threading.Lock()
+_approval_thread: Optional[threading.Thread] = None
+_approval_stop = threading.Event()
+# (account_id, multi_sig_addr, rpc_url, proxy) → {"client", "fingerprint", "created_at", "last_used"}
+_client_cache: Dict[Tuple[Any, str, str, str], Dict[str, Any]] = {}
+_client_cache_lock = threading.Lock()
+# 키별 생성 직렬화 (동시 요청이 같은 Client를 중복 생성하지 않도록)
+_client_build_locks: Dict[Tuple[Any, str, str, str], threading.Lock] = {}
 
 
 def _get_clob_credentials(account: OpinionAccount) -> Optional[tuple]:
@@ -111,21 +116,29 @@ def get_clob_debug_info(account: OpinionAccount) -> Optional[Dict[str, Any]]:
         "eoa_from_account": _mask(eoa),
         "opination_multisig_set": bool(env_multisig),
         "proxy_configured": proxy_configured,
+        "trading_approved_cached": is_trading_approved(account),
         "hint": "app.opinion.trade My Profile에 보이는 주소가 multi_sig_addr_sent와 같아야 합니다.",
         "hint_10403": "10403이면 proxy_configured가 true인지, 서버 로그에 '프록시 적용됨'이 나오는지 확인하세요.",
     }
 
 
+def _credential_fingerprint(account: OpinionAccount, private_key: str) -> str:
+    """캐시 무효화용: API 키·CLOB PK·호스트가 바뀌면 값이 달라짐 (원문은 저장하지 않음)."""
+    raw = "|".join([account.api_key or "", private_key or "", OPINION_CLOB_HOST])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
 def _get_clob_client(
     account: OpinionAccount,
     multi_sig_override: Optional[str] = None,
     rpc_url_override: Optional[str] = None,
 ):
     """
-    Opinion CLOB SDK Client 생성.
-    account.api_key, account.proxy 사용. 프록시는 Configuration.proxy + RESTClient 재생성으로 주입 (레이스 컨디션 방지).
+    Opinion CLOB SDK Client 반환 (캐시 재사용, 없으면 생성).
+    캐시 키: (계정 id, multi_sig_addr, rpc_url, 프록시). 자격 증명 fingerprint가 다르거나 TTL 초과 시 재생성.
     multi_sig_override: 지정 시 이 주소를 multi_sig_addr로 사용 (10603 재시도 시 EOA 강제용).
     rpc_url_override: 지정 시 이 URL을 BSC RPC로 사용 (RPC 실패 시 대체 RPC 재시도용).
+    기본 RPC는 bsc_rpc_pool.best_url() (지연·오류율 기준 1순위, 히스테리시스로 잦은 교체 방지).
     """
     creds = _get_clob_credentials(account)
     if not creds:
@@ -135,10 +148,101 @@ def _get_clob_client(
         multi_sig_addr = (multi_sig_override or "").strip()
         if multi_sig_addr and not multi_sig_addr.startswith("0x"):
             multi_sig_addr = "0x" + multi_sig_addr
-        # 소문자/checksummed 그대로 전달 (재시도 시 둘 다 시도)
-        logger.info("CLOB client multi_sig_override 적용 (10603 재시도): %s...%s", (multi_sig_addr or "")[:8], (multi_sig_addr or "")[-4:])
-    rpc_url = (rpc_url_override or BSC_RPC_URL).strip() or BSC_RPC_URL
-    _set_rpc_proxy_env(account)
+    rpc_url = (rpc_url_override or bsc_rpc_pool.best_url()).strip() or BSC_RPC_URL
+    aid = getattr(account, "id", 1)
+    key = (aid, multi_sig_addr, rpc_url, account.proxy or "")
+    fingerprint = _credential_fingerprint(account, private_key)
+    now = time.time()
+    with _client_cache_lock:
+        entry = _client_cache.get(key)
+        if entry and entry["fingerprint"] == fingerprint and now - entry["created_at"] < CLOB_CLIENT_TTL_SEC:
+            entry["last_used"] = now
+            return entry["client"]
+        build_lock = _client_build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        with _client_cache_lock:
+            entry = _client_cache.get(key)
+            if entry and entry["fingerprint"] == fingerprint and now - entry["created_at"] < CLOB_CLIENT_TTL_SEC:
+                entry["last_used"] = now
+                return entry["client"]
+        if multi_sig_override:
+            # 소문자/checksummed 그대로 전달 (재시도 시 둘 다 시도)
+            logger.info("CLOB client multi_sig_override 적용 (10603 재시도): %s...%s", (multi_sig_addr or "")[:8], (multi_sig_addr or "")[-4:])
+        client = _build_clob_client(account, private_key, multi_sig_addr, rpc_url)
+        if client is None:
+            return None
+        with _client_cache_lock:
+            # 같은 계정의 이전 자격 증명으로 만든 Client는 모두 폐기 (.env PK/API 키 변경)
+            for k in [k for k, v in _client_cache.items() if k[0] == aid and v["fingerprint"] != fingerprint]:
+                _client_cache.pop(k, None)
+            _client_cache[key] = {"client": client, "fingerprint": fingerprint, "created_at": now, "last_used": now}
+            if len(_client_cache) > CLOB_CLIENT_CACHE_MAX:
+                oldest = min(_client_cache, key=lambda k: _client_cache[k]["last_used"])
+                _client_cache.pop(oldest, None)
+        return client
+
+
+def evict_clob_client(account: OpinionAccount) -> None:
+    """계정의 캐시된 Client 전부 폐기 (전송 오류·설정 변경 시). 다음 호출에서 재생성."""
+    aid = getattr(account, "id", 1)
+    with _client_cache_lock:
+        for k in [k for k in _client_cache if k[0] == aid]:
+            _client_cache.pop(k, None)
+
+
+def _is_transport_error(e: Exception) -> bool:
+    """HTTP 응답(status/body)이 없는 예외 = 연결·프록시·타임아웃 등 → 캐시된 Client 폐기 대상."""
+    return not (hasattr(e, "status") and hasattr(e, "body"))
+
+
+def _is_definite_rejection(e: Exception) -> bool:
+    """
+    서버가 주문을 확실히 거절한 4xx 응답(allowance·검증 등)인지. 5xx·게이트웨이 타임아웃·408은
+    주문이 접수됐을 수 있으므로 False (재전송 금지).
+    """
+    status = getattr(e, "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return 400 <= status < 500 and status != 408
+
+
+def _client_rpc_url(client) -> Optional[str]:
+    """Client가 쓰는 BSC RPC URL (SDK ContractCaller의 Web3 provider)."""
+    try:
+        return client.contract_caller.w3.provider.endpoint_uri
+    except AttributeError:
+        return None
+
+
+def get_clob_client_cache_info() -> Dict[str, Any]:
+    """디버깅용: 캐시된 Client 수와 항목별 나이(초)."""
+    now = time.time()
+    with _client_cache_lock:
+        return {
+            "size": len(_client_cache),
+            "ttl_sec": CLOB_CLIENT_TTL_SEC,
+            "entries": [
+                {
+                    "account_id": k[0],
+                    "rpc": k[2][:40],
+                    "age_sec": int(now - v["created_at"]),
+                    "idle_sec": int(now - v["last_used"]),
+                }
+                for k, v in _client_cache.items()
+            ],
+        }
+
+
+def _build_clob_client(account: OpinionAccount, private_key: str, multi_sig_addr: str, rpc_url: str):
+    """
+    Opinion CLOB SDK Client 생성 (캐시 미스 시에만).
+    account.api_key, account.proxy 사용. 프록시는 프로세스 환경변수를 건드리지 않고 Client마다 주입:
+    - 주문 REST: Configuration.proxy + RESTClient 재생성
+    - BSC RPC(Web3): HTTPProvider request_kwargs["proxies"] (_apply_rpc_proxy)
+    → 계정이 다른 주문을 동시에 내도 서로의 프록시를 덮어쓰지 않음.
+    """
     # 10603 디버깅: 사용 중인 자산 주소 로그 (마스킹)
     _mask_addr = (multi_sig_addr or "")[:8] + "..." + (multi_sig_addr or "")[-4:] if (multi_sig_addr or "") else "?"
     logger.info("CLOB client 계정 id=%s, multi_sig_addr=%s, rpc=%s", getattr(account, "id", 1), _mask_addr, (rpc_url[:40] + "..." if len(rpc_url) > 40 else rpc_url))
@@ -155,7 +259,10 @@ def _get_clob_client(
         rpc_url=rpc_url,
         private_key=private_key,
         multi_sig_addr=multi_sig_addr,
+        # 승인 확인 주기는 _approval_cache가 관리 → SDK 내부 1시간 스킵은 끔 (요청 시 실제로 확인하도록)
+        enable_trading_check_interval=0,
     )
+    _apply_rpc_proxy(client, account, rpc_url)
 
     proxy_dict = get_proxy_dict(account.proxy or "")
     if proxy_dict and hasattr(client, "api_client") and client.api_client is not None:
@@ -189,41 +296,185 @@ def _get_clob_client(
     return client
 
 
-def _place_order_impl(
-    account: OpinionAccount,
+def _apply_rpc_proxy(client, account: OpinionAccount, rpc_url: str) -> None:
+    """SDK ContractCaller의 Web3 provider를 계정 프록시를 쓰는 HTTPProvider로 교체 (Safe도 같은 w3 공유)."""
+    proxies = rpc_proxies_for(account.proxy)
+    if not proxies:
+        return
+    try:
+        from web3.providers import HTTPProvider
+
+        w3 = client.contract_caller.w3
+        w3.provider = HTTPProvider(rpc_url, request_kwargs={"proxies": proxies, "timeout": RPC_TIMEOUT_SEC})
+        logger.info("CLOB 계정 id=%s: BSC RPC 프록시 적용됨", getattr(account, "id", 1))
+    except Exception as e:
+        logger.warning("CLOB 계정 id=%s: BSC RPC 프록시 주입 실패 (RPC가 직접 연결로 나감): %s", getattr(account, "id", 1), e)
+
+
+def _approval_key(account: OpinionAccount) -> Optional[Tuple[Tuple[Any, str], str]]:
+    """(캐시 키, 자격 증명 fingerprint). CLOB 설정 없으면 None."""
+    creds = _get_clob_credentials(account)
+    if not creds:
+        return None
+    private_key, multi_sig_addr = creds
+    return (getattr(account, "id", 1), multi_sig_addr), _credential_fingerprint(account, private_key)
+
+
+def is_trading_approved(account: OpinionAccount) -> bool:
+    """캐시상 USDT 승인 완료이고 CLOB_APPROVAL_RECHECK_SEC 안에 확인됐으면 True (네트워크 호출 없음)."""
+    k = _approval_key(account)
+    if k is None:
+        return False
+    key, fingerprint = k
+    with _approval_lock:
+        st = _approval_cache.get(key)
+    return bool(
+        st
+        and st.get("approved")
+        and st.get("fingerprint") == fingerprint
+        and time.time() - st.get("verified_at", 0) < CLOB_APPROVAL_RECHECK_SEC
+    )
+
+
+def _mark_approval(account: OpinionAccount, approved: bool, error: Optional[str] = None) -> None:
+    k = _approval_key(account)
+    if k is None:
+        return
+    key, fingerprint = k
+    with _approval_lock:
+        _approval_cache[key] = {
+            "approved": approved,
+            "verified_at": time.time(),
+            "fingerprint": fingerprint,
+            "error": error,
+        }
+
+
+def invalidate_approval(account: OpinionAccount) -> None:
+    """allowance 관련 오류 시 호출 → 다음 주문은 check_approval=True로 on-chain 확인."""
+    aid = getattr(account, "id", 1)
+    with _approval_lock:
+        for key in [key for key in _approval_cache if key[0] == aid]:
+            _approval_cache.pop(key, None)
+
+
+# SDK enable_trading()의 승인 기준: allowance가 이 값(토큰 단위) 미만이면 승인 트랜잭션을 보냄
+_APPROVAL_MIN_TOKENS = 1_000_000_000
+
+
+def _is_allowance_error(msg: str) -> bool:
+    m = (msg or "").lower()
+    return "allowance" in m or "approv" in m
+
+
+def check_trading_approval(account: OpinionAccount) -> Dict[str, Any]:
+    """
+    on-chain 승인 상태를 읽기만 해서 캐시 갱신 (트랜잭션·가스 사용 없음). SDK enable_trading()과 같은 항목 확인:
+    quote token allowance(CTF Exchange·ConditionalTokens, _APPROVAL_MIN_TOKENS 이상)와 setApprovalForAll.
+    미승인이면 approved=False로 캐시 → 다음 주문이 check_approval=True로 나가 SDK가 승인 트랜잭션 전송 (기존 주문 경로).
+    Returns: {"success", "approved", "error"}
+    """
+    client = _get_clob_client(account)
+    if client is None:
+        return {"success": False, "approved": False, "error": "CLOB 계정 설정 없음 (OPINION_CLOB_PK_* 필요)"}
+    try:
+        from web3 import Web3
+
+        caller = client.contract_caller
+        owner = caller.multi_sig_addr
+        tokens = client._parse_list_response(client.get_quote_tokens(), "get quote tokens")
+        approved = bool(tokens)
+        for qt in tokens:
+            token = Web3.to_checksum_address(qt.quote_token_address)
+            exchange = Web3.to_checksum_address(qt.ctf_exchange_address)
+            erc20 = caller.get_erc20_contract(token)
+            min_allowance = _APPROVAL_MIN_TOKENS * 10 ** caller.get_token_decimals(token)
+            for spender in (exchange, caller.conditional_tokens_addr):
+                if erc20.functions.allowance(owner, spender).call() < min_allowance:
+                    approved = False
+            if not caller.conditional_tokens.functions.isApprovedForAll(owner, exchange).call():
+                approved = False
+    except Exception as e:
+        logger.warning("계정 %s 승인 상태 조회 실패: %s", getattr(account, "id", "?"), e)
+        if _is_transport_error(e):
+            evict_clob_client(account)
+        _mark_approval(account, False, str(e)[:200])
+        return {"success": False, "approved": False, "error": str(e)}
+    _mark_approval(account, approved, None if approved else "allowance 부족 (다음 주문에서 승인 트랜잭션 전송)")
+    return {"success": True, "approved": approved, "error": None}
+
+
+def get_approval_status() -> Dict[str, Any]:
+    """디버깅/UI용: 계정별 승인 캐시 상태."""
+    now = time.time()
+    with _approval_lock:
+        return {
+            str(key[0]): {
+                "approved": st.get("approved"),
+                "age_sec": int(now - st.get("verified_at", now)),
+                "error": st.get("error"),
+            }
+            for key, st in _approval_cache.items()
+        }
+
+
+def start_approval_refresher() -> None:
+    """
+    CLOB 설정된 계정의 승인 상태를 시작 시 한 번, 이후 CLOB_APPROVAL_RECHECK_SEC마다 조회 (읽기 전용).
+    승인 트랜잭션은 보내지 않음 → 거래하지 않은 계정에 가스를 쓰지 않고, 워커가 여럿이어도 중복 전송 없음.
+    """
+    global _approval_thread
+    if _approval_thread is not None and _approval_thread.is_alive():
+        return
+    _approval_stop.clear()
+    _approval_thread = threading.Thread(target=_approval_refresh_loop, daemon=True, name="clob-approval")
+    _approval_thread.start()
+
+
+def _approval_refresh_loop() -> None:
+    from core.opinion_account import opinion_account_manager
+
+    # 만료 직전에 갱신해 주문 경로에서 재확인이 일어나지 않도록 주기의 90%마다
+    interval = max(60, int(CLOB_APPROVAL_RECHECK_SEC * 0.9))
+    while not _approval_stop.is_set():
+        for account in opinion_account_manager.get_all():
+            if _approval_stop.is_set():
+                break
+            if _approval_key(account) is None:
+                continue
+            check_trading_approval(account)
+        _approval_stop.wait(interval)
+
+
+_NO_CLOB_CLIENT_ERROR = {
+    "success": False,
+    "error": "CLOB 주문을 위해 해당 계정의 OPINION_CLOB_PK_{id}를 .env에 설정해 주세요. (MULTISIG 없으면 EOA 사용)",
+    "needs_clob": True,
+    "order_id": None,
+}
+
+
+def _build_order_input(
     market_id: int,
     token_id: str,
     side: str,
     price: float,
     size: int,
     order_type_name: str,
-    **kwargs: Any,
-) -> Dict[str, Any]:
-    """
-    내부 공통: LIMIT 또는 MARKET 주문.
-    order_type_name: "LIMIT_ORDER" | "MARKET_ORDER"
-    """
+) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """SDK PlaceOrderDataInput 생성. Returns: (data, None) 또는 SDK 미설치 시 (None, 에러 dict)."""
     try:
         from opinion_clob_sdk.chain.py_order_utils.model.order import PlaceOrderDataInput
         from opinion_clob_sdk.chain.py_order_utils.model.sides import OrderSide
         from opinion_clob_sdk.chain.py_order_utils.model.order_type import LIMIT_ORDER, MARKET_ORDER
     except ImportError:
-        return {
+        return None, {
             "success": False,
             "error": "Opinion CLOB SDK 연동 후 사용 가능합니다. pip install opinion-clob-sdk 및 .env에 CLOB 키 설정이 필요합니다.",
             "needs_clob": True,
             "order_id": None,
         }
 
-    client = _get_clob_client(account)
-    if client is None:
-        return {
-            "success": False,
-            "error": "CLOB 주문을 위해 해당 계정의 OPINION_CLOB_PK_{id}를 .env에 설정해 주세요. (MULTISIG 없으면 EOA 사용)",
-            "needs_clob": True,
-            "order_id": None,
-        }
-
     side_val = OrderSide.BUY if (side or "BUY").strip().upper() == "BUY" else OrderSide.SELL
     amount_quote = max(1.0, float(price) * max(1, int(size)))
     order_type = MARKET_ORDER if order_type_name == "MARKET_ORDER" else LIMIT_ORDER
@@ -232,7 +483,6 @@ def _place_order_impl(
     # makerAmountInQuoteToken: human-readable 문자열, 최소 1 USDT (문서: "10" = 10 USDT)
     amount_quote = max(1.0, round(amount_quote, 2))
     amount_str = str(int(amount_quote)) if amount_quote == int(amount_quote) else f"{amount_quote:.2f}"
-
     try:
         data = PlaceOrderDataInput(
             marketId=int(market_id),
@@ -242,34 +492,89 @@ def _place_order_impl(
             price=sdk_price,
             makerAmountInQuoteToken=amount_str,
         )
-        # check_approval=True: SDK가 enable_trading() 자동 실행 → USDT 사용 승인 트랜잭션
-        result = client.place_order(data, check_approval=True)
-        order_id = None
-        if hasattr(result, "result") and hasattr(result.result, "data"):
-            data_obj = result.result.data
-            if hasattr(data_obj, "order_id"):
-                order_id = getattr(data_obj, "order_id", None)
-            if order_id is None and hasattr(data_obj, "id"):
-                order_id = getattr(data_obj, "id", None)
-            if order_id is None and hasattr(data_obj, "orderId"):
-                order_id = getattr(data_obj, "orderId", None)
-            if order_id is None and isinstance(data_obj, dict):
-                order_id = (data_obj.get("order_id") or data_obj.get("orderId") or data_obj.get("id"))
-        if order_id is None and hasattr(result, "result"):
-            r = result.result
-            if hasattr(r, "order_id"):
-                order_id = r.order_id
-            elif hasattr(r, "orderId"):
-                order_id = r.orderId
-            elif isinstance(getattr(r, "data", None), dict):
-                d = r.data or {}
-                order_id = d.get("order_id") or d.get("orderId") or d.get("id")
-        if order_id is None and isinstance(result, dict):
-            order_id = result.get("order_id") or result.get("orderId") or result.get("id")
+    except Exception as e:
+        return None, {"success": False, "error": str(e), "order_id": None}
+    return data, None
+
+
+def _extract_order_id(result: Any) -> Optional[Any]:
+    """SDK place_order / openapi_order_post 응답에서 주문 ID 추출 (응답 형태가 버전마다 달라 여러 위치 확인)."""
+    order_id = None
+    if hasattr(result, "result") and hasattr(result.result, "data"):
+        data_obj = result.result.data
+        if hasattr(data_obj, "order_id"):
+            order_id = getattr(data_obj, "order_id", None)
+        if order_id is None and hasattr(data_obj, "id"):
+            order_id = getattr(data_obj, "id", None)
+        if order_id is None and hasattr(data_obj, "orderId"):
+            order_id = getattr(data_obj, "orderId", None)
+        if order_id is None and isinstance(data_obj, dict):
+            order_id = (data_obj.get("order_id") or data_obj.get("orderId") or data_obj.get("id"))
+    if order_id is None and hasattr(result, "result"):
+        r = result.result
+        if hasattr(r, "order_id"):
+            order_id = r.order_id
+        elif hasattr(r, "orderId"):
+            order_id = r.orderId
+        elif isinstance(getattr(r, "data", None), dict):
+            d = r.data or {}
+            order_id = d.get("order_id") or d.get("orderId") or d.get("id")
+    if order_id is None and isinstance(result, dict):
+        order_id = result.get("order_id") or result.get("orderId") or result.get("id")
+    return order_id
+
+
+def _place_order_impl(
+    account: OpinionAccount,
+    market_id: int,
+    token_id: str,
+    side: str,
+    price: float,
+    size: int,
+    order_type_name: str,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    내부 공통: LIMIT 또는 MARKET 주문.
+    order_type_name: "LIMIT_ORDER" | "MARKET_ORDER"
+    구간 추적(trade_trace): build(주문 입력) / client(Client 캐시·생성) / sign_send(SDK 서명+전송)
+    """
+    with span("build"):
+        data, err = _build_order_input(market_id, token_id, side, price, size, order_type_name)
+    if err is not None:
+        return err
+
+    with span("client"):
+        client = _get_clob_client(account)
+    if client is None:
+        return dict(_NO_CLOB_CLIENT_ERROR)
+
+    try:
+        # 승인 캐시가 유효하면 on-chain 확인 생략. 아니면 check_approval=True: SDK가 enable_trading() 실행
+        check_approval = not is_trading_approved(account)
+        with span("sign_send"):
+            try:
+                result = client.place_order(data, check_approval=check_approval)
+            except Exception as first_e:
+                if check_approval or not _is_allowance_error(str(first_e)):
+                    raise
+                # 캐시는 승인이라 했는데 allowance 오류 → 무효화 후 승인 확인 포함해 한 번 더
+                logger.info("계정 %s allowance 오류 → 승인 캐시 무효화 후 재시도", getattr(account, "id", "?"))
+                invalidate_approval(account)
+                check_approval = True
+                result = client.place_order(data, check_approval=True)
+        if check_approval:
+            _mark_approval(account, True)
+        order_id = _extract_order_id(result)
         return {"success": True, "order_id": str(order_id) if order_id else None, "id": order_id}
     except Exception as e:
         err_msg = str(e)
         logger.exception("place order error: %s", err_msg)
+        if _is_transport_error(e):
+            # 연결/프록시 오류면 캐시된 Client를 버려 다음 주문은 새 연결로 (아래 재시도는 현재 client 그대로 사용)
+            evict_clob_client(account)
+        if _is_allowance_error(err_msg):
+            invalidate_approval(account)
         logger.warning("place order raw exception type=%s repr=%s", type(e).__name__, repr(e)[:500])
         if getattr(e, "__cause__", None):
             logger.warning("place order __cause__: %s", repr(e.__cause__)[:400])
@@ -303,15 +608,7 @@ def _place_order_impl(
                             continue
                         try:
                             result = retry_client.place_order(data, check_approval=True)
-                            order_id = None
-                            if hasattr(result, "result") and hasattr(result.result, "data"):
-                                data_obj = result.result.data
-                                order_id = getattr(data_obj, "order_id", None) or getattr(data_obj, "id", None)
-                            if order_id is None and hasattr(result, "result"):
-                                r = result.result
-                                order_id = getattr(r, "order_id", None) or (isinstance(getattr(r, "data", None), dict) and (r.data or {}).get("order_id") or (r.data or {}).get("id"))
-                            if order_id is None and isinstance(result, dict):
-                                order_id = result.get("order_id") or result.get("id")
+                            order_id = _extract_order_id(result)
                             if order_id is not None:
                                 logger.info("10603 재시도(EOA %s) 성공 order_id=%s", "lower" if addr == eoa.lower() else "checksum", order_id)
                                 return {"success": True, "order_id": str(order_id), "id": order_id}
@@ -342,23 +639,18 @@ def _place_order_impl(
             # 1) check_approval=False로 재시도 (승인은 이미 됐을 수 있음)
             try:
                 result = client.place_order(data, check_approval=False)
-                order_id = None
-                if hasattr(result, "result") and hasattr(result.result, "data"):
-                    order_id = getattr(result.result.data, "order_id", None) or getattr(result.result.data, "id", None)
-                if order_id is None and hasattr(result, "result"):
-                    r = result.result
-                    order_id = getattr(r, "order_id", None) or (isinstance(getattr(r, "data", None), dict) and (r.data or {}).get("order_id") or (r.data or {}).get("id"))
-                if order_id is None and isinstance(result, dict):
-                    order_id = result.get("order_id") or result.get("id")
+                order_id = _extract_order_id(result)
                 if order_id is not None:
                     logger.info("place_order check_approval=False 재시도 성공 order_id=%s", order_id)
                     return {"success": True, "order_id": str(order_id), "id": order_id}
             except Exception as no_approval_e:
                 logger.warning("place_order check_approval=False 재시도 실패: %s", no_approval_e)
-            # 2) BSC RPC 실패 → 대체 RPC로 자동 재시도 (403 나오면 RPC 문제 아님 → 중단하고 403 메시지 반환)
+            # 2) BSC RPC 실패 → 풀 순위대로 대체 RPC 재시도 (403 나오면 RPC 문제 아님 → 중단하고 403 메시지 반환)
+            failed_rpc = _client_rpc_url(client) or bsc_rpc_pool.best_url()
+            bsc_rpc_pool.report_failure(failed_rpc, err_msg)
             fallback_403_msg = None
-            for fallback_url in BSC_RPC_FALLBACKS:
-                if (fallback_url or "").strip() == (BSC_RPC_URL or "").strip():
+            for fallback_url in bsc_rpc_pool.ranked()[:4]:
+                if (fallback_url or "").strip() == (failed_rpc or "").strip():
                     continue
                 try:
                     retry_client = _get_clob_client(account, rpc_url_override=fallback_url)
@@ -367,15 +659,7 @@ def _place_order_impl(
                     for check_app in (True, False):
                         try:
                             result = retry_client.place_order(data, check_approval=check_app)
-                            order_id = None
-                            if hasattr(result, "result") and hasattr(result.result, "data"):
-                                data_obj = result.result.data
-                                order_id = getattr(data_obj, "order_id", None) or getattr(data_obj, "id", None)
-                            if order_id is None and hasattr(result, "result"):
-                                r = result.result
-                                order_id = getattr(r, "order_id", None) or (isinstance(getattr(r, "data", None), dict) and (r.data or {}).get("order_id") or (r.data or {}).get("id"))
-                            if order_id is None and isinstance(result, dict):
-                                order_id = result.get("order_id") or result.get("id")
+                            order_id = _extract_order_id(result)
                             if order_id is not None:
                                 logger.info("BSC RPC fallback 성공 rpc=%s check_approval=%s order_id=%s", fallback_url[:50], check_app, order_id)
                                 return {"success": True, "order_id": str(order_id), "id": order_id}
@@ -466,6 +750,108 @@ def place_market_order(
     )
 
 
+class _CaptureMarketApi:
+    """
+    SDK market_api 대리 객체: openapi_order_post만 가로채 서명된 주문 요청(V2AddOrderReq)을 보관하고
+    전송하지 않음. 나머지(quote token·market 조회)는 실제 market_api로 위임 (SDK 캐시 그대로 사용).
+    """
+
+    def __init__(self, real_api):
+        self._real_api = real_api
+        self.captured = None
+
+    def openapi_order_post(self, apikey=None, add_order_req=None, **kwargs):
+        self.captured = add_order_req
+        return None
+
+    def __getattr__(self, name):
+        return getattr(self._real_api, name)
+
+
+def prepare_order(
+    account: OpinionAccount,
+    market_id: int,
+    token_id: str,
+    side: str,
+    price: float,
+    size: int,
+    order_type_name: str = "LIMIT_ORDER",
+) -> Dict[str, Any]:
+    """
+    주문 생성·EIP712 서명까지만 수행 (전송 안 함). 자전거래 Taker를 Maker 전송과 병렬로 준비해
+    Maker 체결 직후에는 submit_prepared_order()로 HTTP 전송만 하도록.
+    - SDK place_order를 market_api만 바꾼 Client 얕은 복사본으로 실행 → 검증·금액 계산·서명은 SDK 로직 그대로
+    - 승인 캐시가 없으면(첫 주문 등) 준비하지 않음 → 호출 측은 일반 place_*_order 사용
+    Returns: success, prepared({"account", "client", "request", "prepared_at", 주문 인자}) 또는 error
+    """
+    with span("build"):
+        data, err = _build_order_input(market_id, token_id, side, price, size, order_type_name)
+    if err is not None:
+        return err
+    if not is_trading_approved(account):
+        return {"success": False, "error": "승인 상태 미확인 (일반 주문 경로 사용)", "order_id": None}
+    with span("client"):
+        client = _get_clob_client(account)
+    if client is None:
+        return dict(_NO_CLOB_CLIENT_ERROR)
+    capture = _CaptureMarketApi(client.market_api)
+    shadow = copy.copy(client)
+    shadow.market_api = capture
+    try:
+        with span("sign"):
+            shadow.place_order(data, check_approval=False)
+    except Exception as e:
+        logger.debug("주문 사전 서명 실패 (일반 경로 사용): %s", e)
+        return {"success": False, "error": str(e), "order_id": None}
+    if capture.captured is None:
+        return {"success": False, "error": "서명된 주문 요청을 얻지 못했습니다.", "order_id": None}
+    return {
+        "success": True,
+        "prepared": {
+            "account": account,
+            "client": client,
+            "request": capture.captured,
+            "prepared_at": time.time(),
+            "args": (market_id, token_id, side, price, size, order_type_name),
+        },
+    }
+
+
+def submit_prepared_order(prepared: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    prepare_order()로 서명해 둔 주문을 전송 (HTTP 1회). 반환 형식은 place_*_order와 동일.
+    오래됐거나(PREPARED_ORDER_MAX_AGE_SEC) 서버가 4xx로 확실히 거절(allowance·검증 등)하면 일반 경로로 새로 서명해 전송.
+    연결 오류·5xx·게이트웨이 타임아웃은 주문이 접수됐을 수 있으므로 재전송하지 않음.
+    """
+    account = prepared["account"]
+    if time.time() - prepared["prepared_at"] > PREPARED_ORDER_MAX_AGE_SEC:
+        return _place_order_impl(account, *prepared["args"])
+    client = prepared["client"]
+    req = prepared["request"]
+    try:
+        # timestamp는 서명 대상이 아님 (요청 메타데이터) → 전송 시각으로 갱신
+        req.timestamp = int(time.time())
+        with span("send"):
+            result = client.market_api.openapi_order_post(apikey=client.api_key, add_order_req=req)
+    except Exception as e:
+        if _is_transport_error(e):
+            evict_clob_client(account)
+            logger.warning("사전 서명 주문 전송 실패 (연결 오류, 재전송 안 함): %s", e)
+            return {"success": False, "error": str(e), "order_id": None}
+        if not _is_definite_rejection(e):
+            logger.warning(
+                "사전 서명 주문 응답 불확실 (status=%s, 재전송 안 함): %s",
+                getattr(e, "status", None), str(e)[:200],
+            )
+            return {"success": False, "error": str(e), "order_id": None}
+        if _is_allowance_error(str(e)):
+            invalidate_approval(account)
+        logger.info("사전 서명 주문 거절 → 일반 경로로 재시도: %s", str(e)[:200])
+        return _place_order_impl(account, *prepared["args"])
+    order_id = _extract_order_id(result)
+    return {"success": True, "order_id": str(order_id) if order_id else None, "id": order_id, "presigned": True}
+
+
 def cancel_order(account: OpinionAccount, order_id: str) -> Dict[str, Any]:
     """주문 취소."""
     if not order_id or not isinstance(order_id, str):
@@ -485,6 +871,8 @@ def cancel_order(account: OpinionAccount, order_id: str) -> Dict[str, Any]:
     except Exception as e:
         err_msg = str(e)
         logger.warning("cancel_order error: %s", err_msg)
+        if _is_transport_error(e):
+            evict_clob_client(account)
         if hasattr(e, "status") and hasattr(e, "body"):
             interpreted = interpret_opinion_api_response(
                 getattr(e, "status", 500),
@@ -496,6 +884,34 @@ def cancel_order(account: OpinionAccount, order_id: str) -> Dict[str, Any]:
         return {"success": False, "error": err_msg}
 
 
+def cancel_orders(
+    legs: Iterable[Tuple[OpinionAccount, str]],
+    timeout: float = CLOB_CANCEL_TIMEOUT_SEC,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    (계정, order_id) 여러 개를 계정별 Client로 동시에 취소. 모두 같은 마감(timeout)까지만 대기.
+    Returns: {order_id: cancel_order 결과}. 마감까지 응답 없으면 {"success": False, "error": "timeout"}
+    (요청은 백그라운드에서 계속 진행됨).
+    """
+    futures = {
+        str(order_id): _leg_executor.submit(cancel_order, account, str(order_id))
+        for account, order_id in legs
+        if order_id
+    }
+    futures_wait(list(futures.values()), timeout=max(0.0, timeout))
+    out: Dict[str, Dict[str, Any]] = {}
+    for order_id, fut in futures.items():
+        if not fut.done():
+            logger.warning("cancel_order 마감 초과 (%.1fs): %s", timeout, order_id)
+            out[order_id] = {"success": False, "error": "timeout"}
+            continue
+        try:
+            out[order_id] = fut.result()
+        except Exception as e:
+            out[order_id] = {"success": False, "error": str(e)}
+    return out
+
+
 def get_order_status(account: OpinionAccount, order_id: str) -> Dict[str, Any]:
     """
     주문 체결 상태 조회.
@@ -535,4 +951,6 @@ def get_order_status(account: OpinionAccount, order_id: str) -> Dict[str, Any]:
         return {"success": True, "filled": filled, "status": status_str, "raw": result}
     except Exception as e:
         logger.warning("get_order_status error: %s", e)
+        if _is_transport_error(e):
+            evict_clob_client(account)
         return {"success": False, "filled": False, "status": "error", "error": str(e)}
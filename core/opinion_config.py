@@ -26,8 +26,8 @@ OPINION_API_KEY_2 = _env("OPINION_API_KEY_2")
 OPINION_PROXY_2 = _env("OPINION_PROXY_2") or _env("OPINION_PROXY2")
 OPINION_EOA_2 = _env("OPINION_EOA_2")
 
-# Opinion OpenAPI 베이스 URL
-OPINION_API_BASE = "https://proxy.opinion.trade:8443/openapi"
+# Opinion OpenAPI 베이스 URL (로컬 대역 서버 scripts/local_clob.py로 바꿔 오프라인 테스트 가능)
+OPINION_API_BASE = _env("OPINION_API_BASE") or "https://proxy.opinion.trade:8443/openapi"
 
 # .env에서 정의된 계정 최대 개수 (확장 시 이 값만 넘지 않으면 됨)
 MAX_ENV_ACCOUNTS = 20
@@ -4,17 +4,29 @@ README 규칙: Maker(수수료 0%) + Taker 조합, MIN_PRICE_GAP / MIN_BALANCE /
 다중 계정 확장 가능 (Maker/Taker 계정 선택)
 """
 import logging
+import threading
 import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
 from typing import Optional, Dict, Any, List, Tuple
 
 from config import Config
-from core.opinion_config import OPINION_API_KEY, OPINION_PROXY, has_proxy, get_proxy_dict
+from core.opinion_config import OPINION_API_KEY, OPINION_PROXY, has_proxy
 from core.opinion_btc_topic import get_latest_bitcoin_up_down_market
 from core.opinion_client import get_market, get_orderbook
+from core.opinion_market_catalog import extract_market_detail, market_catalog
 from core.opinion_account import opinion_account_manager, OpinionAccount
 from core.btc_price import btc_price_service
-from core.okx_balance import get_usdt_balance_with_reason
-from core import opinion_ws_client
+from core.okx_balance import (
+    BALANCE_CACHE_HEADROOM,
+    BALANCE_CACHE_MAX_AGE_SEC,
+    balance_cache,
+    get_usdt_balances_with_reason,
+)
+from core.bsc_rpc_pool import rpc_proxies_for
+from core import opinion_ws_client, trade_trace
+from core.trade_trace import span
+from core.opinion_trade_timing import trade_timing
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +36,40 @@ MIN_BALANCE = getattr(Config, 'MIN_BALANCE', 20)
 TIME_BEFORE_END = getattr(Config, 'TIME_BEFORE_END', 300)
 
 # 실시간 자전거래: 한쪽이 올린 주문을 반대쪽이 바로 받아야 하므로 지연 최소화
-POST_MAKER_DELAY_SEC = getattr(Config, 'POST_MAKER_DELAY_SEC', 0.2)  # Maker 직후 대기 (0.2초, 기존 2초 제거)
-WASH_TRADE_POLL_INTERVAL_SEC = getattr(Config, 'WASH_TRADE_POLL_INTERVAL_SEC', 0.4)  # 체결 폴링 간격
-WASH_TRADE_POLL_TIMEOUT_SEC = getattr(Config, 'WASH_TRADE_POLL_TIMEOUT_SEC', 10)  # 최대 대기
+# Maker 직후 대기·체결 대기 timeout은 opinion_trade_timing이 관측 지연으로 정함 (POST_MAKER_DELAY_SEC /
+# WASH_TRADE_POLL_TIMEOUT_SEC 설정값은 상한, 표본이 모이기 전에는 설정값 그대로)
+WASH_TRADE_POLL_INTERVAL_SEC = getattr(Config, 'WASH_TRADE_POLL_INTERVAL_SEC', 0.4)  # 체결 폴링 간격 (적응형 일정 미사용 시)
 USE_TAKER_MARKET_ORDER = getattr(Config, 'USE_TAKER_MARKET_ORDER', True)  # Taker를 MARKET로 보내 즉시 체결 시도
+TAKER_PREPARE_WAIT_SEC = 2.0  # Maker 응답 후 Taker 사전 서명 완료를 기다리는 최대 시간 (넘으면 일반 경로)
 
+# 상태 조회 지연 예산(초): 호가·시작가·현재가·계정 조회를 병렬로 돌리고, 예산을 넘긴 선택 단계(BTC 가격)는 생략
+STATUS_LATENCY_BUDGET_SEC = getattr(Config, 'STATUS_LATENCY_BUDGET_SEC', 3.0)
+# 상태 조회 단계 병렬 실행용 (요청마다 스레드를 새로 만들지 않도록 공용)
+_status_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="manual-trade-status")
+# 자전거래 Taker 주문 사전 생성·서명용 (Maker 전송과 병렬)
+_order_prepare_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="order-prepare")
+# 계정별 락: 같은 계정이 동시에 두 자전거래에 들어가지 않도록 (수동 실행·다중 페어 실행 공용)
+_account_locks: Dict[int, threading.Lock] = {}
+_account_locks_guard = threading.Lock()
 
-def _extract_result(data: dict) -> dict:
-    """API 응답에서 result 또는 result.data 추출 (시장 상세용)."""
-    r = data.get("result") or data.get("data") or data
-    if isinstance(r, dict) and "data" in r:
-        return r.get("data") or r
-    return r if isinstance(r, dict) else {}
+
+@contextmanager
+def account_locks(*account_ids: int):
+    """
+    주어진 계정들의 락을 id 오름차순으로 잡음 (교차 대기로 인한 교착 방지).
+    프로세스 내 락 → gunicorn 워커가 1개일 때만 계정 충돌을 막음 (scripts/run_obot_gunicorn.sh)
+    """
+    ids = sorted(set(int(a) for a in account_ids))
+    with _account_locks_guard:
+        locks = [_account_locks.setdefault(a, threading.Lock()) for a in ids]
+    with span("account_lock"):
+        for lk in locks:
+            lk.acquire()
+    try:
+        yield
+    finally:
+        for lk in reversed(locks):
+            lk.release()
 
 
 def _orderbook_levels(ob: dict, key: str) -> list:
@@ -100,6 +134,113 @@ def _market_start_timestamp(market: dict) -> Optional[int]:
     return None
 
 
+def _yes_best_ask(tid: int, yes_token: str) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Yes 토큰 최저 매도호가. WS 구독 등록 후 WS 캐시 우선 → 없으면 REST 폴백.
+    Returns: (best_ask, 에러 메시지). REST 조회 실패 시 (None, 에러).
+    """
+    # WS 구독 등록 (실패해도 REST 폴백으로 진행)
+    try:
+        opinion_ws_client.subscribe_orderbook(
+            tid,
+            token_id=yes_token,
+            api_key=OPINION_API_KEY,
+            proxy=OPINION_PROXY,
+        )
+    except Exception as e:
+        logger.debug("WS 구독 스킵( REST 사용): %s", e)
+    try:
+        best_ask = opinion_ws_client.get_best_ask_from_ws(tid)
+        if best_ask is not None:
+            return best_ask, None
+    except Exception as e:
+        logger.debug("WS 호가 스킵( REST 사용): %s", e)
+    ob_yes = get_orderbook(yes_token, OPINION_API_KEY, OPINION_PROXY)
+    if not ob_yes.get("ok"):
+        return None, "호가창 조회 실패(Yes)"
+    # Opinion REST: data.data.asks 또는 data.asks (opinion_ws_client와 동일 경로)
+    data_part = ob_yes.get("data") or {}
+    asks_yes = _orderbook_levels(data_part, "asks")
+    if not asks_yes and isinstance(data_part.get("data"), dict):
+        asks_yes = _orderbook_levels(data_part.get("data") or {}, "asks")
+    if not asks_yes:
+        asks_yes = _orderbook_levels(ob_yes.get("result") or {}, "asks")
+    if not asks_yes:
+        asks_yes = _orderbook_levels(ob_yes, "asks")
+    best_ask = _best_price(asks_yes, want_low=True)
+    if best_ask is None:
+        logger.warning("Yes 호가 없음: token=%s, 응답 키=%s", yes_token[:16] if yes_token else "", list((ob_yes.get("data") or ob_yes).keys()) if isinstance(ob_yes.get("data"), dict) else "n/a")
+    return best_ask, None
+
+
+def _timed(timings: Dict[str, int], stage: str, fn, *args):
+    """단계 실행 + 소요 시간(ms) 기록. 병렬 단계에서 호출."""
+    t0 = time.monotonic()
+    try:
+        return fn(*args)
+    finally:
+        timings[stage] = int((time.monotonic() - t0) * 1000)
+
+
+def build_strategy_preview(
+    direction: str,
+    maker_price: float,
+    shares: int,
+    maker_account_id: Optional[int],
+    taker_account_id: Optional[int],
+    yes_token: Optional[str],
+    no_token: Optional[str],
+) -> Dict[str, Any]:
+    """수량(shares) 기준 계정 1+2 총 거래액 미리보기 (상태 스냅샷은 수량과 무관, 읽을 때 이것만 다시 계산)."""
+    taker_side = "DOWN" if direction == "UP" else "UP"
+    taker_price = round(1.0 - maker_price, 2)
+    s = max(1, shares)
+    maker_inv = maker_price * s
+    taker_inv = taker_price * s
+    total = maker_inv + taker_inv
+    taker_fee = taker_inv * 0.002
+    return {
+        "status": "arbitrage_ready",
+        "status_message": f"자전거래 가능 - Maker({direction} 수수료 0%) + Taker({taker_side})",
+        "maker": {
+            "side": direction,
+            "price": maker_price,
+            "price_display": f"{int(maker_price*100)}¢",
+            "investment": round(maker_inv, 2),
+            "fee": 0,
+            "account_id": maker_account_id,
+        },
+        "taker": {
+            "side": taker_side,
+            "price": taker_price,
+            "price_display": f"{int(taker_price*100)}¢",
+            "investment": round(taker_inv, 2),
+            "fee": round(taker_fee, 4),
+            "account_id": taker_account_id,
+        },
+        "total_investment": round(total, 2),
+        "guaranteed_loss": round(taker_fee, 4),
+        "yes_token_id": yes_token,
+        "no_token_id": no_token,
+    }
+
+
+def preview_for_shares(status: Dict[str, Any], shares: int) -> Optional[Dict[str, Any]]:
+    """상태(get_1h_market_for_trade 결과)의 미리보기를 다른 수량으로 다시 계산. 미리보기가 없으면 None."""
+    prev = status.get("strategy_preview")
+    if not prev:
+        return None
+    return build_strategy_preview(
+        prev["maker"]["side"],
+        prev["maker"]["price"],
+        shares,
+        prev["maker"]["account_id"],
+        prev["taker"]["account_id"],
+        prev.get("yes_token_id"),
+        prev.get("no_token_id"),
+    )
+
+
 def get_1h_market_for_trade(
     topic_id: Optional[int] = None,
     skip_time_check: bool = True,
@@ -112,7 +253,11 @@ def get_1h_market_for_trade(
     - trade_ready, trade_direction, strategy_preview (shares 기준 계정 1+2 총 거래액)
     - 갭 기준 방향 결정은 항상 수행됨 (skip_gap_check 파라미터 제거).
     - direction_override가 UP/DOWN이면 BTC 가격 없이도 해당 방향으로 trade_ready 반환(수동 지정 시).
+    - 시장 확정 후 호가(Yes)·Benchmarks 시작가·현재가·계정 목록을 병렬 조회 (STATUS_LATENCY_BUDGET_SEC 예산).
+      예산 안에 못 받은 BTC 가격은 없는 것으로 보고 진행. 단계별 소요 시간은 timings_ms.
     """
+    started = time.monotonic()
+    timings: Dict[str, int] = {}
     out = {
         "success": False,
         "error": None,
@@ -122,21 +267,26 @@ def get_1h_market_for_trade(
         "trade_direction": None,
         "trade_reason": None,
         "strategy_preview": None,
+        "timings_ms": timings,
     }
     if not OPINION_API_KEY:
         out["error"] = "API 키를 설정해 주세요 (.env OPINION_API_KEY)."
         return out
 
+    t_market = time.monotonic()
     tid, market_dict = get_latest_bitcoin_up_down_market()
     if topic_id is not None and tid != topic_id:
         tid = topic_id
-        res = get_market(topic_id, OPINION_API_KEY, OPINION_PROXY)
-        if not res.get("ok"):
-            out["error"] = "시장 조회 실패"
-            return out
-        market_dict = _extract_result(res.get("data") or {})
-        if not market_dict:
-            market_dict = res.get("data") or {}
+        market_dict = market_catalog.get_detail(topic_id)
+        if market_dict is None:
+            res = get_market(topic_id, OPINION_API_KEY, OPINION_PROXY)
+            if not res.get("ok"):
+                out["error"] = "시장 조회 실패"
+                return out
+            market_dict = extract_market_detail(res.get("data") or {})
+            if not market_dict:
+                market_dict = res.get("data") or {}
+            market_catalog.store_detail(topic_id, market_dict)
     if not tid or not market_dict:
         out["error"] = "1시간 마켓을 찾을 수 없습니다."
         return out
@@ -144,12 +294,18 @@ def get_1h_market_for_trade(
     out["topic_id"] = tid
     out["market"] = market_dict
 
-    # 목록 응답에는 토큰이 없을 수 있음 → 상세 재조회
+    # 목록 응답에는 토큰이 없을 수 있음 → 카탈로그가 미리 받아 둔 상세 사용, 없을 때만 재조회
     if not (market_dict.get("yesTokenId") and market_dict.get("noTokenId")):
-        res = get_market(tid, OPINION_API_KEY, OPINION_PROXY)
-        if res.get("ok"):
-            market_dict = _extract_result(res.get("data") or {})
+        detail = market_catalog.get_detail(tid)
+        if detail is None:
+            res = get_market(tid, OPINION_API_KEY, OPINION_PROXY)
+            if res.get("ok"):
+                detail = extract_market_detail(res.get("data") or {})
+                market_catalog.store_detail(tid, detail)
+        if detail:
+            market_dict = detail
             out["market"] = market_dict
+    timings["market"] = int((time.monotonic() - t_market) * 1000)
 
     # 종료 시각 (cutoffAt: ms 또는 sec)
     cutoff = market_dict.get("cutoffAt") or 0
@@ -177,45 +333,49 @@ def get_1h_market_for_trade(
         out["error"] = "시장에 yesTokenId/noTokenId가 없습니다."
         return out
 
-    # WS 구독 등록 (실패해도 REST 폴백으로 진행)
-    if tid:
-        try:
-            opinion_ws_client.subscribe_orderbook(
-                tid,
-                token_id=yes_token,
-                api_key=OPINION_API_KEY,
-                proxy=OPINION_PROXY,
-            )
-        except Exception as e:
-            logger.debug("WS 구독 스킵( REST 사용): %s", e)
-
-    # UP = Yes 토큰 호가창 (매수 쪽 = asks 중 최저가). WS 캐시 우선 → 없으면 REST 폴백
-    best_ask_yes = None
-    if tid:
+    # 시장 확정 후 서로 독립인 I/O 단계를 병렬 실행:
+    #   orderbook(필수) / start_price·current_price(선택, 예산 초과 시 생략) / accounts
+    use_override = (direction_override or "").strip().upper() in ("UP", "DOWN")
+    start_ts = _market_start_timestamp(market_dict)
+    need_prices = not use_override and start_ts is not None
+    deadline = started + max(0.1, float(STATUS_LATENCY_BUDGET_SEC))
+    f_orderbook = _status_executor.submit(_timed, timings, "orderbook", _yes_best_ask, tid, yes_token)
+    f_accounts = _status_executor.submit(_timed, timings, "accounts", opinion_account_manager.get_all)
+    f_start = f_current = None
+    if need_prices:
+        f_start = _status_executor.submit(
+            _timed, timings, "start_price", btc_price_service.get_price_at_timestamp, start_ts
+        )
+        f_current = _status_executor.submit(
+            _timed, timings, "current_price", btc_price_service.get_current_price
+        )
+    optional = [f for f in (f_start, f_current) if f is not None]
+    futures_wait([f_orderbook, f_accounts] + optional, timeout=max(0.0, deadline - time.monotonic()))
+
+    def _optional_result(fut, stage: str):
+        if fut is None:
+            return None
+        if not fut.done():
+            out.setdefault("budget_skipped", []).append(stage)
+            logger.info("상태 조회 예산(%.1fs) 초과 → %s 생략", STATUS_LATENCY_BUDGET_SEC, stage)
+            return None
         try:
-            best_ask_yes = opinion_ws_client.get_best_ask_from_ws(tid)
+            return fut.result()
         except Exception as e:
-            logger.debug("WS 호가 스킵( REST 사용): %s", e)
+            logger.debug("%s 조회 실패: %s", stage, e)
+            return None
+
+    # 호가·계정은 필수 → 예산을 넘겨도 끝날 때까지 대기 (REST 자체 timeout 적용)
+    best_ask_yes, ob_error = f_orderbook.result()
+    if ob_error:
+        out["error"] = ob_error
+        timings["total"] = int((time.monotonic() - started) * 1000)
+        out["timings_ms"] = dict(timings)
+        return out
     if best_ask_yes is None:
-        ob_yes = get_orderbook(yes_token, OPINION_API_KEY, OPINION_PROXY)
-        if not ob_yes.get("ok"):
-            out["error"] = "호가창 조회 실패(Yes)"
-            return out
-        # Opinion REST: data.data.asks 또는 data.asks (opinion_ws_client와 동일 경로)
-        data_part = ob_yes.get("data") or {}
-        asks_yes = _orderbook_levels(data_part, "asks")
-        if not asks_yes and isinstance(data_part.get("data"), dict):
-            asks_yes = _orderbook_levels(data_part.get("data") or {}, "asks")
-        if not asks_yes:
-            asks_yes = _orderbook_levels(ob_yes.get("result") or {}, "asks")
-        if not asks_yes:
-            asks_yes = _orderbook_levels(ob_yes, "asks")
-        best_ask_yes = _best_price(asks_yes, want_low=True)
-        if best_ask_yes is None:
-            logger.warning("Yes 호가 없음: token=%s, 응답 키=%s", yes_token[:16] if yes_token else "", list((ob_yes.get("data") or ob_yes).keys()) if isinstance(ob_yes.get("data"), dict) else "n/a")
-            # 호가 비어 있어도 기본가(0.49)로 진행 시도 (CLOB에서 유동성 확인)
-            best_ask_yes = 0.50
-            out["trade_reason"] = "호가창 비어 있어 기본가(50¢)로 주문 시도합니다."
+        # 호가 비어 있어도 기본가(0.49)로 진행 시도 (CLOB에서 유동성 확인)
+        best_ask_yes = 0.50
+        out["trade_reason"] = "호가창 비어 있어 기본가(50¢)로 주문 시도합니다."
     maker_price_up = max(0.01, round(best_ask_yes - 0.01, 2))
     taker_price_down = round(1.0 - maker_price_up, 2)
 
@@ -223,17 +383,15 @@ def get_1h_market_for_trade(
     # direction_override가 UP/DOWN이면 수동 지정이므로 BTC 가격 없어도 해당 방향 사용
     direction = "UP"
     gap_usd = None
-    use_override = (direction_override or "").strip().upper() in ("UP", "DOWN")
-    start_ts = _market_start_timestamp(market_dict)
     if use_override:
         direction = (direction_override or "").strip().upper()
-    elif start_ts is not None:
-        start_price = btc_price_service.get_price_at_timestamp(start_ts)
+    elif need_prices:
+        start_price = _optional_result(f_start, "start_price")
+        current_price = _optional_result(f_current, "current_price")
         if start_price is None and start_ts >= int(time.time()) - 300:
             # 시작 시각이 최근 5분 이내 또는 미래 → 현재가 폴백 (다음 구간 마켓 or 인덱스 미완)
             logger.info("start_price 폴백: Benchmarks 실패(ts=%s), 현재가 사용", start_ts)
-            start_price = btc_price_service.get_current_price()
-        current_price = btc_price_service.get_current_price()
+            start_price = current_price
         if start_price is not None and current_price is not None:
             gap_usd = current_price - start_price
             if gap_usd >= MIN_PRICE_GAP:
@@ -255,7 +413,7 @@ def get_1h_market_for_trade(
         out["btc_gap_usd"] = round(gap_usd, 2)  # UI에서 "GAP +$200 → Maker UP" 등 표시용
     out["trade_reason"] = f"수동 거래 가능 (Maker {direction} + Taker {taker_side})"
 
-    accounts = opinion_account_manager.get_all()
+    accounts = f_accounts.result()
     maker_account = None
     taker_account = None
     if len(accounts) >= 2:
@@ -264,71 +422,57 @@ def get_1h_market_for_trade(
     elif len(accounts) == 1:
         maker_account = accounts[0]
 
-    def _preview(shares: int = 10):
-        s = max(1, shares)
-        maker_inv = maker_price * s
-        taker_inv = taker_price * s
-        total = maker_inv + taker_inv
-        taker_fee = taker_inv * 0.002
-        return {
-            "status": "arbitrage_ready",
-            "status_message": f"자전거래 가능 - Maker({direction} 수수료 0%) + Taker({taker_side})",
-            "maker": {
-                "side": direction,
-                "price": maker_price,
-                "price_display": f"{int(maker_price*100)}¢",
-                "investment": round(maker_inv, 2),
-                "fee": 0,
-                "account_id": maker_account.id if maker_account else None,
-            },
-            "taker": {
-                "side": taker_side,
-                "price": taker_price,
-                "price_display": f"{int(taker_price*100)}¢",
-                "investment": round(taker_inv, 2),
-                "fee": round(taker_fee, 4),
-                "account_id": taker_account.id if taker_account else None,
-            },
-            "total_investment": round(total, 2),
-            "guaranteed_loss": round(taker_fee, 4),
-            "yes_token_id": yes_token,
-            "no_token_id": no_token,
-        }
-
-    out["strategy_preview"] = _preview(max(1, min(1000, int(shares))))
+    out["strategy_preview"] = build_strategy_preview(
+        direction,
+        maker_price,
+        max(1, min(1000, int(shares))),
+        maker_account.id if maker_account else None,
+        taker_account.id if taker_account else None,
+        yes_token,
+        no_token,
+    )
     out["yes_token_id"] = yes_token
     out["no_token_id"] = no_token
     out["maker_price_up"] = maker_price_up
     out["maker_price"] = maker_price  # 선택된 방향(direction) 기준 Maker 가격
     out["time_remaining"] = time_remaining
     out["success"] = True
+    timings["total"] = int((time.monotonic() - started) * 1000)
+    # 예산 초과로 버린 단계가 나중에 끝나도 응답이 바뀌지 않도록 복사본
+    out["timings_ms"] = dict(timings)
     return out
 
 
-def execute_manual_trade(
-    topic_id: int,
+def _resolve_trade_setup(
+    topic_id: Optional[int],
     shares: int,
     direction: Optional[str] = None,
     maker_account_id: Optional[int] = None,
     taker_account_id: Optional[int] = None,
-) -> Dict[str, Any]:
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
     """
-    수동 자전거래 실행.
-    - direction 미지정 시: status의 trade_direction(Maker 유리 방향) 사용.
-    - maker/taker 미지정 시: 계정 목록 순서로 자동 배정 (accounts[0]=Maker, accounts[1]=Taker).
-    - Maker: direction 방향 LIMIT 주문 (수수료 0%), Taker: 반대 방향 매칭.
+    자전거래 준비: 상태(시장·토큰·호가) 확인, Maker/Taker 계정 배정, 방향·Maker 가격 결정.
+    Returns: (setup, None) 또는 (None, 실패 결과 dict). 수동 실행·분할 실행(opinion_slicer) 공용.
+    setup: topic_id, status, maker_account, taker_account, direction, maker_price, taker_price, shares
     """
     if not OPINION_API_KEY:
-        return {"success": False, "error": "API 키를 설정해 주세요 (.env OPINION_API_KEY)."}
+        return None, {"success": False, "error": "API 키를 설정해 주세요 (.env OPINION_API_KEY)."}
 
     _dir_override = (direction or "").strip().upper()
-    status = get_1h_market_for_trade(
-        topic_id=topic_id,
-        skip_time_check=True,
-        direction_override=_dir_override if _dir_override in ("UP", "DOWN") else None,
-    )
+    # 상태 API가 갱신 중인 스냅샷이 TRADE_STATUS_MAX_AGE_SEC보다 젊으면 재계산 없이 사용
+    # (방향이 다르면 아래에서 maker_price_up 기준으로 재계산하므로 방향 지정 여부와 무관)
+    from core.opinion_trade_status import trade_status_service, TRADE_STATUS_MAX_AGE_SEC
+    with span("status"):
+        status = trade_status_service.get(topic_id=topic_id, shares=shares, max_age=TRADE_STATUS_MAX_AGE_SEC)
+        if not status.get("trade_ready") and _dir_override in ("UP", "DOWN"):
+            # 수동 방향 지정은 BTC 가격 없이도 거래 가능 → 방향 지정으로 다시 계산
+            status = get_1h_market_for_trade(
+                topic_id=topic_id,
+                skip_time_check=True,
+                direction_override=_dir_override,
+            )
     if not status.get("trade_ready") or not status.get("yes_token_id"):
-        return {
+        return None, {
             "success": False,
             "error": status.get("error") or status.get("trade_reason") or "거래 조건 미충족",
         }
@@ -340,15 +484,15 @@ def execute_manual_trade(
         tid_val = 0
     topic_id = status.get("topic_id") if (topic_id is None or tid_val == 0) else topic_id
     if topic_id is None:
-        return {"success": False, "error": "마켓 ID를 확인할 수 없습니다. 1시간 마켓을 불러온 뒤 다시 시도해 주세요."}
+        return None, {"success": False, "error": "마켓 ID를 확인할 수 없습니다. 1시간 마켓을 불러온 뒤 다시 시도해 주세요."}
     try:
         topic_id = int(topic_id)
     except (TypeError, ValueError):
-        return {"success": False, "error": "마켓 ID 형식 오류."}
+        return None, {"success": False, "error": "마켓 ID 형식 오류."}
 
     accounts = opinion_account_manager.get_all()
     if len(accounts) < 2:
-        return {"success": False, "error": "자전거래는 최소 2개 계정이 필요합니다."}
+        return None, {"success": False, "error": "자전거래는 최소 2개 계정이 필요합니다."}
 
     # Maker/Taker 미지정 시 자동 배정 (경봇과 동일: 순서 고정 또는 추후 잔액 기준 확장 가능)
     maker_acc = opinion_account_manager.get_by_id(maker_account_id) if maker_account_id else None
@@ -358,7 +502,7 @@ def execute_manual_trade(
     if not taker_acc:
         taker_acc = next((a for a in accounts if a.id != maker_acc.id), None) or accounts[1]
     if maker_acc.id == taker_acc.id:
-        return {"success": False, "error": "Maker와 Taker는 서로 다른 계정이어야 합니다."}
+        return None, {"success": False, "error": "Maker와 Taker는 서로 다른 계정이어야 합니다."}
 
     # 방향 미지정 시 status의 Maker 유리 방향(trade_direction) 사용
     direction = (direction or status.get("trade_direction") or "UP").strip().upper()
@@ -372,6 +516,67 @@ def execute_manual_trade(
     else:
         maker_price = maker_price_up if direction == "UP" else round(1.0 - maker_price_up, 2)
     taker_price = round(1.0 - maker_price, 2)
+    return {
+        "topic_id": topic_id,
+        "status": status,
+        "maker_account": maker_acc,
+        "taker_account": taker_acc,
+        "direction": direction,
+        "maker_price": maker_price,
+        "taker_price": taker_price,
+        "shares": shares,
+    }, None
+
+
+def execute_manual_trade(
+    topic_id: int,
+    shares: int,
+    direction: Optional[str] = None,
+    maker_account_id: Optional[int] = None,
+    taker_account_id: Optional[int] = None,
+    trace_kind: str = "manual",
+) -> Dict[str, Any]:
+    """
+    수동 자전거래 실행.
+    - direction 미지정 시: status의 trade_direction(Maker 유리 방향) 사용.
+    - maker/taker 미지정 시: 계정 목록 순서로 자동 배정 (accounts[0]=Maker, accounts[1]=Taker).
+    - Maker: direction 방향 LIMIT 주문 (수수료 0%), Taker: 반대 방향 매칭.
+    - 단계별 소요 시간은 result["trace"] (trade_trace, kind=trace_kind: manual/auto/multi)
+    """
+    with trade_trace.trace(trace_kind) as tr:
+        result = _execute_manual_trade(topic_id, shares, direction, maker_account_id, taker_account_id)
+        tr.outcome = trace_outcome(result)
+    result["trace"] = tr.to_dict()
+    return result
+
+
+def trace_outcome(result: Dict[str, Any]) -> str:
+    """거래 결과 → 추적 outcome (filled: 양쪽 체결, unfilled: 미체결 취소, failed: 그 외)."""
+    if result.get("round_trip_completed"):
+        return "filled"
+    if result.get("cancel_result") is not None:
+        return "unfilled"
+    return "failed"
+
+
+def _execute_manual_trade(
+    topic_id: Optional[int],
+    shares: int,
+    direction: Optional[str],
+    maker_account_id: Optional[int],
+    taker_account_id: Optional[int],
+) -> Dict[str, Any]:
+    setup, err = _resolve_trade_setup(topic_id, shares, direction, maker_account_id, taker_account_id)
+    if err is not None:
+        return err
+    topic_id = setup["topic_id"]
+    status = setup["status"]
+    maker_acc = setup["maker_account"]
+    taker_acc = setup["taker_account"]
+    direction = setup["direction"]
+    maker_price = setup["maker_price"]
+    taker_price = setup["taker_price"]
+    shares = setup["shares"]
 
     # CLOB SDK 연동 (미설치/미연동 시 스텁)
     try:
@@ -393,17 +598,21 @@ def execute_manual_trade(
             },
         }
 
-    # 실제 주문 실행 (opinion_clob_order에서 구현)
-    result = _run_wash_trade_via_clob(
-        topic_id=topic_id,
-        yes_token_id=status["yes_token_id"],
-        no_token_id=status["no_token_id"],
-        maker_account=maker_acc,
-        taker_account=taker_acc,
-        direction=direction,
-        maker_price=maker_price,
-        shares=shares,
-    )
+    # 실제 주문 실행 (opinion_clob_order에서 구현). 두 계정을 잡은 동안만 주문 → 다른 실행과 계정 충돌 없음
+    with account_locks(maker_acc.id, taker_acc.id):
+        result = _run_wash_trade_via_clob(
+            topic_id=topic_id,
+            yes_token_id=status["yes_token_id"],
+            no_token_id=status["no_token_id"],
+            maker_account=maker_acc,
+            taker_account=taker_acc,
+            direction=direction,
+            maker_price=maker_price,
+            shares=shares,
+        )
+    # 주문으로 호가가 바뀌었으므로 다음 상태 조회는 새로 계산
+    from core.opinion_trade_status import trade_status_service
+    trade_status_service.invalidate(topic_id)
     return result
 
 
@@ -420,6 +629,8 @@ def _check_balance_for_wash_trade(
     Taker 필요: taker_price * shares * 1.002 (수수료 0.2% 포함)
     부족 시 (False, "계정 N: OO USDT 부족" 형태 메시지) 반환.
     SKIP_BALANCE_CHECK=True면 조회 생략하고 통과.
+    잔고 캐시(balance_cache)에 양쪽 모두 필요 금액 × (1 + BALANCE_CACHE_HEADROOM) 이상이 있으면 네트워크 조회 없이 통과,
+    여유가 빠듯하거나 캐시가 없거나 오래됐으면(BALANCE_CACHE_MAX_AGE_SEC) 조회해서 정확히 비교.
     """
     skip = getattr(Config, "SKIP_BALANCE_CHECK", False)
     if skip:
@@ -427,18 +638,29 @@ def _check_balance_for_wash_trade(
 
     maker_need = maker_price * shares
     taker_need = taker_price * shares * 1.002
-    proxy_maker = get_proxy_dict(maker_account.proxy or "") if maker_account.proxy else None
-    proxy_taker = get_proxy_dict(taker_account.proxy or "") if taker_account.proxy else None
 
-    bal_maker, reason_maker = get_usdt_balance_with_reason(maker_account.eoa, proxy_maker)
-    if bal_maker is None and proxy_maker is not None:
-        bal_maker, reason_maker = get_usdt_balance_with_reason(maker_account.eoa, None)
+    cached_maker = balance_cache.get(maker_account.eoa, BALANCE_CACHE_MAX_AGE_SEC)
+    cached_taker = balance_cache.get(taker_account.eoa, BALANCE_CACHE_MAX_AGE_SEC)
+    if (
+        cached_maker is not None and cached_taker is not None
+        and cached_maker["balance"] >= maker_need * (1 + BALANCE_CACHE_HEADROOM)
+        and cached_taker["balance"] >= taker_need * (1 + BALANCE_CACHE_HEADROOM)
+    ):
+        return True, None
+
+    # 양쪽 잔고를 Multicall 1회로 (실패한 주소만 계정 프록시 → 직접 순으로 단건 보완)
+    balances = get_usdt_balances_with_reason(
+        [maker_account.eoa, taker_account.eoa],
+        proxies_by_address={
+            maker_account.eoa: rpc_proxies_for(maker_account.proxy),
+            taker_account.eoa: rpc_proxies_for(taker_account.proxy),
+        },
+    )
+    bal_maker, reason_maker = balances.get(maker_account.eoa, (None, "지갑 주소 없음"))
     if bal_maker is None:
         return False, f"Maker 계정 잔고 조회 실패: {reason_maker or '알 수 없음'}. (필요 시 .env에 SKIP_BALANCE_CHECK=1)"
 
-    bal_taker, reason_taker = get_usdt_balance_with_reason(taker_account.eoa, proxy_taker)
-    if bal_taker is None and proxy_taker is not None:
-        bal_taker, reason_taker = get_usdt_balance_with_reason(taker_account.eoa, None)
+    bal_taker, reason_taker = balances.get(taker_account.eoa, (None, "지갑 주소 없음"))
     if bal_taker is None:
         return False, f"Taker 계정 잔고 조회 실패: {reason_taker or '알 수 없음'}. (필요 시 .env에 SKIP_BALANCE_CHECK=1)"
     if bal_maker < maker_need:
@@ -461,43 +683,99 @@ def _run_wash_trade_via_clob(
     shares: int,
 ) -> Dict[str, Any]:
     """
-    CLOB 실시간 자전거래: 잔고 확인 → Maker LIMIT → (최소 대기 0.2초) → Taker MARKET/LIMIT → 체결 폴링.
+    CLOB 실시간 자전거래: 잔고 확인 → Maker LIMIT → (짧은 대기) → Taker MARKET/LIMIT → 체결 대기.
+    - Taker 주문은 Maker 전송과 병렬로 미리 생성·서명(prepare_order) → Maker 응답 뒤에는 HTTP 전송만.
+      사전 서명이 안 되면(승인 미확인 등) 기존처럼 place_*_order로 생성·서명·전송
     - 한쪽이 올린 주문을 반대쪽이 바로 받지 못하면 실패하므로, Maker 직후 2초 대기를 제거하고
-      POST_MAKER_DELAY_SEC(0.2초)만 둔 뒤 Taker를 즉시 전송. Taker는 기본 MARKET로 즉시 체결 시도.
-    - 미체결 시 양쪽 취소 후 에러 반환.
+      짧게만 대기한 뒤 Taker를 즉시 전송. Taker는 기본 MARKET로 즉시 체결 시도.
+      대기·체결 폴링 일정·timeout은 trade_timing(최근 왕복 관측 지연, 설정값이 상한)
+    - 체결은 양쪽 계정의 WS 사용자 채널 이벤트(opinion_order_events)로 감지.
+      이벤트가 안 오면 get_order_status 폴링으로 보완 (채널 연결 시 드물게, 끊겼으면 짧게 시작해 점점 길게).
+    - 미체결 시 양쪽을 동시에 취소(cancel_orders, 공유 마감) 후 에러 반환. 체결 폴링도 양쪽 동시 조회.
+    - 전송(_post_wash_round)과 체결 대기(_settle_wash_round)는 분리돼 있어 분할 실행(opinion_slicer)이
+      다음 조각의 Maker를 앞 조각 체결 대기와 겹쳐 보낼 수 있음
+    """
+    result, pending = _post_wash_round(
+        topic_id, yes_token_id, no_token_id, maker_account, taker_account, direction, maker_price, shares,
+    )
+    if pending is None:
+        return result
+    return _settle_wash_round(pending)
+
+
+def _post_wash_round(
+    topic_id: int,
+    yes_token_id: str,
+    no_token_id: str,
+    maker_account: OpinionAccount,
+    taker_account: OpinionAccount,
+    direction: str,
+    maker_price: float,
+    shares: int,
+    check_balance: bool = True,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    자전거래 전송 단계 (잔고 확인 → Maker → Taker 전송까지).
+    Returns: (결과, None) - 전송 단계에서 끝남(실패 또는 Maker 주문 ID 미반환)
+             (None, pending) - 양쪽 주문 접수됨 → _settle_wash_round(pending)로 체결 대기
+    check_balance=False: 호출 측(분할 실행)이 잔고를 미리 확인한 경우 조회 생략
     """
     try:
         from core.opinion_clob_order import (
             place_limit_order,
             place_market_order,
-            cancel_order,
-            get_order_status,
+            prepare_order,
+            submit_prepared_order,
+            cancel_orders,
         )
     except ImportError:
         return {
             "success": False,
             "error": "Opinion CLOB 주문 모듈(opinion_clob_order)을 추가해 주세요.",
             "needs_clob": True,
-        }
+        }, None
 
     token_maker = yes_token_id if direction == "UP" else no_token_id
     token_taker = no_token_id if direction == "UP" else yes_token_id
     taker_price = round(1.0 - maker_price, 2)
 
+    # 체결 이벤트 구독을 주문 전에 걸어 둠 (주문 직후 체결 이벤트도 보관되므로 놓치지 않음)
+    for acc in (maker_account, taker_account):
+        try:
+            opinion_ws_client.subscribe_user_orders(acc.api_key or OPINION_API_KEY, topic_id)
+        except Exception as e:
+            logger.debug("사용자 채널 구독 스킵(폴링 사용): %s", e)
+
     # 0) 잔고 사전 검증
-    ok, err = _check_balance_for_wash_trade(maker_account, taker_account, maker_price, taker_price, shares)
-    if not ok:
-        return {"success": False, "error": err}
+    if check_balance:
+        with span("balance_check"):
+            ok, err = _check_balance_for_wash_trade(maker_account, taker_account, maker_price, taker_price, shares)
+        if not ok:
+            return {"success": False, "error": err}, None
+
+    # Taker 주문 생성·서명은 Maker 전송과 동시에 (Maker 응답 후 Taker까지의 간격 최소화)
+    taker_order_type = "MARKET_ORDER" if USE_TAKER_MARKET_ORDER else "LIMIT_ORDER"
+    taker_prep_future = _order_prepare_executor.submit(
+        trade_trace.bind(prepare_order, "taker_prepare"),
+        taker_account,
+        topic_id,
+        token_taker,
+        "BUY",
+        taker_price,
+        shares,
+        taker_order_type,
+    )
 
     # 1) Maker LIMIT 주문 (호가창에 걸어 둠)
-    maker_res = place_limit_order(
-        account=maker_account,
-        market_id=topic_id,
-        token_id=token_maker,
-        side="BUY",
-        price=maker_price,
-        size=shares,
-    )
+    with span("maker_send"):
+        maker_res = place_limit_order(
+            account=maker_account,
+            market_id=topic_id,
+            token_id=token_maker,
+            side="BUY",
+            price=maker_price,
+            size=shares,
+        )
     if not maker_res.get("success"):
         return {
             "success": False,
@@ -509,8 +787,9 @@ def _run_wash_trade_via_clob(
             "shares": shares,
             "maker_amount_usd": round(shares * maker_price, 2),
             "taker_amount_usd": 0,
-        }
+        }, None
 
+    maker_acked_at = time.time()
     maker_amount_usd = round(shares * maker_price, 2)
     taker_amount_usd = round(shares * taker_price, 2)
 
@@ -531,26 +810,36 @@ def _run_wash_trade_via_clob(
             "taker_amount_usd": taker_amount_usd,
             "note": "Maker 주문만 접수됨. (주문 ID 미반환 — Taker 미실행. 호가창에만 걸린 상태라 정산/지갑 입금 없음. 앱·거래내역에서 확인하세요.)",
             "maker_result": maker_res,
-        }
+        }, None
 
-    # 실시간: Maker 직후 최소 대기만 하고 바로 Taker 전송 (기존 2초 제거 → 0.2초)
-    time.sleep(POST_MAKER_DELAY_SEC)
+    # 실시간: Maker 직후 최소 대기만 하고 바로 Taker 전송 (관측된 Maker 반영 지연 p95 기준, 설정값 이하)
+    with span("post_maker_delay"):
+        time.sleep(trade_timing.post_maker_delay())
 
     # 2) Taker 주문 — MARKET로 즉시 체결 시도 (반대쪽이 '바로 받지 못하면 실패' 방지)
-    place_taker = place_market_order if USE_TAKER_MARKET_ORDER else place_limit_order
-    taker_res = place_taker(
-        account=taker_account,
-        market_id=topic_id,
-        token_id=token_taker,
-        side="BUY",
-        price=taker_price,
-        size=shares,
-    )
+    try:
+        with span("taker_prepare_wait"):
+            taker_prep = taker_prep_future.result(timeout=TAKER_PREPARE_WAIT_SEC)
+    except Exception as e:
+        logger.debug("Taker 사전 서명 대기 실패 (일반 경로 사용): %s", e)
+        taker_prep = {"success": False}
+    with span("taker_send"):
+        if taker_prep.get("success"):
+            taker_res = submit_prepared_order(taker_prep["prepared"])
+        else:
+            place_taker = place_market_order if USE_TAKER_MARKET_ORDER else place_limit_order
+            taker_res = place_taker(
+                account=taker_account,
+                market_id=topic_id,
+                token_id=token_taker,
+                side="BUY",
+                price=taker_price,
+                size=shares,
+            )
     if not taker_res.get("success"):
-        try:
-            cancel_order(maker_account, order_id_maker)
-        except Exception:
-            pass
+        with span("cancel"):
+            cancel_orders([(maker_account, order_id_maker)])
+        balance_cache.invalidate([maker_account.eoa])
         return {
             "success": False,
             "error": f"Taker 주문 실패: {taker_res.get('error')}",
@@ -562,14 +851,13 @@ def _run_wash_trade_via_clob(
             "shares": shares,
             "maker_amount_usd": round(shares * maker_price, 2),
             "taker_amount_usd": round(shares * taker_price, 2),
-        }
+        }, None
 
     order_id_taker = taker_res.get("order_id") or taker_res.get("id")
     if not order_id_taker:
-        try:
-            cancel_order(maker_account, order_id_maker)
-        except Exception:
-            pass
+        with span("cancel"):
+            cancel_orders([(maker_account, order_id_maker)])
+        balance_cache.invalidate([maker_account.eoa])
         return {
             "success": False,
             "error": "Taker 주문 ID를 받지 못했습니다.",
@@ -581,47 +869,96 @@ def _run_wash_trade_via_clob(
             "shares": shares,
             "maker_amount_usd": round(shares * maker_price, 2),
             "taker_amount_usd": round(shares * taker_price, 2),
-        }
+        }, None
+
+    return None, {
+        "maker_acked_at": maker_acked_at,
+        "taker_acked_at": time.time(),
+        "maker_account": maker_account,
+        "taker_account": taker_account,
+        "maker_order_id": str(order_id_maker),
+        "taker_order_id": str(order_id_taker),
+        "direction": direction,
+        "maker_price": maker_price,
+        "taker_price": taker_price,
+        "shares": shares,
+        "taker_presigned": bool(taker_res.get("presigned")),
+    }
 
-    # 3) 체결 확인 (폴링 간격 단축으로 실시간에 가깝게 감지)
-    deadline = time.time() + WASH_TRADE_POLL_TIMEOUT_SEC
-    interval = WASH_TRADE_POLL_INTERVAL_SEC
-    maker_filled = False
-    taker_filled = False
-    while time.time() < deadline:
-        sm = get_order_status(maker_account, order_id_maker)
-        st = get_order_status(taker_account, order_id_taker)
-        maker_filled = sm.get("filled", False)
-        taker_filled = st.get("filled", False)
-        if maker_filled and taker_filled:
-            return {
-                "success": True,
-                "round_trip_completed": True,
-                "maker_order_id": order_id_maker,
-                "taker_order_id": order_id_taker,
-                "direction": direction,
-                "maker_price": maker_price,
-                "taker_price": taker_price,
-                "shares": shares,
-                "maker_amount_usd": round(shares * maker_price, 2),
-                "taker_amount_usd": round(shares * taker_price, 2),
-            }
-        time.sleep(interval)
 
-    # 4) 미체결 시 양쪽 취소
-    try:
-        cancel_order(maker_account, order_id_maker)
-    except Exception:
-        pass
-    try:
-        cancel_order(taker_account, order_id_taker)
-    except Exception:
-        pass
+def _settle_wash_round(pending: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    자전거래 체결 대기 단계: 사용자 채널 이벤트(+REST 폴링 보완)로 양쪽 체결 확인,
+    timeout(trade_timing.poll_schedule) 안에 끝나지 않으면 양쪽 동시 취소.
+    결과(체결 여부·Maker 반영 지연·체결 지연)는 trade_timing에 표본으로 반영.
+    """
+    from core.opinion_clob_order import cancel_orders, get_order_status
+    from core.opinion_order_events import get_order_event, wait_for_orders
+
+    maker_account = pending["maker_account"]
+    taker_account = pending["taker_account"]
+    order_id_maker = pending["maker_order_id"]
+    order_id_taker = pending["taker_order_id"]
+    direction = pending["direction"]
+    maker_price = pending["maker_price"]
+    taker_price = pending["taker_price"]
+    shares = pending["shares"]
+
+    # 3) 체결 확인: 사용자 채널 이벤트로 즉시 감지, REST 조회는 보완용
+    account_by_order = {order_id_maker: maker_account, order_id_taker: taker_account}
+    stream_ok = all(
+        opinion_ws_client.is_user_stream_connected(acc.api_key or OPINION_API_KEY)
+        for acc in (maker_account, taker_account)
+    )
+    schedule = trade_timing.poll_schedule()
+    with span("wait_fill"):
+        states = wait_for_orders(
+            [order_id_maker, order_id_taker],
+            timeout=schedule["timeout"],
+            poll_fn=lambda oid: get_order_status(account_by_order[oid], oid),
+            stream_ok=stream_ok,
+            poll_interval=WASH_TRADE_POLL_INTERVAL_SEC,
+            first_poll=schedule["first_poll"],
+            max_interval=schedule["max_interval"],
+        )
+    maker_filled = states[order_id_maker]["filled"]
+    taker_filled = states[order_id_taker]["filled"]
+    _observe_timing(pending, get_order_event(order_id_maker), get_order_event(order_id_taker), maker_filled and taker_filled)
+    if maker_filled and taker_filled:
+        # 잔고 캐시에서 지출 추정액 차감 (온체인 정산 반영은 백그라운드 갱신이 확인)
+        balance_cache.debit({
+            maker_account.eoa: shares * maker_price,
+            taker_account.eoa: shares * taker_price * 1.002,
+        })
+        return {
+            "success": True,
+            "round_trip_completed": True,
+            "maker_order_id": order_id_maker,
+            "taker_order_id": order_id_taker,
+            "direction": direction,
+            "maker_price": maker_price,
+            "taker_price": taker_price,
+            "shares": shares,
+            "maker_amount_usd": round(shares * maker_price, 2),
+            "taker_amount_usd": round(shares * taker_price, 2),
+            "fill_source": {"maker": states[order_id_maker]["source"], "taker": states[order_id_taker]["source"]},
+            "taker_presigned": pending.get("taker_presigned", False),
+        }
+
+    # 4) 미체결 시 양쪽 동시 취소 (계정별 Client, 공유 마감 → 왕복 1회)
+    with span("cancel"):
+        cancel_results = cancel_orders([(maker_account, order_id_maker), (taker_account, order_id_taker)])
+    # 한쪽만 (부분) 체결됐을 수 있음 → 양쪽 캐시를 버리고 다음 확인은 조회
+    balance_cache.invalidate([maker_account.eoa, taker_account.eoa])
     return {
         "success": False,
-        "error": f"미체결: {int(WASH_TRADE_POLL_TIMEOUT_SEC)}초 내 양쪽 체결되지 않아 주문을 취소했습니다.",
+        "error": f"미체결: {schedule['timeout']:g}초 내 양쪽 체결되지 않아 주문을 취소했습니다.",
         "maker_order_id": order_id_maker,
         "taker_order_id": order_id_taker,
+        "cancel_result": {
+            "maker": cancel_results[order_id_maker].get("success", False),
+            "taker": cancel_results[order_id_taker].get("success", False),
+        },
         "direction": direction,
         "maker_price": maker_price,
         "taker_price": taker_price,
@@ -629,3 +966,26 @@ def _run_wash_trade_via_clob(
         "maker_amount_usd": round(shares * maker_price, 2),
         "taker_amount_usd": round(shares * taker_price, 2),
     }
+
+
+def _observe_timing(
+    pending: Dict[str, Any],
+    maker_ev: Optional[Dict[str, Any]],
+    taker_ev: Optional[Dict[str, Any]],
+    filled: bool,
+) -> None:
+    """
+    왕복 1회 관측을 trade_timing에 반영.
+    Maker 반영 지연: Maker 접수 응답 → 사용자 채널(WS) 첫 이벤트 (REST 조회로 처음 안 경우는 표본 제외)
+    체결 지연: Taker 접수 응답 → 양쪽 중 늦은 전량 체결 확인
+    """
+    visible = None
+    if maker_ev and maker_ev.get("first_source") == "ws" and maker_ev.get("first_at"):
+        visible = max(0.0, maker_ev["first_at"] - pending["maker_acked_at"])
+    fill = None
+    if filled and maker_ev and taker_ev and maker_ev.get("filled_at") and taker_ev.get("filled_at"):
+        fill = max(0.0, max(maker_ev["filled_at"], taker_ev["filled_at"]) - pending["taker_acked_at"])
+    try:
+        trade_timing.observe(visible, fill, filled)
+    except Exception as e:
+        logger.debug("적응형 타이밍 반영 실패: %s", e)
@@ -0,0 +1,699 @@
+"""
+Opinion.trade 마켓 카탈로그 - 활성 시장 목록을 메모리에 인덱싱 (시리즈·종료 시각 기준)
+- 백그라운드 스레드가 주기적으로 목록을 받아 이전 스냅샷과 diff(추가/변경/제거)한 부분만 인덱스에 반영
+- data/market_catalog.json에 저장 → 재시작 직후에도 네트워크 없이 바로 조회 (warm start)
+- 요청 경로는 find_current()/find_next()/find_for_trade()로 메모리 조회만 함
+- 시리즈 레지스트리(register_series)로 여러 시간 단위 시리즈를 한 번의 목록 조회로 함께 추적.
+  갱신마다 모든 시리즈의 현재/다음 마켓을 한 번에 계산해 resolve()로 제공
+- 시리즈 롤오버(현재 구간 cutoff) 시각을 예측해 그 전후에만 짧은 주기로 조회하고,
+  다음 마켓의 상세(yes/noTokenId)와 WS 오더북 구독을 열리기 전에 미리 준비 (get_detail()로 조회)
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.opinion_config import OPINION_API_KEY, OPINION_PROXY
+from core.opinion_client import OPINION_API_RATE_LIMIT, RateLimiter, get_market, get_markets
+
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+CATALOG_FILE = _DATA_DIR / "market_catalog.json"
+
+# 백그라운드 갱신 주기(초)
+CATALOG_REFRESH_SEC = max(10, int(os.getenv("MARKET_CATALOG_REFRESH_SEC", "60").strip() or "60"))
+PAGE_LIMIT = 20
+# 2페이지 이후 병렬 조회 워커 수 (초당 요청 수는 아래 _page_limiter가 별도로 제한)
+FETCH_CONCURRENCY = max(1, int(os.getenv("MARKET_CATALOG_FETCH_CONCURRENCY", "6").strip() or "6"))
+# 목록 페이지 조회 전용 버킷 (거래 경로 요청이 페이지 조회 몰림 뒤에 줄서지 않도록 분리)
+_page_limiter = RateLimiter(OPINION_API_RATE_LIMIT)
+
+# 시리즈 레지스트리: 키 → {"patterns": 제목 패턴(소문자 부분 일치), "period_sec": 1구간 길이(초), "label"}
+BTC_UP_DOWN_SERIES = "btc_up_down"
+_SERIES_PERIOD_SEC = 3600  # 기본 구간 길이. 1시간 마켓
+_SERIES: Dict[str, Dict[str, Any]] = {
+    BTC_UP_DOWN_SERIES: {
+        "patterns": ("bitcoin up or down", "btc up or down"),
+        "period_sec": _SERIES_PERIOD_SEC,
+        "label": "Bitcoin Up or Down",
+    },
+}
+_series_lock = threading.Lock()
+
+# 롤오버 전후 집중 조회: [cutoff - LEAD, cutoff + TAIL] 구간에서 다음 마켓이 아직 없으면 ROLLOVER_POLL_SEC 주기
+ROLLOVER_LEAD_SEC = 120
+ROLLOVER_TAIL_SEC = 300
+ROLLOVER_POLL_SEC = 5
+# 종료 후 이 시간(초)이 지난 마켓은 WS 오더북 구독 해제
+WS_UNSUBSCRIBE_GRACE_SEC = 120
+
+
+def extract_market_list(data: dict) -> list:
+    """API 응답에서 market list 추출. result.list / data(배열) / result 형식 대응."""
+    if not data:
+        return []
+    # result.list (기존 형식)
+    r = data.get("result") or data
+    if isinstance(r, dict) and "list" in r:
+        lst = r.get("list")
+        if isinstance(lst, list):
+            return lst
+    if isinstance(r, list):
+        return r
+    # data가 배열인 경우 (일부 API 응답)
+    d = data.get("data")
+    if isinstance(d, list):
+        return d
+    return []
+
+
+def market_title(m: dict) -> str:
+    """마켓 제목 추출. API가 marketTitle / title / marketTitleDisplay 등 다를 수 있음."""
+    return (
+        (m.get("marketTitle") or m.get("title") or m.get("marketTitleDisplay") or m.get("question") or "")
+        if isinstance(m, dict) else ""
+    )
+
+
+def market_cutoff_ts(m: dict) -> int:
+    """cutoffAt(ms 또는 sec) → Unix 초. 없거나 형식 오류면 0."""
+    t = m.get("cutoffAt") or 0
+    if isinstance(t, dict):
+        t = 0
+    try:
+        t = int(float(t))
+    except (TypeError, ValueError):
+        t = 0
+    return t // 1000 if t > 1e12 else t
+
+
+def series_of(m: dict) -> Optional[str]:
+    """마켓이 속한 시리즈 키. 등록된 패턴에 안 맞으면 None (먼저 등록된 시리즈 우선)."""
+    t = market_title(m).lower()
+    with _series_lock:
+        items = list(_SERIES.items())
+    for key, spec in items:
+        if any(p in t for p in spec["patterns"]):
+            return key
+    return None
+
+
+def list_series() -> List[str]:
+    """등록된 시리즈 키 목록 (등록 순)."""
+    with _series_lock:
+        return list(_SERIES)
+
+
+def series_period(series: str) -> int:
+    """시리즈 1구간 길이(초). 미등록이면 기본 1시간."""
+    with _series_lock:
+        spec = _SERIES.get(series)
+    return int(spec["period_sec"]) if spec else _SERIES_PERIOD_SEC
+
+
+def series_label(series: str) -> str:
+    with _series_lock:
+        spec = _SERIES.get(series)
+    return (spec or {}).get("label") or series
+
+
+def register_series(
+    key: str,
+    patterns: Tuple[str, ...],
+    period_sec: int = _SERIES_PERIOD_SEC,
+    label: Optional[str] = None,
+) -> None:
+    """
+    추적할 시리즈 등록 (이미 있으면 교체). 이미 받아 둔 마켓도 다시 분류해 바로 조회 가능.
+    패턴은 마켓 제목 소문자 부분 일치.
+    """
+    key = (key or "").strip()
+    pats = tuple(p.strip().lower() for p in patterns if p and p.strip())
+    if not key or not pats:
+        raise ValueError("시리즈 키와 제목 패턴이 필요합니다.")
+    with _series_lock:
+        _SERIES[key] = {"patterns": pats, "period_sec": int(period_sec), "label": label or key}
+    market_catalog.reindex()
+
+
+def _parse_series_env(raw: str) -> List[Tuple[str, Tuple[str, ...], int]]:
+    """
+    OPINION_SERIES 파싱. 형식: key=패턴1|패턴2[@구간초];key2=...
+    예: eth_up_down=ethereum up or down|eth up or down;sol_up_down=solana up or down@3600
+    """
+    out = []
+    for part in (raw or "").split(";"):
+        if "=" not in part:
+            continue
+        key, rest = part.split("=", 1)
+        period = _SERIES_PERIOD_SEC
+        if "@" in rest:
+            rest, period_s = rest.rsplit("@", 1)
+            try:
+                period = int(period_s.strip())
+            except ValueError:
+                logger.warning("OPINION_SERIES 구간 길이 형식 오류: %s", part)
+                continue
+        pats = tuple(p.strip().lower() for p in rest.split("|") if p.strip())
+        if key.strip() and pats:
+            out.append((key.strip(), pats, period))
+    return out
+
+
+def extract_market_detail(data: dict) -> dict:
+    """GET /market/{id} 응답에서 result 또는 result.data 추출 (시장 상세용)."""
+    r = data.get("result") or data.get("data") or data
+    if isinstance(r, dict) and "data" in r:
+        return r.get("data") or r
+    return r if isinstance(r, dict) else {}
+
+
+def _fingerprint(m: dict) -> str:
+    """변경 감지용 해시 (필드 순서 무관)."""
+    return hashlib.sha1(json.dumps(m, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _fetch_page(status_val: str, page: int) -> Tuple[bool, List[dict], int]:
+    """한 페이지 조회. Returns: (성공 여부, 마켓 목록, total)."""
+    _page_limiter.acquire()
+    res = get_markets(OPINION_API_KEY, OPINION_PROXY, status=status_val, page=page, limit=PAGE_LIMIT)
+    if not res.get("ok"):
+        return False, [], 0
+    data = res.get("data") or {}
+    res_inner = data.get("result")
+    total = res_inner.get("total", 0) if isinstance(res_inner, dict) else 0
+    try:
+        total = int(total or 0)
+    except (TypeError, ValueError):
+        total = 0
+    return True, extract_market_list(data), total
+
+
+def _fetch_all(status_val: str) -> Tuple[List[dict], bool]:
+    """
+    status별 전체 페이지 조회.
+    1페이지의 total로 남은 페이지 수를 계산해 나머지는 병렬 조회 (_page_limiter 레이트리밋 적용).
+    total이 없으면 기존처럼 빈/짧은 페이지가 나올 때까지 순차 조회.
+    marketId 기준 중복 제거 (페이지 경계에서 목록이 밀리면 같은 마켓이 두 번 올 수 있음).
+    Returns: (마켓 목록, 완전 여부). 중간 페이지 실패 시 완전 여부 False → 제거(diff) 판단에 쓰지 않음.
+    """
+    ok, first, total = _fetch_page(status_val, 1)
+    if not ok:
+        return [], False
+    pages: Dict[int, List[dict]] = {1: first}
+    complete = True
+    if first and len(first) >= PAGE_LIMIT:
+        if total > len(first):
+            last_page = (total + PAGE_LIMIT - 1) // PAGE_LIMIT
+            workers = max(1, min(FETCH_CONCURRENCY, last_page - 1))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="opinion-catalog-page") as ex:
+                futures = {ex.submit(_fetch_page, status_val, p): p for p in range(2, last_page + 1)}
+                for fut in as_completed(futures):
+                    try:
+                        page_ok, lst, _ = fut.result()
+                    except Exception as e:
+                        logger.debug("market catalog: 페이지 %s 조회 예외: %s", futures[fut], e)
+                        page_ok, lst = False, []
+                    if not page_ok:
+                        complete = False
+                        continue
+                    pages[futures[fut]] = lst
+        elif not total:
+            p = 1
+            while True:
+                p += 1
+                page_ok, lst, _ = _fetch_page(status_val, p)
+                if not page_ok:
+                    complete = False
+                    break
+                if not lst:
+                    break
+                pages[p] = lst
+                if len(lst) < PAGE_LIMIT:
+                    break
+    merged: Dict[Any, dict] = {}
+    for p in sorted(pages):
+        for m in pages[p]:
+            if isinstance(m, dict) and m.get("marketId") is not None:
+                merged.setdefault(m["marketId"], m)
+    return list(merged.values()), complete
+
+
+class MarketCatalog:
+    """
+    시장 카탈로그. marketId → 마켓 dict, 시리즈별 [(cutoff, marketId)] 정렬 인덱스.
+    모든 조회는 메모리에서; 네트워크는 refresh()(백그라운드 스레드 또는 명시적 새로고침)에서만.
+    """
+
+    def __init__(self, path: Path = CATALOG_FILE):
+        self._path = path
+        self._lock = threading.Lock()
+        self._markets: Dict[int, dict] = {}
+        self._fingerprints: Dict[int, str] = {}
+        # marketId → 마지막으로 목록에서 본 status ("activated"/"open") — 제거 판단은 그 status 조회 기준
+        self._market_status: Dict[int, str] = {}
+        self._market_series: Dict[int, str] = {}
+        self._series_index: Dict[str, List[Tuple[int, int]]] = {}
+        # marketId → 상세(GET /market/{id}) 캐시. yes/noTokenId 포함. 목록 diff와 별도로 유지
+        self._details: Dict[int, dict] = {}
+        # 미리 WS 오더북 구독한 marketId → cutoff (종료 후 해제용)
+        self._ws_warmed: Dict[int, int] = {}
+        # 시리즈 → {"current": marketId|None, "next": marketId|None, "valid_until": 재계산 시각}
+        self._resolved: Dict[str, Dict[str, Any]] = {}
+        self._refresh_lock = threading.Lock()
+        self._last_refresh_at: float = 0.0
+        self._last_refresh_ok: bool = False
+        self._last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    # ---------- 인덱스 ----------
+
+    def _index_add(self, mid: int, m: dict) -> None:
+        """반드시 self._lock 안에서 호출."""
+        key = series_of(m)
+        if key is None:
+            return
+        self._market_series[mid] = key
+        bisect.insort(self._series_index.setdefault(key, []), (market_cutoff_ts(m), mid))
+
+    def _index_remove(self, mid: int) -> None:
+        """반드시 self._lock 안에서 호출."""
+        key = self._market_series.pop(mid, None)
+        if key is None:
+            return
+        entries = self._series_index.get(key) or []
+        old = self._markets.get(mid)
+        entry = (market_cutoff_ts(old), mid) if old else None
+        if entry in entries:
+            entries.remove(entry)
+        else:
+            entries[:] = [e for e in entries if e[1] != mid]
+
+    def apply_snapshot(self, scans: Dict[str, Tuple[List[dict], bool]]) -> Dict[str, int]:
+        """
+        status별로 새로 받은 목록을 현재 카탈로그와 diff해 바뀐 부분만 반영.
+        scans: {status: (마켓 목록, 완전 여부)} — 이번에 조회한 status만.
+        제거는 마지막으로 본 status의 조회가 이번에 완전했는데 어느 목록에도 없는 마켓만
+        (조회하지 않았거나 일부 페이지가 실패한 status의 마켓은 유지).
+        Returns: {"added", "changed", "removed"} 개수
+        """
+        fetched: Dict[int, dict] = {}
+        fetched_status: Dict[int, str] = {}
+        complete_statuses = set()
+        for status_val, (markets, complete) in scans.items():
+            if complete:
+                complete_statuses.add(status_val)
+            for m in markets:
+                if not isinstance(m, dict) or m.get("marketId") is None:
+                    continue
+                try:
+                    mid = int(m["marketId"])
+                except (TypeError, ValueError):
+                    continue
+                fetched.setdefault(mid, m)
+                fetched_status.setdefault(mid, status_val)
+        added = changed = removed = 0
+        with self._lock:
+            for mid, m in fetched.items():
+                self._market_status[mid] = fetched_status[mid]
+                fp = _fingerprint(m)
+                old_fp = self._fingerprints.get(mid)
+                if old_fp == fp:
+                    continue
+                if old_fp is None:
+                    added += 1
+                else:
+                    changed += 1
+                    self._index_remove(mid)
+                self._markets[mid] = m
+                self._fingerprints[mid] = fp
+                self._index_add(mid, m)
+            gone = [
+                mid for mid in self._markets
+                if mid not in fetched and self._market_status.get(mid) in complete_statuses
+            ]
+            for mid in gone:
+                self._index_remove(mid)
+                self._markets.pop(mid, None)
+                self._fingerprints.pop(mid, None)
+                self._market_status.pop(mid, None)
+                self._details.pop(mid, None)
+                removed += 1
+            if added or changed or removed:
+                self._resolved.clear()
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def reindex(self) -> None:
+        """시리즈 레지스트리 변경 후 전체 마켓을 다시 분류."""
+        with self._lock:
+            self._market_series.clear()
+            self._series_index.clear()
+            self._resolved.clear()
+            for mid, m in self._markets.items():
+                self._index_add(mid, m)
+
+    # ---------- 조회 (메모리) ----------
+
+    def has_data(self) -> bool:
+        with self._lock:
+            return bool(self._markets)
+
+    def has_series(self, series: str) -> bool:
+        with self._lock:
+            return bool(self._series_index.get(series))
+
+    def get(self, market_id: int) -> Optional[dict]:
+        with self._lock:
+            return self._markets.get(int(market_id))
+
+    def find_current(self, series: str, now: Optional[int] = None) -> Optional[dict]:
+        """지금 진행 중인 구간(cutoff - 1시간 <= now <= cutoff)의 마켓."""
+        now = int(time.time()) if now is None else now
+        period = series_period(series)
+        with self._lock:
+            entries = self._series_index.get(series) or []
+            i = bisect.bisect_left(entries, (now, -1))
+            if i < len(entries) and entries[i][0] - period <= now:
+                return self._markets.get(entries[i][1])
+        return None
+
+    def find_next(self, series: str, now: Optional[int] = None) -> Optional[dict]:
+        """진행 중 구간 다음(아직 시작 전) 마켓 중 가장 가까운 것."""
+        now = int(time.time()) if now is None else now
+        period = series_period(series)
+        with self._lock:
+            entries = self._series_index.get(series) or []
+            i = bisect.bisect_left(entries, (now, -1))
+            while i < len(entries):
+                cutoff, mid = entries[i]
+                if cutoff - period > now:
+                    return self._markets.get(mid)
+                i += 1
+        return None
+
+    def find_for_trade(self, series: str, now: Optional[int] = None) -> Optional[dict]:
+        """
+        거래 대상 마켓 선택 (기존 규칙 유지):
+        1) 지금 진행 중인 구간 2) 없으면 미래 중 가장 가까운 종료 3) 없으면 과거 중 가장 최근 종료
+        """
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            entries = self._series_index.get(series) or []
+            if not entries:
+                return None
+            i = bisect.bisect_left(entries, (now, -1))
+            mid = entries[i][1] if i < len(entries) else entries[-1][1]
+            return self._markets.get(mid)
+
+    def _resolve_all_locked(self, now: int) -> None:
+        """
+        반드시 self._lock 안에서 호출. 등록된 모든 시리즈의 현재/다음 마켓을 한 번에 계산.
+        결과는 가장 이른 경계(현재 구간 cutoff 또는 다음 구간 시작)까지 유효.
+        """
+        self._resolved.clear()
+        for key in list_series():
+            period = series_period(key)
+            entries = self._series_index.get(key) or []
+            i = bisect.bisect_left(entries, (now, -1))
+            cur = nxt = None
+            valid_until = now + period
+            while i < len(entries):
+                cutoff, mid = entries[i]
+                if cutoff - period <= now:
+                    if cur is None:
+                        cur = mid
+                        valid_until = min(valid_until, cutoff + 1)
+                else:
+                    nxt = mid
+                    valid_until = min(valid_until, cutoff - period)
+                    break
+                i += 1
+            self._resolved[key] = {"current": cur, "next": nxt, "valid_until": valid_until}
+
+    def resolve(self, series: str, now: Optional[int] = None) -> Dict[str, Optional[dict]]:
+        """
+        시리즈의 현재/다음 마켓 {"current": dict|None, "next": dict|None}.
+        캐시는 카탈로그 변경 시 또는 구간 경계를 지나면 모든 시리즈를 한 번에 재계산.
+        """
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            r = self._resolved.get(series)
+            if r is None or now >= r["valid_until"]:
+                self._resolve_all_locked(now)
+                r = self._resolved.get(series) or {"current": None, "next": None}
+            return {
+                "current": self._markets.get(r["current"]) if r.get("current") is not None else None,
+                "next": self._markets.get(r["next"]) if r.get("next") is not None else None,
+            }
+
+    def resolve_all(self, now: Optional[int] = None) -> Dict[str, Dict[str, Optional[dict]]]:
+        """등록된 모든 시리즈의 현재/다음 마켓."""
+        now = int(time.time()) if now is None else now
+        return {key: self.resolve(key, now) for key in list_series()}
+
+    def get_detail(self, market_id: int) -> Optional[dict]:
+        """미리 받아 둔 시장 상세 (yes/noTokenId 포함). 없으면 None (네트워크 호출 안 함)."""
+        with self._lock:
+            return self._details.get(int(market_id))
+
+    def store_detail(self, market_id: int, detail: dict) -> None:
+        """요청 경로에서 직접 받은 상세도 캐시에 넣어 다음 요청은 메모리에서 처리."""
+        if detail and detail.get("yesTokenId") and detail.get("noTokenId"):
+            with self._lock:
+                self._details[int(market_id)] = detail
+
+    def predict_rollover(self, series: str, now: Optional[int] = None) -> Optional[int]:
+        """
+        다음 롤오버 시각(= 진행 중 구간의 cutoff) 예측.
+        진행 중 마켓이 없으면 마지막으로 알려진 cutoff에서 구간 길이만큼 더해 now 이후 첫 시각.
+        """
+        now = int(time.time()) if now is None else now
+        cur = self.find_current(series, now)
+        if cur is not None:
+            return market_cutoff_ts(cur)
+        with self._lock:
+            entries = self._series_index.get(series) or []
+            if not entries:
+                return None
+            last_cutoff = entries[-1][0]
+        if last_cutoff >= now:
+            return last_cutoff
+        period = series_period(series)
+        periods = (now - last_cutoff) // period + 1
+        return last_cutoff + periods * period
+
+    def next_poll_delay(self, interval: int, now: Optional[int] = None) -> float:
+        """
+        다음 갱신까지 대기(초). 평소엔 interval,
+        롤오버 구간([cutoff - LEAD, cutoff + TAIL])에서 다음 마켓이 아직 카탈로그에 없으면 ROLLOVER_POLL_SEC,
+        롤오버 구간 시작이 interval보다 먼저 오면 그 시각에 맞춰 깨어남.
+        """
+        now = int(time.time()) if now is None else now
+        delay = float(interval)
+        for key in list_series():
+            rollover = self.predict_rollover(key, now)
+            if rollover is None:
+                continue
+            window_start = rollover - ROLLOVER_LEAD_SEC
+            window_end = rollover + ROLLOVER_TAIL_SEC
+            if window_start <= now <= window_end:
+                if self.find_next(key, now) is None and self.find_current(key, rollover + 1) is None:
+                    delay = min(delay, ROLLOVER_POLL_SEC)
+            elif now < window_start:
+                delay = min(delay, max(1.0, window_start - now))
+        return delay
+
+    def warm_upcoming(self, now: Optional[int] = None) -> None:
+        """
+        시리즈별 진행 중·다음 마켓의 상세(yes/noTokenId)를 미리 받아 두고 WS 오더북 구독까지 걸어 둠.
+        종료 후 WS_UNSUBSCRIBE_GRACE_SEC 지난 마켓은 구독 해제. 백그라운드 스레드에서 호출.
+        """
+        now = int(time.time()) if now is None else now
+        targets: List[dict] = []
+        for r in self.resolve_all(now).values():
+            for m in (r["current"], r["next"]):
+                if m is not None:
+                    targets.append(m)
+        for m in targets:
+            mid = int(m["marketId"])
+            detail = self.get_detail(mid)
+            if detail is None:
+                if m.get("yesTokenId") and m.get("noTokenId"):
+                    detail = m
+                else:
+                    res = get_market(mid, OPINION_API_KEY, OPINION_PROXY)
+                    if not res.get("ok"):
+                        logger.debug("market catalog: 상세 미리 조회 실패 market_id=%s", mid)
+                        continue
+                    detail = extract_market_detail(res.get("data") or {})
+                self.store_detail(mid, detail)
+                logger.info("market catalog: 마켓 %s 상세 미리 준비 (cutoff=%s)", mid, market_cutoff_ts(m))
+            self._warm_ws(mid, detail, market_cutoff_ts(m))
+        # 종료된 마켓 WS 구독 해제
+        expired = [mid for mid, cutoff in self._ws_warmed.items() if cutoff and cutoff + WS_UNSUBSCRIBE_GRACE_SEC < now]
+        for mid in expired:
+            self._ws_warmed.pop(mid, None)
+            try:
+                from core import opinion_ws_client
+                opinion_ws_client.unsubscribe_orderbook(mid)
+            except Exception as e:
+                logger.debug("WS 구독 해제 스킵 market_id=%s: %s", mid, e)
+
+    def _warm_ws(self, mid: int, detail: Optional[dict], cutoff: int) -> None:
+        """WS 오더북 구독 + REST 스냅샷 초기화 (opinion_ws_client가 백그라운드로 처리)."""
+        if mid in self._ws_warmed or not detail:
+            return
+        yes_token = (detail.get("yesTokenId") or "").strip()
+        if not yes_token:
+            return
+        try:
+            from core import opinion_ws_client
+            opinion_ws_client.subscribe_orderbook(
+                mid, token_id=yes_token, api_key=OPINION_API_KEY, proxy=OPINION_PROXY
+            )
+            self._ws_warmed[mid] = cutoff
+        except Exception as e:
+            logger.debug("WS 미리 구독 스킵 market_id=%s: %s", mid, e)
+
+    # ---------- 갱신 ----------
+
+    def refresh(self) -> bool:
+        """
+        목록 전체 조회 후 diff 반영. 동시에 여러 번 호출돼도 한 번만 실행(나머지는 그 결과 사용).
+        Returns: 조회 성공 여부
+        """
+        if not OPINION_API_KEY:
+            self._last_error = "API 키 없음 (.env OPINION_API_KEY 확인)"
+            return False
+        if not self._refresh_lock.acquire(blocking=False):
+            # 다른 스레드가 갱신 중 → 끝날 때까지 기다렸다가 그 결과 사용
+            with self._refresh_lock:
+                return self._last_refresh_ok
+        try:
+            started = time.time()
+            markets, complete = _fetch_all("activated")
+            if not markets:
+                self._last_refresh_ok = False
+                self._last_error = "Opinion 마켓 조회 실패 (API/프록시 오류)"
+                logger.warning("market catalog: get_markets failed (empty)")
+                return False
+            scans = {"activated": (markets, complete)}
+            # 새 마켓이 'open' 등 다른 status로 올 수 있음 → 등록 시리즈가 하나라도 비면 한 번 더 조회
+            found = {series_of(m) for m in markets}
+            if any(key not in found for key in list_series()):
+                scans["open"] = _fetch_all("open")
+            diff = self.apply_snapshot(scans)
+            self._last_refresh_at = time.time()
+            self._last_refresh_ok = True
+            self._last_error = None
+            if diff["added"] or diff["changed"] or diff["removed"]:
+                logger.info(
+                    "market catalog 갱신: +%d ~%d -%d (총 %d, %.2fs)",
+                    diff["added"], diff["changed"], diff["removed"], len(self._markets), time.time() - started,
+                )
+                self._save()
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def last_error(self) -> Optional[str]:
+        return self._last_error
+
+    def start(self, interval: int = CATALOG_REFRESH_SEC) -> None:
+        """백그라운드 갱신 스레드 시작. 이미 동작 중이면 무시."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if not OPINION_API_KEY:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), daemon=True, name="opinion-market-catalog"
+        )
+        self._thread.start()
+        logger.info("market catalog 백그라운드 갱신 시작 (%ds 주기)", interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, interval: int) -> None:
+        while not self._stop.is_set():
+            delay = float(interval)
+            try:
+                if self.refresh():
+                    self.warm_upcoming()
+                delay = self.next_poll_delay(interval)
+            except Exception as e:
+                self._last_error = str(e)
+                logger.exception("market catalog refresh error: %s", e)
+            self._stop.wait(delay)
+
+    def status(self) -> Dict[str, Any]:
+        """UI/디버깅용 요약."""
+        with self._lock:
+            series_counts = {k: len(v) for k, v in self._series_index.items()}
+            total = len(self._markets)
+            details = len(self._details)
+        return {
+            "markets": total,
+            "series": series_counts,
+            "details_cached": details,
+            "next_rollover": {k: self.predict_rollover(k) for k in list_series()},
+            "last_refresh_at": int(self._last_refresh_at) or None,
+            "last_refresh_ok": self._last_refresh_ok,
+            "last_error": self._last_error,
+            "refresher_running": self._thread is not None and self._thread.is_alive(),
+        }
+
+    # ---------- 저장 ----------
+
+    def _load(self) -> None:
+        """data/market_catalog.json에서 직전 스냅샷 로드 (실패 시 빈 카탈로그)."""
+        if not self._path.exists():
+            return
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            markets = data.get("markets") or []
+            statuses = data.get("statuses") or {}
+            # 저장된 status별로 나눠 복원 (이전 형식 파일은 status가 없어 activated로 간주)
+            scans: Dict[str, Tuple[List[dict], bool]] = {}
+            for m in markets:
+                st = statuses.get(str(m.get("marketId"))) if isinstance(m, dict) else None
+                scans.setdefault(st or "activated", ([], True))[0].append(m)
+            self.apply_snapshot(scans)
+            self._last_refresh_at = float(data.get("saved_at") or 0)
+            logger.info("market catalog 로드: %d개 (저장 시각 %s)", len(self._markets), int(self._last_refresh_at))
+        except Exception as e:
+            logger.warning("market catalog load failed: %s", e)
+
+    def _save(self) -> None:
+        try:
+            _DATA_DIR.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                markets = list(self._markets.values())
+                statuses = {str(mid): st for mid, st in self._market_status.items()}
+            tmp = self._path.with_suffix(".json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": time.time(), "markets": markets, "statuses": statuses}, f, ensure_ascii=False)
+            os.replace(tmp, self._path)
+        except Exception as e:
+            logger.warning("market catalog save failed: %s", e)
+
+
+market_catalog = MarketCatalog()
+
+# .env OPINION_SERIES로 추가 시리즈 등록 (BTC Up or Down은 기본 등록)
+for _key, _pats, _period in _parse_series_env(os.getenv("OPINION_SERIES", "")):
+    register_series(_key, _pats, _period)
@@ -0,0 +1,243 @@
+"""
+오봇(Opinion) 다중 페어 자전거래 - 요청 총 수량을 서로 겹치지 않는 계정 페어 N개에 나눠 동시에 실행
+- 페어: 계정 목록을 앞에서부터 2개씩 묶음 (1-2, 3-4, ...). 남는 계정 1개는 사용 안 함
+- 페어별 워커 스레드 1개가 자기 몫(shares_per_trade 단위 묶음)을 순서대로 실행, 라운드마다 Maker/Taker 교대
+- 계정 락(execute_manual_trade 내부)으로 같은 계정이 동시에 두 주문에 들어가지 않고,
+  전체 페어 합산 시작 속도는 RateLimiter(MULTI_PAIR_ROUNDS_PER_SEC)로 제한
+- 한 페어가 연속 실패(MULTI_PAIR_MAX_CONSECUTIVE_FAILURES)하면 그 페어만 중단, 나머지는 계속
+- 작업(job) 단위 백그라운드 실행 → start_multi_pair_job()은 job_id만 즉시 반환, 진행은 get_multi_pair_job()으로 조회
+  (HTTP 요청이 전체 라운드를 기다리지 않음: gunicorn --timeout 초과 방지)
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from core.opinion_account import opinion_account_manager, OpinionAccount
+from core.opinion_client import RateLimiter
+from core.opinion_manual_trade import execute_manual_trade
+from core.job_registry import JobRegistry
+from core.trade_history import record_round_trip
+
+logger = logging.getLogger(__name__)
+
+MULTI_PAIR_MAX_PAIRS = getattr(Config, 'MULTI_PAIR_MAX_PAIRS', 10)
+MULTI_PAIR_ROUNDS_PER_SEC = getattr(Config, 'MULTI_PAIR_ROUNDS_PER_SEC', 2.0)
+MULTI_PAIR_MAX_CONSECUTIVE_FAILURES = 2
+# 작업 결과에 남길 페어별 최근 오류 수
+_RECENT_ERRORS = 20
+
+# 전체 페어 공용 (요청마다 새로 만들면 동시 요청 시 합산 속도가 제한되지 않음)
+_round_limiter = RateLimiter(MULTI_PAIR_ROUNDS_PER_SEC)
+_jobs = JobRegistry("multi-pair")
+
+
+def make_pairs(accounts: List[OpinionAccount]) -> List[Tuple[OpinionAccount, OpinionAccount]]:
+    """계정 목록을 순서대로 2개씩 묶은 서로소 페어 목록."""
+    return [(accounts[i], accounts[i + 1]) for i in range(0, len(accounts) - 1, 2)]
+
+
+def _split_shares(total_shares: int, shares_per_trade: int, n_pairs: int) -> List[List[int]]:
+    """총 수량을 shares_per_trade 단위로 자른 뒤 페어별 큐에 번갈아 배분 (마지막 묶음은 나머지)."""
+    chunks = [shares_per_trade] * (total_shares // shares_per_trade)
+    if total_shares % shares_per_trade:
+        chunks.append(total_shares % shares_per_trade)
+    queues: List[List[int]] = [[] for _ in range(n_pairs)]
+    for i, c in enumerate(chunks):
+        queues[i % n_pairs].append(c)
+    return queues
+
+
+def _update_pair(job_id: str, idx: int, **fields: Any) -> None:
+    with _jobs.edit(job_id) as job:
+        if job is not None:
+            job["pairs"][idx].update(fields)
+
+
+def _run_pair(
+    job_id: str,
+    idx: int,
+    pair: Tuple[OpinionAccount, OpinionAccount],
+    queue: List[int],
+    topic_id: Optional[int],
+    direction: Optional[str],
+    stop: threading.Event,
+) -> None:
+    """페어 1개의 몫을 순서대로 실행하며 작업의 페어 항목(job["pairs"][idx])을 라운드마다 갱신."""
+    a, b = pair
+    started = time.monotonic()
+    consecutive_failures = 0
+    _update_pair(job_id, idx, state="running")
+    for i, shares in enumerate(queue):
+        if stop.is_set():
+            _update_pair(job_id, idx, stopped_early=True)
+            break
+        maker, taker = (a, b) if i % 2 == 0 else (b, a)
+        if not _round_limiter.acquire(stop):
+            _update_pair(job_id, idx, stopped_early=True)
+            break
+        try:
+            res = execute_manual_trade(
+                topic_id=topic_id,
+                shares=shares,
+                direction=direction,
+                maker_account_id=maker.id,
+                taker_account_id=taker.id,
+                trace_kind="multi",
+            )
+        except Exception as e:
+            logger.exception("다중 페어 라운드 예외 (pair=%s-%s): %s", a.id, b.id, e)
+            res = {"success": False, "error": str(e)}
+        ok = bool(res.get("success") and res.get("round_trip_completed"))
+        with _jobs.edit(job_id) as job:
+            entry = job["pairs"][idx]
+            entry["rounds_done"] += 1
+            if ok:
+                filled = int(res.get("shares") or shares)
+                volume = float(res.get("maker_amount_usd") or 0) + float(res.get("taker_amount_usd") or 0)
+                entry["completed"] += 1
+                entry["shares_filled"] += filled
+                entry["volume_usd"] = round(entry["volume_usd"] + volume, 2)
+                job["completed_rounds"] += 1
+                job["shares_filled"] += filled
+                job["volume_usd"] = round(job["volume_usd"] + volume, 2)
+            else:
+                entry["errors"] = (entry["errors"] + [str(res.get("error") or "unknown")])[-_RECENT_ERRORS:]
+            entry["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+        if ok:
+            consecutive_failures = 0
+            try:
+                record_round_trip(res, "multi")
+            except Exception as e:
+                logger.debug("trade_history append: %s", e)
+            continue
+        consecutive_failures += 1
+        if consecutive_failures >= MULTI_PAIR_MAX_CONSECUTIVE_FAILURES:
+            logger.warning("다중 페어 %s-%s 연속 %s회 실패 → 중단", a.id, b.id, consecutive_failures)
+            _update_pair(job_id, idx, stopped_early=True)
+            break
+    _update_pair(job_id, idx, state="done", elapsed_ms=int((time.monotonic() - started) * 1000))
+
+
+def _run_job(
+    job_id: str,
+    active: List[Tuple[Tuple[OpinionAccount, OpinionAccount], List[int]]],
+    topic_id: Optional[int],
+    direction: Optional[str],
+    stop: threading.Event,
+) -> None:
+    """작업 본체 (백그라운드 스레드). 페어별 워커를 띄우고 모두 끝나면 최종 상태 기록."""
+    started = time.monotonic()
+    _jobs.update(job_id, state="running")
+
+    def _worker(idx: int) -> None:
+        pair, queue = active[idx]
+        try:
+            _run_pair(job_id, idx, pair, queue, topic_id, direction, stop)
+        except Exception as e:
+            logger.exception("다중 페어 워커 오류: %s", e)
+            with _jobs.edit(job_id) as job:
+                entry = job["pairs"][idx]
+                entry["errors"] = (entry["errors"] + [str(e)])[-_RECENT_ERRORS:]
+            _update_pair(job_id, idx, state="done", stopped_early=True)
+
+    threads = [
+        threading.Thread(target=_worker, args=(i,), daemon=True, name=f"multi-pair-{p[0].id}-{p[1].id}")
+        for i, (p, _) in enumerate(active)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with _jobs.edit(job_id) as job:
+        if stop.is_set():
+            job["state"], job["error"] = "stopped", None
+        elif job["completed_rounds"] > 0:
+            job["state"], job["error"] = "done", None
+        else:
+            job["state"], job["error"] = "failed", "체결된 라운드가 없습니다."
+        job["elapsed_ms"] = int((time.monotonic() - started) * 1000)
+    logger.info("다중 페어 자전거래 %s 종료: %s", job_id, get_multi_pair_job(job_id))
+
+
+def start_multi_pair_job(
+    topic_id: Optional[int],
+    total_shares: int,
+    shares_per_trade: int = 10,
+    direction: Optional[str] = None,
+    max_pairs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    총 수량(total_shares)을 계정 페어들에 나눠 동시에 자전거래하는 작업 시작 (백그라운드). 즉시 반환.
+    - shares_per_trade: 라운드 1회 수량. max_pairs: 사용할 페어 수 상한 (기본 MULTI_PAIR_MAX_PAIRS)
+    Returns: {"success": True, "job_id", "job": 진행 상태} 또는 {"success": False, "error"}
+    """
+    total_shares = int(total_shares)
+    shares_per_trade = max(1, int(shares_per_trade))
+    if total_shares < 1:
+        return {"success": False, "error": "총 수량은 1 이상이어야 합니다."}
+    limit = max(1, int(max_pairs or MULTI_PAIR_MAX_PAIRS))
+    pairs = make_pairs(opinion_account_manager.get_all())[:limit]
+    if not pairs:
+        return {"success": False, "error": "다중 페어 자전거래는 최소 2개 계정이 필요합니다."}
+
+    queues = _split_shares(total_shares, shares_per_trade, len(pairs))
+    active = [(p, q) for p, q in zip(pairs, queues) if q]
+    job_id, stop = _jobs.create({
+        # running → done / stopped / failed
+        "topic_id": topic_id,
+        "direction": direction,
+        "requested_shares": total_shares,
+        "shares_per_trade": shares_per_trade,
+        "total_rounds": sum(len(q) for _, q in active),
+        "completed_rounds": 0,
+        "shares_filled": 0,
+        "volume_usd": 0.0,
+        "started_at": int(time.time()),
+        "elapsed_ms": 0,
+        "pairs": [
+            {
+                "pair": [p[0].id, p[1].id],
+                "state": "waiting",
+                "rounds": len(q),
+                "rounds_done": 0,
+                "completed": 0,
+                "shares_filled": 0,
+                "volume_usd": 0.0,
+                "errors": [],
+                "stopped_early": False,
+                "elapsed_ms": 0,
+            }
+            for p, q in active
+        ],
+    })
+    _jobs.run(job_id, _run_job, job_id, active, topic_id, direction, stop)
+    return {"success": True, "job_id": job_id, "job": get_multi_pair_job(job_id)}
+
+
+def get_multi_pair_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """작업 진행 상태 (진행률 progress 0~1 = 처리한 라운드 / 전체 라운드 포함). 없으면 None."""
+    out = _jobs.get(job_id)
+    if out is None:
+        return None
+    done_rounds = sum(p["rounds_done"] for p in out["pairs"])
+    out["progress"] = round(done_rounds / out["total_rounds"], 4) if out["total_rounds"] else 0.0
+    return out
+
+
+def stop_multi_pair_job(job_id: str) -> bool:
+    """작업 중지 요청. 진행 중인 라운드는 끝까지 처리하고 새 라운드는 시작하지 않음."""
+    return _jobs.stop(job_id)
+
+
+def list_multi_pair_jobs() -> List[Dict[str, Any]]:
+    """보관 중인 작업 요약 (페어별 상세 제외)."""
+    out = []
+    for jid in _jobs.ids():
+        job = get_multi_pair_job(jid)
+        if job:
+            job.pop("pairs", None)
+            out.append(job)
+    return out
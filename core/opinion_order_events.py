@@ -0,0 +1,206 @@
+"""
+주문 체결 이벤트 허브 - WS 사용자 채널(trade.order.update / trade.record.new) 또는 로컬 대체 서버가
+publish_order_event()로 넣은 주문 상태를 order_id별로 보관하고, 대기 중인 스레드를 즉시 깨움.
+
+- wait_for_orders(): 이벤트로 양쪽 주문이 끝날 때까지 대기. 이벤트가 늦거나 스트림이 끊겨 있으면
+  poll_fn(REST 주문 조회)으로 보완하되, 스트림 정상 시에는 드물게·점점 길게(adaptive) 조회
+- 이벤트가 order_id를 알기 전에 도착해도 보관해 두므로 주문 직후 체결돼도 놓치지 않음
+- 폴링 폴백은 미종료 주문(Maker/Taker)을 동시에 조회 → 왕복 1회 비용, 대기 timeout을 넘기지 않음
+  (거래 추적 중이면 폴링 1회마다 poll 구간 기록)
+- Opinion status: 1 대기, 2 완료(전량 체결), 3 취소, 4 만료, 5 실패
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from core.trade_trace import span
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 1
+STATUS_FINISHED = 2
+STATUS_CANCELED = 3
+STATUS_EXPIRED = 4
+STATUS_FAILED = 5
+_TERMINAL = (STATUS_FINISHED, STATUS_CANCELED, STATUS_EXPIRED, STATUS_FAILED)
+
+# 보관 기간(초). 이보다 오래된 주문 이벤트는 publish 시 정리
+ORDER_EVENT_TTL_SEC = 600
+
+# 폴링 폴백 간격: 스트림 정상 시 첫 조회까지 길게, 끊겨 있으면 짧게 시작해 점점 늘림
+POLL_FALLBACK_FIRST_SEC_STREAM = 1.5
+POLL_FALLBACK_MAX_SEC = 3.0
+POLL_BACKOFF = 1.6
+
+_orders: Dict[str, Dict[str, Any]] = {}
+_cond = threading.Condition()
+_stats = {"events": 0, "polls": 0}
+# 폴링 폴백 동시 조회용 (주문별 1스레드, 요청마다 새로 만들지 않도록 공용)
+_poll_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="order-poll")
+
+
+def _to_status(v: Any) -> Optional[int]:
+    if v is None:
+        return None
+    s = str(v).strip().lower()
+    if s in ("filled", "finished", "2", "2.0"):
+        return STATUS_FINISHED
+    if s in ("canceled", "cancelled", "3", "3.0"):
+        return STATUS_CANCELED
+    if s in ("expired", "4", "4.0"):
+        return STATUS_EXPIRED
+    if s in ("failed", "5", "5.0"):
+        return STATUS_FAILED
+    if s in ("pending", "open", "1", "1.0"):
+        return STATUS_PENDING
+    return None
+
+
+def publish_order_event(
+    order_id: str,
+    status: Any = None,
+    filled: Optional[bool] = None,
+    source: str = "ws",
+    data: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    주문 상태 갱신을 알림. status는 Opinion 숫자 코드 또는 문자열(filled/canceled 등).
+    filled=True면 status와 무관하게 전량 체결로 간주. 대기 중인 wait_for_orders()를 깨움.
+    """
+    oid = str(order_id or "").strip()
+    if not oid:
+        return
+    st = _to_status(status)
+    if filled:
+        st = STATUS_FINISHED
+    now = time.time()
+    with _cond:
+        prev = _orders.get(oid) or {}
+        # 종료 상태는 이후 늦게 온 대기(1) 이벤트로 되돌리지 않음
+        if prev.get("status") in _TERMINAL and st not in _TERMINAL:
+            st = prev.get("status")
+        filled_now = (st == STATUS_FINISHED) or bool(prev.get("filled"))
+        _orders[oid] = {
+            "status": st if st is not None else prev.get("status"),
+            "filled": filled_now,
+            "source": source,
+            "updated_at": now,
+            # 처음 알게 된 시각(호가 반영 추정) / 전량 체결을 알게 된 시각 → 적응형 타이밍(opinion_trade_timing) 표본
+            "first_at": prev.get("first_at") or now,
+            "filled_at": prev.get("filled_at") or (now if filled_now else None),
+            "first_source": prev.get("first_source") or source,
+            "data": data if data is not None else prev.get("data"),
+        }
+        if source != "poll":
+            _stats["events"] += 1
+        if len(_orders) > 1000:
+            for k in [k for k, v in _orders.items() if now - v["updated_at"] > ORDER_EVENT_TTL_SEC]:
+                _orders.pop(k, None)
+        _cond.notify_all()
+
+
+def handle_ws_message(data: Dict[str, Any]) -> bool:
+    """
+    Opinion WS 사용자 채널 메시지 처리. 주문 이벤트였으면 True.
+    trade.order.update: orderUpdateType(orderNew/orderFill/orderCancel/orderConfirm), orderId, status
+    trade.record.new: orderId, status, tradeNo (체결 기록)
+    """
+    msg_type = (data.get("msgType") or data.get("channel") or data.get("type") or "").strip()
+    if msg_type not in ("trade.order.update", "trade.record.new"):
+        return False
+    body = data.get("data") if isinstance(data.get("data"), dict) else data
+    oid = body.get("orderId") or body.get("order_id")
+    if not oid:
+        return True
+    status = body.get("status")
+    update_type = (body.get("orderUpdateType") or "").strip()
+    if update_type == "orderCancel" and status is None:
+        status = STATUS_CANCELED
+    publish_order_event(str(oid), status=status, source="ws", data=body)
+    return True
+
+
+def _poll_one(poll_fn: Callable[[str], Dict[str, Any]], oid: str) -> None:
+    """poll_fn(REST 조회) 1회 → 결과를 이벤트로 반영. 대기 timeout 뒤에 끝나도 허브에는 반영됨."""
+    try:
+        r = poll_fn(oid)
+    except Exception as e:
+        logger.debug("주문 상태 폴링 실패 %s: %s", oid, e)
+        return
+    with _cond:
+        _stats["polls"] += 1
+    if r.get("success") is False:
+        return
+    st = _to_status(r.get("status"))
+    if r.get("filled") or st is not None:
+        publish_order_event(oid, status=st, filled=r.get("filled"), source="poll")
+
+
+def get_order_event(order_id: str) -> Optional[Dict[str, Any]]:
+    with _cond:
+        ev = _orders.get(str(order_id))
+        return dict(ev) if ev else None
+
+
+def wait_for_orders(
+    order_ids: Iterable[str],
+    timeout: float,
+    poll_fn: Optional[Callable[[str], Dict[str, Any]]] = None,
+    stream_ok: bool = False,
+    poll_interval: float = 0.4,
+    first_poll: Optional[float] = None,
+    max_interval: Optional[float] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    모든 주문이 종료 상태(체결/취소/만료/실패)가 되거나 timeout까지 대기.
+    - 이벤트 도착 시 즉시 깨어남
+    - poll_fn(order_id) -> {"filled": bool, "status": ...}: 이벤트 보완용 REST 조회.
+      stream_ok=True(사용자 채널 연결됨)면 POLL_FALLBACK_FIRST_SEC_STREAM 뒤 첫 조회,
+      아니면 poll_interval부터 시작. 이후 POLL_BACKOFF배씩 늘려 POLL_FALLBACK_MAX_SEC까지.
+    - first_poll / max_interval: 첫 조회 시점·최대 간격 직접 지정 (적응형 타이밍이 관측 체결 지연으로 계산)
+    Returns: {order_id: {"status", "filled", "source"}} (이벤트·조회 없으면 status None)
+    """
+    ids = [str(o) for o in order_ids if o]
+    deadline = time.monotonic() + max(0.0, timeout)
+    interval = POLL_FALLBACK_FIRST_SEC_STREAM if stream_ok else max(0.05, poll_interval)
+    if first_poll is not None:
+        interval = max(0.05, first_poll)
+    cap = max_interval if max_interval is not None else POLL_FALLBACK_MAX_SEC
+    next_poll = time.monotonic() + interval
+
+    def _snapshot() -> Dict[str, Dict[str, Any]]:
+        return {
+            oid: {
+                "status": (_orders.get(oid) or {}).get("status"),
+                "filled": bool((_orders.get(oid) or {}).get("filled")),
+                "source": (_orders.get(oid) or {}).get("source"),
+            }
+            for oid in ids
+        }
+
+    while True:
+        with _cond:
+            snap = _snapshot()
+            if all(s["status"] in _TERMINAL for s in snap.values()):
+                return snap
+            now = time.monotonic()
+            if now >= deadline:
+                return snap
+            wake = min(deadline, next_poll) if poll_fn is not None else deadline
+            if wake > now:
+                _cond.wait(wake - now)
+                continue
+        # 폴링 폴백: 아직 종료 안 된 주문만 동시에 조회 (남은 대기 시간까지만 기다림)
+        with span("poll"):
+            futures = [_poll_executor.submit(_poll_one, poll_fn, oid) for oid, s in snap.items() if s["status"] not in _TERMINAL]
+            futures_wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        interval = min(cap, interval * POLL_BACKOFF)
+        next_poll = time.monotonic() + interval
+
+
+def get_stats() -> Dict[str, Any]:
+    """디버깅용: 수신 이벤트 수 / 폴백 조회 수 / 보관 중 주문 수."""
+    with _cond:
+        return {**_stats, "orders": len(_orders)}
@@ -0,0 +1,311 @@
+"""
+오봇(Opinion) 분할 자전거래 - 큰 목표 수량을 호가 깊이에 맞춘 작은 조각(자전 1회)으로 나눠 연속 실행
+- 조각 수량: Maker 가격 부근(YES 기준 maker_price_up ~ +0.01) 호가 잔량 × SLICE_DEPTH_FRACTION,
+  [SLICE_MIN_SHARES, SLICE_MAX_SHARES]로 제한. 호가를 못 읽으면 SLICE_MIN_SHARES
+- 파이프라인: 조각 k의 Taker까지 전송(_post_wash_round)한 뒤 체결 대기(_settle_wash_round)는 백그라운드로 넘기고,
+  그동안 조각 k+1의 Maker를 전송 → 호가창에 걸려 있는 노출은 최대 2조각
+- 조각마다 호가를 다시 읽어 가격·수량 재계산 (아직 걸려 있는 자기 Maker 주문은 호가에서 제외)
+- 진행률·체결 통계는 작업(job) 단위로 보관 → get_slice_job()으로 조회 (UI 폴링)
+- 실행 중 두 계정은 account_locks로 잡아 둠 (수동·다중 페어 실행과 계정 충돌 없음)
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from core.opinion_config import OPINION_API_KEY, OPINION_PROXY
+from core.opinion_client import get_orderbook
+from core.opinion_manual_trade import (
+    _check_balance_for_wash_trade,
+    _orderbook_levels,
+    _post_wash_round,
+    _resolve_trade_setup,
+    _settle_wash_round,
+    account_locks,
+    trace_outcome,
+)
+from core.job_registry import JobRegistry
+from core.trade_history import record_round_trip
+from core import opinion_ws_client, trade_trace
+
+logger = logging.getLogger(__name__)
+
+SLICE_MIN_SHARES = getattr(Config, 'SLICE_MIN_SHARES', 10)
+SLICE_MAX_SHARES = getattr(Config, 'SLICE_MAX_SHARES', 200)
+SLICE_DEPTH_FRACTION = getattr(Config, 'SLICE_DEPTH_FRACTION', 0.5)
+SLICE_MAX_TARGET_SHARES = getattr(Config, 'SLICE_MAX_TARGET_SHARES', 20000)
+SLICE_MAX_CONSECUTIVE_FAILURES = 3
+# 작업 결과에 남길 최근 조각 수
+_RECENT_SLICES = 50
+
+# 조각 체결 대기 (작업당 동시 1개 + 여유)
+_settle_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="slice-settle")
+_jobs = JobRegistry("slice")
+
+
+def _level(l: Any) -> Tuple[Optional[float], float]:
+    """호가 레벨 → (가격, 잔량). [p, s] 또는 {"price", "size"} 형식."""
+    try:
+        if isinstance(l, (list, tuple)) and len(l) >= 2:
+            return float(l[0]), float(l[1])
+        if isinstance(l, dict):
+            return float(l.get("price")), float(l.get("size") or l.get("quantity") or 0)
+    except (TypeError, ValueError):
+        pass
+    return None, 0.0
+
+
+def _read_book(topic_id: int, yes_token: str) -> Tuple[List[Any], List[Any]]:
+    """YES 기준 (asks, bids). WS 누적 오더북이 살아 있으면 사용, 아니면 REST."""
+    try:
+        if opinion_ws_client.get_best_ask_from_ws(topic_id) is not None:
+            snap = opinion_ws_client.get_full_orderbook_snapshot(topic_id) or {}
+            return snap.get("asks") or [], snap.get("bids") or []
+    except Exception as e:
+        logger.debug("WS 호가 스킵(REST 사용): %s", e)
+    ob = get_orderbook(yes_token, OPINION_API_KEY, OPINION_PROXY)
+    if not ob.get("ok"):
+        return [], []
+    data_part = ob.get("data") or {}
+    return _orderbook_levels(data_part, "asks"), _orderbook_levels(data_part, "bids")
+
+
+def _live_quote(
+    topic_id: int,
+    yes_token: str,
+    own: Optional[Tuple[str, float, float]] = None,
+) -> Tuple[Optional[float], float]:
+    """
+    (maker_price_up, Maker 가격 부근 잔량). maker_price_up = YES 최저 매도호가 - 0.01.
+    own=(side, yes_price, size): 아직 걸려 있을 수 있는 자기 Maker 주문 → 해당 레벨 잔량에서 제외
+    """
+    asks_raw, bids_raw = _read_book(topic_id, yes_token)
+    book: Dict[str, Dict[float, float]] = {"asks": {}, "bids": {}}
+    for side, raw in (("asks", asks_raw), ("bids", bids_raw)):
+        for l in raw:
+            p, s = _level(l)
+            if p is not None and s > 0:
+                book[side][round(p, 2)] = book[side].get(round(p, 2), 0.0) + s
+    if own:
+        side, p, s = own
+        left = book[side].get(round(p, 2), 0.0) - s
+        if left > 0:
+            book[side][round(p, 2)] = left
+        else:
+            book[side].pop(round(p, 2), None)
+    if not book["asks"]:
+        return None, 0.0
+    best_ask = min(book["asks"])
+    maker_up = max(0.01, round(best_ask - 0.01, 2))
+    depth = sum(s for p, s in book["asks"].items() if p <= best_ask + 1e-9)
+    depth += sum(s for p, s in book["bids"].items() if p >= maker_up - 1e-9)
+    return maker_up, depth
+
+
+def _slice_size(depth: float, remaining: int, max_slice: int) -> int:
+    """호가 잔량 기준 조각 수량. 잔량을 모르면 최소 수량, 남은 목표보다 크지 않게."""
+    size = int(depth * SLICE_DEPTH_FRACTION) if depth > 0 else SLICE_MIN_SHARES
+    size = max(SLICE_MIN_SHARES, min(size, max_slice))
+    return max(1, min(size, remaining))
+
+
+def _record_slice(job_id: str, entry: Dict[str, Any], res: Dict[str, Any]) -> None:
+    """조각 결과를 작업 통계에 반영 (+ 체결 조각은 거래 기록 source=slice)."""
+    ok = bool(res.get("success") and res.get("round_trip_completed"))
+    tr = trade_trace.finish(entry.pop("_trace"), trace_outcome(res))
+    entry.update({
+        "success": ok,
+        "fill_ms": int(((entry.pop("_t1", None) or time.monotonic()) - entry.pop("_t0")) * 1000),
+        "error": None if ok else str(res.get("error") or "unknown"),
+    })
+    with _jobs.edit(job_id) as job:
+        job["in_flight_shares"] = max(0, job["in_flight_shares"] - entry["shares"])
+        if ok:
+            job["slices_completed"] += 1
+            job["filled_shares"] += entry["shares"]
+            job["volume_usd"] = round(
+                job["volume_usd"] + float(res.get("maker_amount_usd") or 0) + float(res.get("taker_amount_usd") or 0), 2
+            )
+            job["_fill_ms"].append(entry["fill_ms"])
+            job["avg_fill_ms"] = int(sum(job["_fill_ms"]) / len(job["_fill_ms"]))
+            job["max_fill_ms"] = max(job["_fill_ms"])
+        else:
+            job["slices_failed"] += 1
+        job["slices"] = (job["slices"] + [entry])[-_RECENT_SLICES:]
+    if ok:
+        try:
+            record_round_trip(res, "slice", tr.get("stages_ms"))
+        except Exception as e:
+            logger.debug("trade_history append: %s", e)
+
+
+def _settle_stamped(pending: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """체결 대기 + 끝난 시각 기록 (수거는 다음 조각 전송 뒤라 그 시점으로 재면 체결 시간이 부풀려짐)."""
+    try:
+        with trade_trace.activate(entry.get("_trace")):
+            return _settle_wash_round(pending)
+    finally:
+        entry["_t1"] = time.monotonic()
+
+
+def _run_job(job_id: str, setup: Dict[str, Any], target: int, max_slice: int, stop: threading.Event) -> None:
+    """작업 본체 (백그라운드 스레드). 조각 k+1 전송을 조각 k 체결 대기와 겹쳐 실행."""
+    maker, taker = setup["maker_account"], setup["taker_account"]
+    topic_id, status, direction = setup["topic_id"], setup["status"], setup["direction"]
+    yes_token, no_token = status["yes_token_id"], status["no_token_id"]
+    maker_up = setup["maker_price"] if direction == "UP" else round(1.0 - setup["maker_price"], 2)
+    started = time.monotonic()
+
+    with account_locks(maker.id, taker.id):
+        _jobs.update(job_id, state="running")
+        # 잔고는 동시에 걸릴 수 있는 최대 2조각 분량만 미리 확인 (조각마다 잔고 조회하지 않음)
+        ok, err = _check_balance_for_wash_trade(
+            maker, taker, setup["maker_price"], setup["taker_price"], min(target, 2 * max_slice),
+        )
+        if not ok:
+            _jobs.update(job_id, state="failed", error=err, elapsed_ms=int((time.monotonic() - started) * 1000))
+            return
+
+        remaining = target
+        failures = 0
+        idx = 0
+        inflight = None  # (future, entry)
+        while True:
+            pending = None
+            entry = None
+            if remaining > 0 and failures < SLICE_MAX_CONSECUTIVE_FAILURES and not stop.is_set():
+                own = None
+                if inflight is not None:
+                    e = inflight[1]
+                    own = ("bids" if direction == "UP" else "asks", e["maker_price_up"], e["shares"])
+                # 조각마다 추적 1개 (전송은 이 스레드, 체결 대기는 slice-settle 스레드에서 이어 기록)
+                tr = trade_trace.start("slice")
+                t0 = time.monotonic()
+                with trade_trace.activate(tr):
+                    with trade_trace.span("quote"):
+                        quote_up, depth = _live_quote(topic_id, yes_token, own)
+                    if quote_up is not None:
+                        maker_up = quote_up
+                    shares = _slice_size(depth, remaining, max_slice)
+                    maker_price = maker_up if direction == "UP" else round(1.0 - maker_up, 2)
+                    idx += 1
+                    entry = {"index": idx, "shares": shares, "maker_price": maker_price,
+                             "maker_price_up": maker_up, "depth": round(depth, 2), "_t0": t0, "_trace": tr}
+                    remaining -= shares
+                    with _jobs.edit(job_id) as job:
+                        job["posted_shares"] += shares
+                        job["in_flight_shares"] += shares
+                    result, pending = _post_wash_round(
+                        topic_id, yes_token, no_token, maker, taker, direction, maker_price, shares,
+                        check_balance=False,
+                    )
+                if pending is None:
+                    # 전송 단계 실패 → 남은 목표로 되돌리고 다음 조각에서 재시도
+                    _record_slice(job_id, entry, result)
+                    if not (result.get("success") and result.get("round_trip_completed")):
+                        remaining += shares
+                        failures += 1
+                    entry = None
+
+            if inflight is not None:
+                res = inflight[0].result()
+                _record_slice(job_id, inflight[1], res)
+                if res.get("success") and res.get("round_trip_completed"):
+                    failures = 0
+                else:
+                    remaining += inflight[1]["shares"]
+                    failures += 1
+                inflight = None
+
+            if pending is not None:
+                inflight = (_settle_executor.submit(_settle_stamped, pending, entry), entry)
+                _jobs.update(job_id, remaining_shares=remaining, elapsed_ms=int((time.monotonic() - started) * 1000))
+                continue
+            _jobs.update(job_id, remaining_shares=remaining, elapsed_ms=int((time.monotonic() - started) * 1000))
+            if remaining <= 0 or failures >= SLICE_MAX_CONSECUTIVE_FAILURES or stop.is_set():
+                break
+
+    if stop.is_set():
+        state, error = "stopped", None
+    elif remaining > 0:
+        state, error = "failed", f"조각 {SLICE_MAX_CONSECUTIVE_FAILURES}회 연속 실패로 중단"
+    else:
+        state, error = "done", None
+    _jobs.update(job_id, state=state, error=error, remaining_shares=max(0, remaining),
+            elapsed_ms=int((time.monotonic() - started) * 1000))
+    from core.opinion_trade_status import trade_status_service
+    trade_status_service.invalidate(topic_id)
+    logger.info("분할 자전거래 %s 종료: %s", job_id, get_slice_job(job_id))
+
+
+def start_slice_job(
+    topic_id: Optional[int],
+    target_shares: int,
+    direction: Optional[str] = None,
+    maker_account_id: Optional[int] = None,
+    taker_account_id: Optional[int] = None,
+    max_slice_shares: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    분할 자전거래 작업 시작 (백그라운드). 즉시 반환.
+    Returns: {"success": True, "job_id", "job": 진행 상태} 또는 {"success": False, "error"}
+    """
+    target = min(int(target_shares), SLICE_MAX_TARGET_SHARES)
+    if target < 1:
+        return {"success": False, "error": "목표 수량은 1 이상이어야 합니다."}
+    max_slice = max(SLICE_MIN_SHARES, int(max_slice_shares or SLICE_MAX_SHARES))
+    setup, err = _resolve_trade_setup(topic_id, SLICE_MIN_SHARES, direction, maker_account_id, taker_account_id)
+    if err is not None:
+        return err
+
+    job_id, stop = _jobs.create({
+        # 계정 락 대기(waiting) → running → done / stopped / failed
+        "topic_id": setup["topic_id"],
+        "direction": setup["direction"],
+        "maker_account_id": setup["maker_account"].id,
+        "taker_account_id": setup["taker_account"].id,
+        "target_shares": target,
+        "max_slice_shares": max_slice,
+        "posted_shares": 0,
+        "filled_shares": 0,
+        "in_flight_shares": 0,
+        "remaining_shares": target,
+        "volume_usd": 0.0,
+        "slices_completed": 0,
+        "slices_failed": 0,
+        "avg_fill_ms": None,
+        "max_fill_ms": None,
+        "started_at": int(time.time()),
+        "elapsed_ms": 0,
+        "slices": [],
+        "_fill_ms": [],
+    })
+    _jobs.run(job_id, _run_job, job_id, setup, target, max_slice, stop)
+    return {"success": True, "job_id": job_id, "job": get_slice_job(job_id)}
+
+
+def get_slice_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """작업 진행 상태 (진행률 progress 0~1 포함). 없으면 None."""
+    out = _jobs.get(job_id)
+    if out is None:
+        return None
+    out["progress"] = round(out["filled_shares"] / out["target_shares"], 4) if out["target_shares"] else 0.0
+    return out
+
+
+def stop_slice_job(job_id: str) -> bool:
+    """작업 중지 요청. 새 조각은 보내지 않고, 체결 대기 중인 조각은 끝까지 처리한 뒤 stopped."""
+    return _jobs.stop(job_id)
+
+
+def list_slice_jobs() -> List[Dict[str, Any]]:
+    """보관 중인 작업 요약 (최근 조각 목록 제외)."""
+    out = []
+    for jid in _jobs.ids():
+        job = get_slice_job(jid)
+        if job:
+            job.pop("slices", None)
+            out.append(job)
+    return out
@@ -0,0 +1,204 @@
+"""
+수동 거래 상태 스냅샷 - topic별 get_1h_market_for_trade 결과를 입력이 바뀔 때만 다시 계산
+- 상태 API는 메모리 스냅샷만 읽음 (첫 요청만 동기 계산)
+- 입력 = WS 호가(opinion_ws_client 갱신 시각) + BTC 시세 스트림(갱신 시각). 백그라운드 스레드가
+  TRADE_STATUS_REFRESH_SEC마다 두 시각만 비교하고, 바뀐 topic만 재계산 (WS 호가가 살아 있으면 메모리 연산)
+- WS 호가가 끊겨 REST로 계산해야 하면 topic당 TRADE_STATUS_REST_REFRESH_SEC에 한 번만
+- 스냅샷은 수량과 무관 (topic당 1개). 수량별 미리보기(strategy_preview)는 읽을 때 계산
+- 자전거래 실행은 입력이 그대로이거나 max_age보다 젊은 스냅샷이면 재계산 없이 그대로 사용
+- 일정 시간 아무도 읽지 않은 topic은 갱신 대상에서 제외
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 입력(WS 호가·BTC 시세) 변경 확인 주기(초)
+TRADE_STATUS_REFRESH_SEC = getattr(Config, 'TRADE_STATUS_REFRESH_SEC', 0.25)
+# 실행 시 재사용 가능한 스냅샷 최대 나이(초, 입력이 바뀐 경우). 0이면 입력이 바뀌면 항상 재계산
+TRADE_STATUS_MAX_AGE_SEC = getattr(Config, 'TRADE_STATUS_MAX_AGE_SEC', 2.0)
+# WS 호가가 없을 때(REST 호가) topic당 재계산 최소 간격(초)
+TRADE_STATUS_REST_REFRESH_SEC = 5.0
+# 이 시간(초) 동안 읽히지 않은 topic은 갱신 중단·삭제
+TRADE_STATUS_IDLE_TTL_SEC = 60
+# 스냅샷 계산 기준 수량 (미리보기는 읽을 때 요청 수량으로 다시 계산)
+_BASE_SHARES = 10
+
+_Version = Tuple[Optional[float], Optional[float]]
+
+
+def _inputs_version(topic_id: Optional[int]) -> Optional[_Version]:
+    """
+    (WS 호가 갱신 시각, BTC 시세 갱신 시각). WS 호가가 없으면(구독 전·TTL 초과) None → 입력 변경을 알 수 없음.
+    """
+    if not topic_id:
+        return None
+    from core import opinion_ws_client
+    from core.btc_price import btc_price_service
+
+    book_ts = opinion_ws_client.get_orderbook_updated_at(topic_id)
+    if book_ts is None:
+        return None
+    try:
+        price_ts = btc_price_service.get_price_quote("BTC", allow_rest=False).get("updated_at")
+    except Exception:
+        price_ts = None
+    return book_ts, price_ts
+
+
+class TradeStatusService:
+    """topic_id(None=최신 1시간 마켓) → {"status", "version", "computed_at", "last_read_at"} 보관 + 변경 시 재계산."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[Optional[int], Dict[str, Any]] = {}
+        # topic별 계산 직렬화 (백그라운드 갱신과 첫 요청이 같은 topic을 동시에 계산하지 않도록)
+        self._compute_locks: Dict[Optional[int], threading.Lock] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _key(topic_id: Optional[int]) -> Optional[int]:
+        return int(topic_id) if topic_id else None
+
+    def _compute(self, key: Optional[int]) -> Dict[str, Any]:
+        from core.opinion_manual_trade import get_1h_market_for_trade
+
+        with self._lock:
+            lock = self._compute_locks.setdefault(key, threading.Lock())
+        with lock:
+            status = get_1h_market_for_trade(topic_id=key, skip_time_check=True, shares=_BASE_SHARES)
+            # 계산 직후 시각을 기록 (계산 중 입력이 바뀌었으면 다음 확인에서 다시 계산)
+            version = _inputs_version(status.get("topic_id"))
+            now = time.time()
+            with self._lock:
+                snap = self._snapshots.get(key)
+                last_read = snap["last_read_at"] if snap else now
+                self._snapshots[key] = {
+                    "status": status,
+                    "version": version,
+                    "computed_at": now,
+                    "last_read_at": last_read,
+                }
+            return status
+
+    @staticmethod
+    def _is_stale(snap: Dict[str, Any], now: float, max_age: Optional[float]) -> bool:
+        age = now - snap["computed_at"]
+        remaining = snap["status"].get("time_remaining")
+        if remaining is not None and remaining - age <= 0:
+            # 스냅샷 이후 시장이 끝났으면 재계산 (다음 구간으로 전환)
+            return True
+        if max_age is None or age <= max_age:
+            return False
+        version = snap["version"]
+        return version is None or _inputs_version(snap["status"].get("topic_id")) != version
+
+    def get(
+        self,
+        topic_id: Optional[int] = None,
+        shares: int = 10,
+        max_age: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        스냅샷 조회. 없거나, max_age(초)보다 오래됐고 그 사이 입력이 바뀌었으면 즉시 계산.
+        반환값은 얕은 복사본 + snapshot_age_ms (time_remaining은 스냅샷 이후 경과만큼 차감,
+        strategy_preview는 shares 기준으로 다시 계산). 중첩 dict는 스냅샷과 공유하므로 수정하지 말 것.
+        """
+        from core.opinion_manual_trade import preview_for_shares
+
+        key = self._key(topic_id)
+        self.start()
+        now = time.time()
+        with self._lock:
+            snap = self._snapshots.get(key)
+            if snap is not None:
+                snap["last_read_at"] = now
+        if snap is None or self._is_stale(snap, now, max_age):
+            status = self._compute(key)
+            age = 0.0
+        else:
+            status = snap["status"]
+            age = now - snap["computed_at"]
+        out = dict(status)
+        out["snapshot_age_ms"] = int(age * 1000)
+        if out.get("time_remaining") is not None:
+            out["time_remaining"] = max(0, int(out["time_remaining"] - age))
+        shares = max(1, min(1000, int(shares)))
+        if shares != _BASE_SHARES and out.get("strategy_preview"):
+            out["strategy_preview"] = preview_for_shares(out, shares)
+        return out
+
+    def invalidate(self, topic_id: Optional[int] = None) -> None:
+        """거래 실행 직후 등: 해당 topic(없으면 전체) 스냅샷 폐기 → 다음 조회에서 재계산."""
+        with self._lock:
+            for key in [
+                k for k, v in self._snapshots.items()
+                if topic_id is None or k == topic_id or v["status"].get("topic_id") == topic_id
+            ]:
+                self._snapshots.pop(key, None)
+
+    def start(self) -> None:
+        """백그라운드 갱신 스레드 시작. 이미 동작 중이면 무시."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="trade-status")
+            self._thread.start()
+        logger.info("거래 상태 스냅샷 갱신 시작 (입력 변경 확인 %.2fs 주기)", TRADE_STATUS_REFRESH_SEC)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _needs_refresh(self, snap: Dict[str, Any], now: float) -> bool:
+        """입력(WS 호가·시세)이 바뀌었거나 시장이 끝났거나, WS 호가 없이 REST 재계산 간격이 지났으면 True."""
+        age = now - snap["computed_at"]
+        remaining = snap["status"].get("time_remaining")
+        if remaining is not None and remaining - age <= 0:
+            return True
+        version = _inputs_version(snap["status"].get("topic_id"))
+        if version is None or snap["version"] is None:
+            return age >= TRADE_STATUS_REST_REFRESH_SEC
+        return version != snap["version"]
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                for key in [k for k, v in self._snapshots.items() if now - v["last_read_at"] > TRADE_STATUS_IDLE_TTL_SEC]:
+                    self._snapshots.pop(key, None)
+                    self._compute_locks.pop(key, None)
+                snaps = list(self._snapshots.items())
+            for key, snap in snaps:
+                try:
+                    if self._needs_refresh(snap, now):
+                        self._compute(key)
+                except Exception as e:
+                    logger.debug("거래 상태 갱신 실패 %s: %s", key, e)
+            self._stop.wait(TRADE_STATUS_REFRESH_SEC)
+
+    def status(self) -> Dict[str, Any]:
+        """디버깅용: topic별 스냅샷 나이."""
+        now = time.time()
+        with self._lock:
+            return {
+                str(k or "latest"): {
+                    "age_ms": int((now - v["computed_at"]) * 1000),
+                    "success": bool(v["status"].get("success")),
+                    "ws_inputs": v["version"] is not None,
+                }
+                for k, v in self._snapshots.items()
+            }
+
+
+trade_status_service = TradeStatusService()
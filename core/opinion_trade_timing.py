@@ -0,0 +1,132 @@
+"""
+자전거래 적응형 타이밍 - 최근 왕복의 관측 지연으로 Maker 직후 대기·체결 폴링 일정·미체결 timeout을 정함
+- 표본 1: Maker 접수 응답 → 사용자 채널에 Maker 주문 첫 이벤트 (호가 반영 추정, WS 이벤트만 사용)
+- 표본 2: Taker 접수 응답 → 양쪽 전량 체결 확인
+- Maker 대기 = p95(표본 1) × 여유배수, 체결 대기 timeout = p99(표본 2) × 2 × 여유배수,
+  첫 폴링 = p50(표본 2), 이후 POLL_BACKOFF배씩 늘림 (처음엔 촘촘히, 점점 드물게)
+- 모든 값은 설정값(POST_MAKER_DELAY_SEC / WASH_TRADE_POLL_*)을 넘지 않음 → 설정값은 상한,
+  표본이 ADAPTIVE_TIMING_MIN_SAMPLES 미만이면 설정값 그대로
+- 미체결(취소) 1건마다 여유배수 ×1.5 (최대 4), 체결마다 조금씩 1로 복귀.
+  최근 미체결 비율이 ADAPTIVE_TIMING_MAX_UNFILLED_RATE를 넘으면 설정값으로 되돌림
+"""
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ADAPTIVE_TIMING_ENABLED = getattr(Config, 'ADAPTIVE_TIMING_ENABLED', True)
+ADAPTIVE_TIMING_MIN_SAMPLES = getattr(Config, 'ADAPTIVE_TIMING_MIN_SAMPLES', 20)
+ADAPTIVE_TIMING_MAX_UNFILLED_RATE = getattr(Config, 'ADAPTIVE_TIMING_MAX_UNFILLED_RATE', 0.05)
+ADAPTIVE_MIN_DELAY_SEC = 0.05
+ADAPTIVE_MIN_TIMEOUT_SEC = 3.0
+ADAPTIVE_MIN_POLL_SEC = 0.1
+_WINDOW = 200
+_OUTCOME_WINDOW = 50
+_MARGIN_MAX = 4.0
+
+
+def _pct(values, q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+class TradeTiming:
+    """최근 왕복 관측 → 대기·폴링·timeout 계산. 여러 스레드(다중 페어·분할 실행)에서 동시에 호출."""
+
+    def __init__(self):
+        self._visible = deque(maxlen=_WINDOW)   # Maker 접수 → 첫 이벤트 (초)
+        self._fill = deque(maxlen=_WINDOW)      # Taker 접수 → 양쪽 체결 (초)
+        self._outcomes = deque(maxlen=_OUTCOME_WINDOW)  # True=체결, False=미체결 취소
+        self._margin = 1.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _static() -> Dict[str, float]:
+        return {
+            "delay": float(getattr(Config, 'POST_MAKER_DELAY_SEC', 0.2)),
+            "interval": float(getattr(Config, 'WASH_TRADE_POLL_INTERVAL_SEC', 0.4)),
+            "timeout": float(getattr(Config, 'WASH_TRADE_POLL_TIMEOUT_SEC', 10)),
+        }
+
+    def _unfilled_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for ok in self._outcomes if not ok) / len(self._outcomes)
+
+    def _adaptive_ok(self) -> bool:
+        return ADAPTIVE_TIMING_ENABLED and self._unfilled_rate() <= ADAPTIVE_TIMING_MAX_UNFILLED_RATE
+
+    def post_maker_delay(self) -> float:
+        """Maker 접수 후 Taker 전송 전 대기(초)."""
+        static = self._static()["delay"]
+        with self._lock:
+            if not self._adaptive_ok() or len(self._visible) < ADAPTIVE_TIMING_MIN_SAMPLES:
+                return static
+            learned = _pct(self._visible, 0.95) * 1.2 * self._margin
+        return min(static, max(ADAPTIVE_MIN_DELAY_SEC, learned))
+
+    def poll_schedule(self) -> Dict[str, float]:
+        """체결 대기 일정: timeout(미체결 취소까지), first_poll(첫 REST 조회), max_interval(백오프 상한)."""
+        static = self._static()
+        with self._lock:
+            if not self._adaptive_ok() or len(self._fill) < ADAPTIVE_TIMING_MIN_SAMPLES:
+                return {"timeout": static["timeout"], "first_poll": None, "max_interval": None, "adaptive": False}
+            p50, p99 = _pct(self._fill, 0.50), _pct(self._fill, 0.99)
+            margin = self._margin
+        timeout = min(static["timeout"], max(ADAPTIVE_MIN_TIMEOUT_SEC, p99 * 2 * margin))
+        first_poll = min(static["interval"], max(ADAPTIVE_MIN_POLL_SEC, p50))
+        return {
+            "timeout": round(timeout, 3),
+            "first_poll": round(first_poll, 3),
+            # 백오프 상한: timeout 안에 최소 몇 번은 조회하도록
+            "max_interval": round(max(first_poll, timeout / 4), 3),
+            "adaptive": True,
+        }
+
+    def observe(self, maker_visible_sec: Optional[float], fill_sec: Optional[float], filled: bool) -> None:
+        """왕복 1회 결과 반영. 지연 표본은 관측된 것만 (None이면 생략)."""
+        with self._lock:
+            if maker_visible_sec is not None and maker_visible_sec >= 0:
+                self._visible.append(maker_visible_sec)
+            if filled and fill_sec is not None and fill_sec >= 0:
+                self._fill.append(fill_sec)
+            self._outcomes.append(bool(filled))
+            if filled:
+                self._margin = max(1.0, self._margin * 0.97)
+            else:
+                self._margin = min(_MARGIN_MAX, self._margin * 1.5)
+                logger.info("자전거래 미체결 → 적응형 타이밍 여유배수 %.2f", self._margin)
+
+    def status(self) -> Dict[str, Any]:
+        """디버깅·지연 요약용 현재 상태."""
+        with self._lock:
+            visible = list(self._visible)
+            fill = list(self._fill)
+            margin = self._margin
+            unfilled = self._unfilled_rate()
+            outcomes = len(self._outcomes)
+
+        def _q(v):
+            if not v:
+                return None
+            return {"n": len(v), "p50_ms": int(_pct(v, 0.5) * 1000), "p95_ms": int(_pct(v, 0.95) * 1000),
+                    "p99_ms": int(_pct(v, 0.99) * 1000)}
+
+        return {
+            "enabled": ADAPTIVE_TIMING_ENABLED,
+            "margin": round(margin, 2),
+            "unfilled_rate": round(unfilled, 3),
+            "outcomes": outcomes,
+            "maker_visible": _q(visible),
+            "taker_fill": _q(fill),
+            "post_maker_delay_sec": round(self.post_maker_delay(), 3),
+            "poll": self.poll_schedule(),
+            "static": self._static(),
+        }
+
+
+trade_timing = TradeTiming()
@@ -7,18 +7,21 @@ Opinion.trade WebSocket 클라이언트 — 오더북 실시간 구독 (market_i
 - _orderbook_state: REST 스냅샷 초기화 후 depth.diff를 누적 적용한 전체 오더북 상태
   get_best_ask_from_ws() / get_full_orderbook_snapshot()으로 조회.
 - _orderbook_state_ts: 오더북 상태 마지막 갱신 타임스탬프. TTL 초과 시 REST 폴백.
+- 사용자 채널(trade.order.update / trade.record.new)은 API 키별 연결이라 키마다 별도 스레드
+  (subscribe_user_orders). 수신 이벤트는 opinion_order_events로 전달 → 자전거래 체결 감지.
 """
 import asyncio
 import json
 import logging
+import os
 import threading
 import time
 from typing import Any, Dict, Optional, Set
 
 logger = logging.getLogger(__name__)
 
-# WS 기본 URL (프록시는 REST용; WS는 공식 엔드포인트 사용)
-OPINION_WS_BASE = "wss://ws.opinion.trade"
+# WS 기본 URL (프록시는 REST용; WS는 공식 엔드포인트 사용). 로컬 대역 서버 사용 시 OPINION_WS_BASE로 변경
+OPINION_WS_BASE = (os.getenv("OPINION_WS_BASE") or "").strip() or "wss://ws.opinion.trade"
 HEARTBEAT_INTERVAL = 30
 RECONNECT_DELAY = 5
 
@@ -43,6 +46,13 @@ _ws_stop = threading.Event()
 _ws_thread: Optional[threading.Thread] = None
 _loop: Optional[asyncio.AbstractEventLoop] = None
 
+# 사용자 채널: api_key → 구독 market_id / 연결 후 보낼 대기열 / 스레드 / 연결 여부
+USER_CHANNELS = ("trade.order.update", "trade.record.new")
+_user_markets: Dict[str, Set[int]] = {}
+_user_pending: Dict[str, Set[int]] = {}
+_user_threads: Dict[str, threading.Thread] = {}
+_user_connected: Dict[str, bool] = {}
+
 
 def _parse_levels(levels_raw: Any) -> Dict[str, float]:
     """
@@ -232,7 +242,10 @@ async def _opinion_ws_loop(api_key: str):
                         data = json.loads(raw)
                         msg_type = (data.get("msgType") or data.get("type") or "").strip()
                         market_id = data.get("marketId")
-                        if market_id is not None and (
+                        if msg_type in USER_CHANNELS:
+                            from core.opinion_order_events import handle_ws_message
+                            handle_ws_message(data)
+                        elif market_id is not None and (
                             "depth" in msg_type.lower() or "orderbook" in msg_type.lower()
                         ):
                             with _cache_lock:
@@ -252,6 +265,106 @@ async def _opinion_ws_loop(api_key: str):
         last_heartbeat = 0.0
 
 
+def _run_user_ws_loop(api_key: str):
+    """사용자 채널 전용 스레드의 asyncio 루프."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_until_complete(_user_ws_loop(api_key))
+    except Exception as e:
+        logger.exception("Opinion user WS loop exited: %s", e)
+    finally:
+        with _cache_lock:
+            _user_connected[api_key] = False
+        loop.close()
+
+
+async def _user_ws_loop(api_key: str):
+    """API 키 하나의 주문/체결 이벤트 수신. 재연결 시 구독 복원, HEARTBEAT 유지."""
+    try:
+        import websockets
+    except ImportError:
+        logger.warning("websockets 미설치. 주문 이벤트 대신 폴링으로 체결 확인.")
+        return
+    from core.opinion_order_events import handle_ws_message
+
+    url = f"{OPINION_WS_BASE}?apikey={api_key}"
+    while not _ws_stop.is_set():
+        last_heartbeat = 0.0
+        try:
+            async with websockets.connect(url, ping_interval=25, ping_timeout=10, close_timeout=5) as ws:
+                with _cache_lock:
+                    ids = list(_user_markets.get(api_key) or [])
+                    _user_pending.setdefault(api_key, set()).clear()
+                for mid in ids:
+                    for ch in USER_CHANNELS:
+                        await ws.send(json.dumps({"action": "SUBSCRIBE", "channel": ch, "marketId": mid}))
+                with _cache_lock:
+                    _user_connected[api_key] = True
+                logger.info("Opinion 사용자 채널 연결됨 (key=...%s, markets=%s)", api_key[-4:], ids)
+                while not _ws_stop.is_set():
+                    with _cache_lock:
+                        to_sub = list(_user_pending.get(api_key) or [])
+                        _user_pending.setdefault(api_key, set()).clear()
+                    for mid in to_sub:
+                        for ch in USER_CHANNELS:
+                            await ws.send(json.dumps({"action": "SUBSCRIBE", "channel": ch, "marketId": mid}))
+                    now = time.monotonic()
+                    if now - last_heartbeat >= HEARTBEAT_INTERVAL:
+                        await ws.send(json.dumps({"action": "HEARTBEAT"}))
+                        last_heartbeat = now
+                    try:
+                        # 새 구독을 빨리 보내도록 짧게 대기
+                        raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    try:
+                        handle_ws_message(json.loads(raw))
+                    except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+                        pass
+        except Exception as e:
+            if not _ws_stop.is_set():
+                logger.warning("Opinion 사용자 채널 끊김, %s초 후 재연결: %s", RECONNECT_DELAY, e)
+        with _cache_lock:
+            _user_connected[api_key] = False
+        if not _ws_stop.is_set():
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+def subscribe_user_orders(api_key: str, market_id: int) -> None:
+    """
+    API 키 계정의 주문/체결 이벤트 구독 (market_id 단위). 키별 연결 스레드가 없으면 시작.
+    이미 연결돼 있으면 즉시 SUBSCRIBE 전송.
+    """
+    key = (api_key or "").strip()
+    if not key:
+        return
+    mid = int(market_id)
+    with _cache_lock:
+        markets = _user_markets.setdefault(key, set())
+        if mid not in markets:
+            markets.add(mid)
+            _user_pending.setdefault(key, set()).add(mid)
+        t = _user_threads.get(key)
+        if t is not None and t.is_alive():
+            return
+        _ws_stop.clear()
+        t = threading.Thread(
+            target=_run_user_ws_loop,
+            args=(key,),
+            daemon=True,
+            name=f"opinion-ws-user-{len(_user_threads) + 1}",
+        )
+        _user_threads[key] = t
+    t.start()
+
+
+def is_user_stream_connected(api_key: str) -> bool:
+    """해당 API 키 사용자 채널이 지금 연결돼 있는지 (체결 감지 폴링 간격 결정용)."""
+    with _cache_lock:
+        return bool(_user_connected.get((api_key or "").strip()))
+
+
 def start_ws(api_key: str) -> None:
     """WebSocket 스레드 시작. 이미 동작 중이면 무시."""
     global _ws_thread
@@ -286,6 +399,12 @@ def stop_ws() -> None:
         _orderbook_state.clear()
         _orderbook_state_ts.clear()
         _market_token_ids.clear()
+        user_threads = list(_user_threads.values())
+        _user_threads.clear()
+        _user_markets.clear()
+        _user_pending.clear()
+    for t in user_threads:
+        t.join(timeout=RECONNECT_DELAY + 5)
     logger.info("Opinion WS 스레드 정지됨.")
 
 
@@ -381,6 +500,19 @@ def get_best_ask_from_ws(market_id: int) -> Optional[float]:
         return None
 
 
+def get_orderbook_updated_at(market_id: int) -> Optional[float]:
+    """
+    WS 누적 오더북 상태 마지막 갱신 시각 (time.monotonic()). 변경 감지용 (값이 바뀌면 호가가 바뀐 것).
+    상태가 없거나 TTL 초과(WS_ORDERBOOK_STATE_TTL 초)면 None → 호출 측은 WS 호가를 믿지 않음.
+    """
+    mid = int(market_id)
+    with _cache_lock:
+        ts = _orderbook_state_ts.get(mid) if _orderbook_state.get(mid) else None
+    if ts is None or time.monotonic() - ts > WS_ORDERBOOK_STATE_TTL:
+        return None
+    return ts
+
+
 def get_full_orderbook_snapshot(market_id: int) -> Optional[Dict[str, Any]]:
     """
     WS 누적 오더북 상태를 REST get_orderbook() 응답과 동일한 구조로 반환.
@@ -5,14 +5,18 @@ data/trade_history.json에 append, Overall·직전 거래 표시용.
 import json
 import logging
 import os
+import threading
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
 _DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 _HISTORY_FILE = _DATA_DIR / "trade_history.json"
 _MAX_RECORDS = 500
+# 다중 페어 자전거래 등 여러 스레드가 동시에 기록할 때 읽기-수정-쓰기 충돌 방지
+_write_lock = threading.Lock()
 
 
 def _ensure_dir() -> None:
@@ -23,20 +27,43 @@ def append_trade(record: Dict[str, Any]) -> None:
     """거래 1건 추가. record: ts, direction, shares, maker_amount_usd, taker_amount_usd, success, source, ..."""
     _ensure_dir()
     record = {k: v for k, v in record.items() if v is not None or k in ("maker_order_id", "taker_order_id", "error")}
-    try:
-        existing: List[Dict] = []
-        if _HISTORY_FILE.exists():
-            with open(_HISTORY_FILE, "r", encoding="utf-8") as f:
-                raw = f.read().strip()
-                if raw:
-                    existing = json.loads(raw)
-        existing.append(record)
-        if len(existing) > _MAX_RECORDS:
-            existing = existing[-_MAX_RECORDS:]
-        with open(_HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(existing, f, ensure_ascii=False, indent=0)
-    except Exception as e:
-        logger.warning("trade_history append failed: %s", e)
+    with _write_lock:
+        try:
+            existing: List[Dict] = []
+            if _HISTORY_FILE.exists():
+                with open(_HISTORY_FILE, "r", encoding="utf-8") as f:
+                    raw = f.read().strip()
+                    if raw:
+                        existing = json.loads(raw)
+            existing.append(record)
+            if len(existing) > _MAX_RECORDS:
+                existing = existing[-_MAX_RECORDS:]
+            with open(_HISTORY_FILE, "w", encoding="utf-8") as f:
+                json.dump(existing, f, ensure_ascii=False, indent=0)
+        except Exception as e:
+            logger.warning("trade_history append failed: %s", e)
+
+
+def record_round_trip(res: Dict[str, Any], source: str, stages_ms: Optional[Dict[str, Any]] = None) -> None:
+    """
+    자전 완료(양쪽 체결)된 execute 결과 1건 기록. source: manual|auto|multi|slice.
+    stages_ms를 주지 않으면 결과의 trace에서 가져옴.
+    """
+    if stages_ms is None:
+        stages_ms = (res.get("trace") or {}).get("stages_ms")
+    append_trade({
+        "ts": int(time.time()),
+        "direction": res.get("direction"),
+        "shares": res.get("shares"),
+        "maker_amount_usd": res.get("maker_amount_usd"),
+        "taker_amount_usd": res.get("taker_amount_usd"),
+        "maker_order_id": res.get("maker_order_id"),
+        "taker_order_id": res.get("taker_order_id"),
+        "success": True,
+        "round_trip_completed": True,
+        "source": source,
+        "stages_ms": stages_ms,
+    })
 
 
 def get_trade_history(limit: int = 50) -> Dict[str, Any]:
@@ -0,0 +1,209 @@
+"""
+거래 파이프라인 지연 추적 - 수동·자동·다중 페어·분할 자전거래 1회를 단계별 구간(span)으로 기록
+- trace(kind): 거래 1회 추적 (contextvars → 같은 스레드 안의 span()이 자동으로 붙음).
+  스레드를 넘나드는 거래는 start() → activate(tr) → finish(tr)
+- span(name): 구간 측정. 중첩 시 이름이 "부모.자식" (예: maker_send.sign_send, wait_fill.poll)
+- bind(fn): 다른 스레드(executor)에서 실행할 함수에 현재 추적을 넘김 (Taker 사전 서명 등)
+- 끝난 추적은 최근 TRADE_TRACE_RECENT_MAX건을 메모리에 보관 (실패 거래 포함),
+  체결된 거래는 trade_history 기록에 stages_ms로도 저장 → summarize()로 단계별 p50/p95/p99
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRADE_TRACE_RECENT_MAX = int(os.getenv("TRADE_TRACE_RECENT_MAX", "500").strip() or "500")
+
+_current: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("trade_trace", default=None)
+_parent: contextvars.ContextVar[str] = contextvars.ContextVar("trade_trace_parent", default="")
+_recent: deque = deque(maxlen=max(10, TRADE_TRACE_RECENT_MAX))
+_recent_lock = threading.Lock()
+
+
+class Trace:
+    """거래 1회 추적. span은 여러 스레드에서 추가될 수 있어 락으로 보호."""
+
+    def __init__(self, kind: str):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.started_at = time.time()
+        self._t0 = time.monotonic()
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.total_ms: Optional[int] = None
+        self.outcome: Optional[str] = None
+
+    def add(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self._spans.append({
+                "name": name,
+                "start_ms": int((start - self._t0) * 1000),
+                "ms": round((end - start) * 1000, 1),
+            })
+
+    def stages_ms(self) -> Dict[str, float]:
+        """단계별 합계(ms). 같은 이름이 여러 번(폴링 반복 등)이면 합산."""
+        out: Dict[str, float] = {}
+        with self._lock:
+            for s in self._spans:
+                out[s["name"]] = round(out.get(s["name"], 0.0) + s["ms"], 1)
+        if self.total_ms is not None:
+            out["total"] = float(self.total_ms)
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self._spans, key=lambda s: s["start_ms"])
+        return {
+            "trace_id": self.trace_id,
+            "kind": self.kind,
+            "outcome": self.outcome,
+            "total_ms": self.total_ms,
+            "stages_ms": self.stages_ms(),
+            "spans": spans,
+        }
+
+
+def start(kind: str) -> Trace:
+    """추적 생성 (활성화는 activate/trace). 여러 스레드에 걸친 거래용."""
+    return Trace(kind)
+
+
+def finish(tr: Trace, outcome: Optional[str] = None) -> Dict[str, Any]:
+    """추적 종료: 총 시간 기록 + 최근 목록에 보관. Returns: to_dict() (거래 결과에 붙일 값)."""
+    if tr.total_ms is None:
+        tr.total_ms = int((time.monotonic() - tr._t0) * 1000)
+        if outcome is not None:
+            tr.outcome = outcome
+        with _recent_lock:
+            _recent.append({"ts": int(tr.started_at), "kind": tr.kind, "outcome": tr.outcome, "stages_ms": tr.stages_ms()})
+    return tr.to_dict()
+
+
+@contextmanager
+def activate(tr: Optional[Trace]) -> Iterator[None]:
+    """추적을 현재 스레드에서 활성화 (span()이 여기에 붙음). tr이 None이면 아무것도 하지 않음."""
+    if tr is None:
+        yield
+        return
+    token = _current.set(tr)
+    parent_token = _parent.set("")
+    try:
+        yield
+    finally:
+        _parent.reset(parent_token)
+        _current.reset(token)
+
+
+@contextmanager
+def trace(kind: str) -> Iterator[Trace]:
+    """거래 1회 추적 (같은 스레드). 블록을 벗어나면 finish. outcome은 블록 안에서 tr.outcome에 지정."""
+    tr = start(kind)
+    try:
+        with activate(tr):
+            yield tr
+    finally:
+        finish(tr)
+
+
+def current() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """구간 측정. 추적 중이 아니면 아무것도 하지 않음 (호출 측은 항상 감싸도 됨)."""
+    tr = _current.get()
+    if tr is None:
+        yield
+        return
+    parent = _parent.get()
+    full = f"{parent}.{name}" if parent else name
+    token = _parent.set(full)
+    t_start = time.monotonic()
+    try:
+        yield
+    finally:
+        tr.add(full, t_start, time.monotonic())
+        _parent.reset(token)
+
+
+def bind(fn: Callable[..., Any], span_name: Optional[str] = None) -> Callable[..., Any]:
+    """
+    현재 추적·부모 구간을 유지한 채 다른 스레드에서 fn 실행 (executor.submit(bind(fn, "taker_prepare"), ...)).
+    span_name을 주면 fn 실행 전체를 그 이름의 구간으로 기록.
+    """
+    ctx = contextvars.copy_context()
+
+    def _run(*args, **kwargs):
+        if span_name is None:
+            return fn(*args, **kwargs)
+        with span(span_name):
+            return fn(*args, **kwargs)
+
+    return lambda *args, **kwargs: ctx.run(_run, *args, **kwargs)
+
+
+def _pct(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """records[*]["stages_ms"] → 단계별 {n, p50, p95, p99, max} (ms)."""
+    by_stage: Dict[str, List[float]] = {}
+    count = 0
+    for r in records:
+        stages = r.get("stages_ms")
+        if not isinstance(stages, dict):
+            continue
+        count += 1
+        for name, ms in stages.items():
+            try:
+                by_stage.setdefault(name, []).append(float(ms))
+            except (TypeError, ValueError):
+                continue
+    return {
+        "count": count,
+        "stages": {
+            name: {
+                "n": len(v),
+                "p50": round(_pct(v, 0.50), 1),
+                "p95": round(_pct(v, 0.95), 1),
+                "p99": round(_pct(v, 0.99), 1),
+                "max": round(max(v), 1),
+            }
+            for name, v in sorted(by_stage.items())
+        },
+    }
+
+
+def get_summary(limit: int = 200, source: str = "recent", kind: Optional[str] = None) -> Dict[str, Any]:
+    """
+    최근 거래 단계별 지연 요약.
+    source="recent": 메모리의 최근 추적 (실패·미체결 포함, 재시작 시 비어 있음)
+    source="history": trade_history 기록 (체결된 거래만, 재시작 후에도 유지)
+    """
+    if source == "history":
+        from core.trade_history import get_trade_history
+        records = get_trade_history(limit=limit).get("trades") or []
+    else:
+        with _recent_lock:
+            records = list(_recent)[-limit:]
+    if kind:
+        records = [r for r in records if (r.get("kind") or r.get("source")) == kind]
+    out = summarize(records)
+    out["source"] = source
+    out["outcomes"] = {}
+    for r in records:
+        o = r.get("outcome") or ("filled" if r.get("round_trip_completed") else None)
+        if o:
+            out["outcomes"][o] = out["outcomes"].get(o, 0) + 1
+    return out
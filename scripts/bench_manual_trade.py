@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+수동 자전거래 종단 간 벤치/스트레스 - scripts/local_clob.py 대역 서버를 같은 프로세스에 띄우고
+execute_manual_trade()를 반복 실행해 지연 분포(p50/p95/max)와 성공률·처리량을 출력.
+
+- 네트워크 없이 동작: OPINION_API_BASE / OPINION_CLOB_HOST / OPINION_WS_BASE를 대역 서버로 바꾸고
+  테스트용 계정 2개(가짜 API 키·PK)를 환경변수로 넣은 뒤 앱 모듈을 import
+- 잔고 조회(BSC/OKX)는 SKIP_BALANCE_CHECK=1로 생략, USDT 승인은 승인 캐시에 미리 표시 (BSC RPC 호출 없음)
+- opinion-clob-sdk(및 web3)가 설치돼 있어야 주문 경로가 실제 SDK 서명 코드를 탐
+
+사용:
+  python3 scripts/bench_manual_trade.py [--rounds 20] [--concurrency 1] [--shares 10]
+      [--latency-ms 30] [--jitter-ms 20] [--fail-rate 0.05] [--ws-latency-ms 0] [--drop-user-events]
+  이미 띄운 대역 서버 사용: --external http://127.0.0.1:8765 --external-ws ws://127.0.0.1:8766
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+sys.path.insert(0, str(root / "scripts"))
+os.chdir(root)
+
+# 테스트 전용 계정 (대역 서버는 서명을 검증하지 않음)
+_TEST_ACCOUNTS = {
+    1: ("0x" + "11" * 32, "local-key-1"),
+    2: ("0x" + "22" * 32, "local-key-2"),
+}
+
+
+def _set_env(env: dict) -> None:
+    for k, v in env.items():
+        os.environ[k] = v
+    os.environ["SKIP_BALANCE_CHECK"] = "1"
+    for aid, (pk, api_key) in _TEST_ACCOUNTS.items():
+        os.environ[f"OPINION_API_KEY_{aid}"] = api_key
+        os.environ[f"OPINION_CLOB_PK_{aid}"] = pk
+        os.environ[f"OPINION_EOA_{aid}"] = "0x" + f"{aid:02d}" * 20
+        os.environ[f"OPINION_MULTISIG_{aid}"] = "0x" + f"{aid:02d}" * 20
+        os.environ[f"OPINION_PROXY_{aid}"] = ""
+    os.environ["OPINION_API_KEY"] = _TEST_ACCOUNTS[1][1]
+    os.environ["OPINION_DEFAULT_EOA"] = os.environ["OPINION_EOA_1"]
+    os.environ["OPINION_PROXY"] = ""
+
+
+def _pct(values, q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(round(q * (len(s) - 1))))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="수동 자전거래 로컬 벤치")
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--concurrency", type=int, default=1, help="동시 실행 수 (스트레스)")
+    ap.add_argument("--shares", type=int, default=10)
+    ap.add_argument("--port", type=int, default=18765)
+    ap.add_argument("--ws-port", type=int, default=18766)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--fail-mode", choices=("http500", "errno", "timeout"), default="http500")
+    ap.add_argument("--ws-latency-ms", type=float, default=0.0)
+    ap.add_argument("--drop-user-events", action="store_true")
+    ap.add_argument("--external", default="", help="이미 실행 중인 대역 서버 HTTP 주소")
+    ap.add_argument("--external-ws", default="", help="이미 실행 중인 대역 서버 WS 주소")
+    args = ap.parse_args()
+
+    if args.external:
+        base = args.external.rstrip("/")
+        env = {
+            "OPINION_API_BASE": f"{base}/openapi",
+            "OPINION_CLOB_HOST": base,
+            "OPINION_WS_BASE": args.external_ws or base.replace("http", "ws", 1),
+        }
+    else:
+        import local_clob
+
+        local_clob.set_faults(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            fail_rate=args.fail_rate,
+            fail_mode=args.fail_mode,
+            ws_latency_ms=args.ws_latency_ms,
+            drop_user_events=args.drop_user_events,
+        )
+        env = local_clob.start_in_background(port=args.port, ws_port=args.ws_port)
+        time.sleep(1.0)
+    _set_env(env)
+
+    # 환경변수 설정 후 앱 모듈 import (모듈 상수가 import 시점에 읽힘)
+    from core import opinion_ws_client
+    from core.opinion_account import opinion_account_manager
+    from core.opinion_clob_order import _mark_approval
+    from core.opinion_manual_trade import execute_manual_trade
+    from core.opinion_market_catalog import market_catalog
+    from core.opinion_order_events import get_stats
+    from core.opinion_trade_status import trade_status_service
+
+    accounts = opinion_account_manager.get_all()
+    if len(accounts) < 2:
+        print("계정 2개가 필요합니다 (opinion_accounts.json이 환경변수 계정을 덮어쓰는지 확인).")
+        sys.exit(1)
+    for acc in accounts:
+        # 대역 서버는 체인이 없으므로 승인 완료로 표시 → 주문 경로에서 enable_trading() 생략
+        _mark_approval(acc, True)
+    opinion_ws_client.start_ws(os.environ["OPINION_API_KEY"])
+    market_catalog.start()
+    market_catalog.refresh()
+    status = trade_status_service.get(None, args.shares)
+    if not status.get("success"):
+        print("시장 상태 조회 실패:", status.get("error"))
+        sys.exit(1)
+    topic_id = status["topic_id"]
+    print(f"topic_id={topic_id} maker_price={status.get('maker_price')} env={env}")
+
+    latencies = []
+    outcomes = {"ok": 0, "fail": 0}
+    errors = {}
+    lock = threading.Lock()
+
+    def _one(i: int) -> None:
+        t0 = time.perf_counter()
+        try:
+            res = execute_manual_trade(topic_id=topic_id, shares=args.shares)
+        except Exception as e:
+            res = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        ms = (time.perf_counter() - t0) * 1000
+        with lock:
+            latencies.append(ms)
+            if res.get("success") and res.get("round_trip_completed", True):
+                outcomes["ok"] += 1
+            else:
+                outcomes["fail"] += 1
+                key = str(res.get("error") or "unknown")[:80]
+                errors[key] = errors.get(key, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex:
+        list(ex.map(_one, range(args.rounds)))
+    elapsed = time.perf_counter() - started
+
+    print("")
+    print(f"rounds={args.rounds} concurrency={args.concurrency} elapsed={elapsed:.2f}s "
+          f"throughput={args.rounds / elapsed if elapsed else 0:.2f}/s")
+    print(f"success={outcomes['ok']} fail={outcomes['fail']}")
+    if latencies:
+        print(f"latency ms: p50={_pct(latencies, 0.5):.1f} p95={_pct(latencies, 0.95):.1f} "
+              f"max={max(latencies):.1f} mean={statistics.mean(latencies):.1f}")
+    print("order events:", get_stats())
+    for err, n in sorted(errors.items(), key=lambda kv: -kv[1]):
+        print(f"  {n}× {err}")
+
+
+if __name__ == "__main__":
+    main()
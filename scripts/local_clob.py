@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+"""
+로컬 CLOB 대역(stand-in) 서버 - 네트워크 없이 수동 자전거래 지연·처리량을 재기 위한 가짜 Opinion
+
+- Opinion OpenAPI(/openapi/market, /token/orderbook, /quoteToken ...)와
+  CLOB SDK가 쓰는 주문 엔드포인트(/openapi/order, /order/cancel, /order/{id})를 흉내 냄
+- 메모리 가격-시간 우선 매칭 엔진. 이진 시장이라 YES 기준 단일 호가창으로 매칭:
+  BUY YES@p = 매수호가 p, BUY NO@q = 매도호가 1-q (SELL은 반대). MARKET 주문은 남은 수량 취소(IOC)
+- 지연·실패 주입: --latency-ms / --jitter-ms / --fail-rate / --fail-mode (http500 | errno | timeout),
+  실행 중 변경은 POST /_admin/faults
+- WS(--ws-port): market.depth.diff(YES 호가 변경분) + 사용자 채널(trade.order.update / trade.record.new, API 키별)
+- 시작 시 BTC Up/Down 현재·다음 구간 시장 생성, 현재 구간에 유동성 사다리 배치 (--no-seed로 끔)
+
+사용:
+  python3 scripts/local_clob.py --port 8765 --ws-port 8766 --latency-ms 30
+  앱/벤치 쪽 환경변수:
+    OPINION_API_BASE=http://127.0.0.1:8765/openapi
+    OPINION_CLOB_HOST=http://127.0.0.1:8765
+    OPINION_WS_BASE=ws://127.0.0.1:8766
+  벤치: python3 scripts/bench_manual_trade.py (scripts/bench_manual_trade.py 참고)
+
+관리 엔드포인트:
+  GET  /_admin/state            호가창·주문 수·주입 설정
+  POST /_admin/faults           {"latency_ms", "jitter_ms", "fail_rate", "fail_mode", "ws_latency_ms", "drop_user_events"}
+  POST /_admin/seed             {"marketId", "asks": [[yes_price, size]...], "bids": [...]} 유동성 추가
+  POST /_admin/reset            주문·호가 초기화 후 기본 시장·유동성 재생성
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from flask import Flask, jsonify, request
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root))
+
+logger = logging.getLogger("local_clob")
+
+STATUS_PENDING = 1
+STATUS_FINISHED = 2
+STATUS_CANCELED = 3
+
+SIDE_BUY = "BUY"
+SIDE_SELL = "SELL"
+TRADING_MARKET = 1
+TRADING_LIMIT = 2
+
+QUOTE_DECIMALS = 18
+QUOTE_TOKEN = "0x55d398326f99059fF775485246999027B3197955"
+CTF_EXCHANGE = "0x5F45344126D6488025B0b84A3A8189F2487a7246"
+CHAIN_ID = 56
+LIQUIDITY_API_KEY = "local-liquidity"
+PRICE_TICK = 0.01
+EPS = 1e-9
+
+
+# ---------- 지연·실패 주입 ----------
+
+_faults: Dict[str, Any] = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "fail_rate": 0.0,
+    "fail_mode": "http500",
+    "ws_latency_ms": 0.0,
+    "drop_user_events": False,
+}
+_faults_lock = threading.Lock()
+
+
+def get_faults() -> Dict[str, Any]:
+    with _faults_lock:
+        return dict(_faults)
+
+
+def set_faults(**kwargs: Any) -> Dict[str, Any]:
+    with _faults_lock:
+        for k, v in kwargs.items():
+            if k in _faults and v is not None:
+                _faults[k] = type(_faults[k])(v)
+        return dict(_faults)
+
+
+# ---------- 매칭 엔진 ----------
+
+
+class MatchingEngine:
+    """
+    시장별 YES 기준 호가창. 주문 = {"orderId", "marketId", "apikey", "tokenId", "outcome", "side",
+    "price"(주문 토큰 기준), "yes_price", "book_side"("bids"|"asks"), "shares", "filled", "status", "seq"}.
+    변경 시 listener(event, payload)로 depth.diff / 사용자 이벤트 전달.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.markets: Dict[int, Dict[str, Any]] = {}
+        self._token_market: Dict[str, Tuple[int, str]] = {}
+        self._books: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self._seq = itertools.count(1)
+        self._order_ids = itertools.count(1)
+        self.listeners: List[Any] = []
+        self.stats = {"orders": 0, "trades": 0, "cancels": 0}
+
+    # ----- 시장 -----
+
+    def add_market(self, market: Dict[str, Any]) -> None:
+        mid = int(market["marketId"])
+        with self._lock:
+            self.markets[mid] = market
+            self._books.setdefault(mid, {"bids": [], "asks": []})
+            self._token_market[str(market["yesTokenId"])] = (mid, "YES")
+            self._token_market[str(market["noTokenId"])] = (mid, "NO")
+
+    def token_info(self, token_id: str) -> Optional[Tuple[int, str]]:
+        return self._token_market.get(str(token_id))
+
+    # ----- 호가창 -----
+
+    def _level_sizes(self, mid: int) -> Dict[str, Dict[float, float]]:
+        out: Dict[str, Dict[float, float]] = {"bids": {}, "asks": {}}
+        for side in ("bids", "asks"):
+            for o in self._books[mid][side]:
+                p = round(o["yes_price"], 2)
+                out[side][p] = out[side].get(p, 0.0) + (o["shares"] - o["filled"])
+        return out
+
+    def orderbook(self, token_id: str) -> Optional[Dict[str, Any]]:
+        """토큰 기준 호가창. NO 토큰은 YES 호가를 1-p로 뒤집어 반환."""
+        info = self.token_info(token_id)
+        if info is None:
+            return None
+        mid, outcome = info
+        with self._lock:
+            levels = self._level_sizes(mid)
+        bids = sorted(levels["bids"].items(), key=lambda kv: -kv[0])
+        asks = sorted(levels["asks"].items(), key=lambda kv: kv[0])
+        if outcome == "NO":
+            bids, asks = (
+                [(round(1 - p, 2), s) for p, s in asks],
+                [(round(1 - p, 2), s) for p, s in bids],
+            )
+        return {
+            "market": mid,
+            "tokenId": str(token_id),
+            "timestamp": int(time.time() * 1000),
+            "bids": [{"price": f"{p:.2f}", "size": f"{s:g}"} for p, s in bids],
+            "asks": [{"price": f"{p:.2f}", "size": f"{s:g}"} for p, s in asks],
+        }
+
+    def last_price(self, token_id: str) -> Optional[float]:
+        book = self.orderbook(token_id)
+        if not book:
+            return None
+        bids, asks = book["bids"], book["asks"]
+        if bids and asks:
+            return round((float(bids[0]["price"]) + float(asks[0]["price"])) / 2, 3)
+        if asks:
+            return float(asks[0]["price"])
+        if bids:
+            return float(bids[0]["price"])
+        return None
+
+    # ----- 주문 -----
+
+    def submit(
+        self,
+        apikey: str,
+        token_id: str,
+        side: str,
+        price: float,
+        shares: float,
+        trading_method: int = TRADING_LIMIT,
+        quote_budget: float = 0.0,
+    ) -> Dict[str, Any]:
+        """
+        주문 접수 + 즉시 매칭. LIMIT는 남은 수량을 호가창에 올리고, MARKET은 quote_budget(BUY) 또는
+        shares(SELL)만큼 체결 후 나머지 취소.
+        """
+        info = self.token_info(token_id)
+        if info is None:
+            raise ValueError(f"unknown token {token_id}")
+        mid, outcome = info
+        is_market = int(trading_method) == TRADING_MARKET
+        # YES 기준으로 변환: BUY YES / SELL NO → bids, SELL YES / BUY NO → asks
+        book_side = "bids" if (side == SIDE_BUY) == (outcome == "YES") else "asks"
+        if is_market:
+            yes_limit = 1.0 if book_side == "bids" else 0.0
+        else:
+            yes_limit = price if outcome == "YES" else round(1 - price, 2)
+        with self._lock:
+            before = self._level_sizes(mid)
+            order = {
+                "orderId": f"L{next(self._order_ids):08d}",
+                "marketId": mid,
+                "apikey": apikey,
+                "tokenId": str(token_id),
+                "outcome": outcome,
+                "side": side,
+                "price": price,
+                "yes_price": yes_limit,
+                "book_side": book_side,
+                "shares": shares,
+                "filled": 0.0,
+                "status": STATUS_PENDING,
+                "tradingMethod": int(trading_method),
+                "seq": next(self._seq),
+                "createdAt": int(time.time() * 1000),
+            }
+            self.orders[order["orderId"]] = order
+            self.stats["orders"] += 1
+            events: List[Tuple[str, Dict[str, Any]]] = [("order", {"order": dict(order), "type": "orderNew"})]
+            budget = quote_budget if (is_market and side == SIDE_BUY) else None
+            events.extend(self._match(order, budget))
+            remaining = order["shares"] - order["filled"]
+            if is_market:
+                # IOC: 남은 수량 취소 (전량 체결이면 완료)
+                if budget is not None:
+                    order["shares"] = order["filled"]
+                order["status"] = STATUS_FINISHED if order["filled"] > EPS and (
+                    budget is not None or remaining <= EPS
+                ) else STATUS_CANCELED
+                events.append(("order", {"order": dict(order), "type": "orderFill" if order["filled"] > EPS else "orderCancel"}))
+            elif remaining <= EPS:
+                order["status"] = STATUS_FINISHED
+                events.append(("order", {"order": dict(order), "type": "orderFill"}))
+            else:
+                self._books[mid][book_side].append(order)
+                self._sort(mid, book_side)
+            # 락 안에서 전달 (depth.diff는 레벨 절대값이라 순서가 바뀌면 안 됨. 리스너는 큐에 넣기만 함)
+            self._emit(events, mid, before, self._level_sizes(mid))
+        return dict(order)
+
+    def _sort(self, mid: int, side: str) -> None:
+        if side == "bids":
+            self._books[mid][side].sort(key=lambda o: (-o["yes_price"], o["seq"]))
+        else:
+            self._books[mid][side].sort(key=lambda o: (o["yes_price"], o["seq"]))
+
+    def _match(self, order: Dict[str, Any], budget: Optional[float]) -> List[Tuple[str, Dict[str, Any]]]:
+        """가격-시간 우선 매칭. 체결가는 대기 주문(resting) 가격. budget: MARKET BUY의 남은 USDT."""
+        mid = order["marketId"]
+        opposite = "asks" if order["book_side"] == "bids" else "bids"
+        book = self._books[mid][opposite]
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        while book:
+            rest = book[0]
+            crosses = (
+                rest["yes_price"] <= order["yes_price"] + EPS
+                if order["book_side"] == "bids"
+                else rest["yes_price"] >= order["yes_price"] - EPS
+            )
+            if not crosses:
+                break
+            # 들어온 주문 토큰 기준 체결가
+            own_price = rest["yes_price"] if order["outcome"] == "YES" else round(1 - rest["yes_price"], 2)
+            qty = rest["shares"] - rest["filled"]
+            if budget is not None:
+                if own_price <= 0:
+                    break
+                qty = min(qty, budget / own_price)
+                order["shares"] = order["filled"] + qty
+            else:
+                qty = min(qty, order["shares"] - order["filled"])
+            if qty <= EPS:
+                break
+            rest["filled"] += qty
+            order["filled"] += qty
+            if budget is not None:
+                budget -= qty * own_price
+            self.stats["trades"] += 1
+            if rest["shares"] - rest["filled"] <= EPS:
+                rest["status"] = STATUS_FINISHED
+                book.pop(0)
+            for o in (rest, order):
+                events.append(("trade", {"order": dict(o), "qty": qty, "yes_price": rest["yes_price"]}))
+            if rest["status"] == STATUS_FINISHED:
+                events.append(("order", {"order": dict(rest), "type": "orderFill"}))
+            if budget is not None and budget <= EPS:
+                break
+            if budget is None and order["shares"] - order["filled"] <= EPS:
+                break
+        return events
+
+    def cancel(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                return None
+            if order["status"] != STATUS_PENDING:
+                return dict(order)
+            mid = order["marketId"]
+            before = self._level_sizes(mid)
+            book = self._books[mid][order["book_side"]]
+            if order in book:
+                book.remove(order)
+            order["status"] = STATUS_CANCELED
+            self.stats["cancels"] += 1
+            self._emit([("order", {"order": dict(order), "type": "orderCancel"})], mid, before, self._level_sizes(mid))
+        return dict(order)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            o = self.orders.get(order_id)
+            return dict(o) if o else None
+
+    def reset(self) -> None:
+        with self._lock:
+            self.orders.clear()
+            for mid in self._books:
+                self._books[mid] = {"bids": [], "asks": []}
+
+    # ----- 이벤트 -----
+
+    def _emit(self, events, mid: int, before, after) -> None:
+        diff: Dict[str, List[List[str]]] = {"bids": [], "asks": []}
+        for side in ("bids", "asks"):
+            for p in set(before[side]) | set(after[side]):
+                b, a = before[side].get(p, 0.0), after[side].get(p, 0.0)
+                if abs(a - b) > EPS:
+                    diff[side].append([f"{p:.2f}", f"{a:g}"])
+        for fn in list(self.listeners):
+            try:
+                if diff["bids"] or diff["asks"]:
+                    fn("depth", {"marketId": mid, **diff})
+                for kind, payload in events:
+                    fn(kind, payload)
+            except Exception as e:
+                logger.debug("listener error: %s", e)
+
+
+engine = MatchingEngine()
+
+
+# ---------- 기본 시장·유동성 ----------
+
+
+def _hour_start(ts: float) -> int:
+    return int(ts) // 3600 * 3600
+
+
+def create_default_markets(now: Optional[float] = None) -> List[Dict[str, Any]]:
+    """BTC Up/Down 현재·다음 1시간 구간 시장 생성 (catalog 제목 패턴과 같은 형식)."""
+    now = time.time() if now is None else now
+    out = []
+    for i, start in enumerate((_hour_start(now), _hour_start(now) + 3600)):
+        mid = 9000 + (start // 3600) % 1000
+        label = time.strftime("%b %d, %H:00 UTC", time.gmtime(start))
+        market = {
+            "marketId": mid,
+            "marketTitle": f"Bitcoin Up or Down - {label}",
+            "status": 2,
+            "statusEnum": "Activated",
+            "yesLabel": "Up",
+            "noLabel": "Down",
+            "yesTokenId": f"{mid}0001",
+            "noTokenId": f"{mid}0002",
+            "conditionId": f"0x{mid:064x}",
+            "quoteToken": QUOTE_TOKEN,
+            "chainId": str(CHAIN_ID),
+            "createdAt": start - 3600,
+            "cutoffAt": start + 3600,
+            "collection": {"current": {"startTime": start, "endTime": start + 3600}},
+            "volume": "0",
+        }
+        engine.add_market(market)
+        out.append(market)
+    return out
+
+
+def seed_liquidity(market_id: int, asks: List[List[float]], bids: List[List[float]]) -> int:
+    """YES 기준 가격 사다리로 유동성 주문 배치. 반환: 넣은 주문 수."""
+    market = engine.markets.get(int(market_id))
+    if market is None:
+        return 0
+    n = 0
+    for price, size in asks:
+        engine.submit(LIQUIDITY_API_KEY, market["yesTokenId"], SIDE_SELL, round(float(price), 2), float(size))
+        n += 1
+    for price, size in bids:
+        engine.submit(LIQUIDITY_API_KEY, market["yesTokenId"], SIDE_BUY, round(float(price), 2), float(size))
+        n += 1
+    return n
+
+
+def default_seed(market_id: int, mid_price: float = 0.5, levels: int = 5, size: float = 500.0) -> int:
+    """mid_price 기준 스프레드 0.04의 대칭 사다리 (자전거래 Maker가 best ask-0.01에 들어갈 여유)."""
+    asks = [[round(mid_price + 0.02 + i * PRICE_TICK, 2), size] for i in range(levels)]
+    bids = [[round(mid_price - 0.02 - i * PRICE_TICK, 2), size] for i in range(levels)]
+    return seed_liquidity(market_id, asks, bids)
+
+
+# ---------- HTTP ----------
+
+app = Flask(__name__)
+
+
+def _ok(result: Any):
+    return jsonify({"errno": 0, "errmsg": "", "code": 0, "msg": "success", "result": result})
+
+
+def _err(errno: int, msg: str, status: int = 200):
+    return jsonify({"errno": errno, "errmsg": msg, "code": errno, "msg": msg, "result": None}), status
+
+
+@app.before_request
+def _inject_faults():
+    if request.path.startswith("/_admin"):
+        return None
+    f = get_faults()
+    delay = f["latency_ms"] + random.uniform(0, f["jitter_ms"])
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+    if f["fail_rate"] > 0 and random.random() < f["fail_rate"]:
+        mode = f["fail_mode"]
+        if mode == "timeout":
+            time.sleep(60)
+            return _err(10504, "injected timeout", 504)
+        if mode == "errno":
+            return _err(10500, "injected failure")
+        return _err(10500, "injected http 500", 500)
+    return None
+
+
+def _market_dto(m: Dict[str, Any]) -> Dict[str, Any]:
+    return dict(m)
+
+
+@app.route("/openapi/market")
+def http_markets():
+    page = max(1, request.args.get("page", 1, type=int))
+    limit = max(1, request.args.get("limit", 20, type=int))
+    items = sorted(engine.markets.values(), key=lambda m: m["marketId"])
+    chunk = items[(page - 1) * limit: page * limit]
+    return _ok({"total": len(items), "list": [_market_dto(m) for m in chunk]})
+
+
+@app.route("/openapi/market/<int:market_id>")
+def http_market(market_id: int):
+    m = engine.markets.get(market_id)
+    if m is None:
+        return _err(10404, "market not found")
+    return _ok({"data": _market_dto(m)})
+
+
+@app.route("/openapi/quoteToken")
+def http_quote_tokens():
+    return _ok({
+        "total": 1,
+        "list": [{
+            "id": 1,
+            "quoteTokenName": "USDT",
+            "quoteTokenAddress": QUOTE_TOKEN,
+            "ctfExchangeAddress": CTF_EXCHANGE,
+            "decimal": QUOTE_DECIMALS,
+            "symbol": "USDT",
+            "chainId": str(CHAIN_ID),
+        }],
+    })
+
+
+@app.route("/openapi/token/orderbook")
+def http_orderbook():
+    book = engine.orderbook(request.args.get("token_id", ""))
+    if book is None:
+        return _err(10404, "token not found")
+    return _ok(book)
+
+
+@app.route("/openapi/token/latest-price")
+def http_latest_price():
+    token_id = request.args.get("token_id", "")
+    p = engine.last_price(token_id)
+    if p is None:
+        return _err(10404, "no price")
+    return _ok({"tokenId": token_id, "price": f"{p:g}", "timestamp": int(time.time() * 1000)})
+
+
+@app.route("/openapi/token/price-history")
+def http_price_history():
+    return _ok({"history": []})
+
+
+@app.route("/openapi/positions/user/<addr>")
+@app.route("/openapi/trade/user/<addr>")
+def http_user_lists(addr: str):
+    return _ok({"total": 0, "list": []})
+
+
+def _order_dto(o: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "orderId": o["orderId"],
+        "order_id": o["orderId"],
+        "marketId": o["marketId"],
+        "tokenId": o["tokenId"],
+        "side": o["side"],
+        "price": f"{o['price']:g}",
+        "status": o["status"],
+        "orderShares": f"{o['shares']:g}",
+        "filledShares": f"{o['filled']:g}",
+        "filled": o["status"] == STATUS_FINISHED,
+        "tradingMethod": o["tradingMethod"],
+        "createdAt": o["createdAt"],
+    }
+
+
+@app.route("/openapi/order", methods=["POST"])
+def http_place_order():
+    apikey = request.headers.get("apikey", "")
+    body = request.get_json(silent=True) or {}
+    token_id = str(body.get("tokenId") or body.get("token_id") or "")
+    if engine.token_info(token_id) is None:
+        return _err(10400, "invalid tokenId")
+    side = SIDE_BUY if str(body.get("side", "0")) in ("0", "BUY") else SIDE_SELL
+    trading_method = int(body.get("tradingMethod") or body.get("trading_method") or TRADING_LIMIT)
+    scale = 10 ** QUOTE_DECIMALS
+    maker_amount = float(body.get("makerAmount") or body.get("maker_amount") or 0) / scale
+    taker_amount = float(body.get("takerAmount") or body.get("taker_amount") or 0) / scale
+    price = float(body.get("price") or 0)
+    if trading_method == TRADING_MARKET:
+        shares = maker_amount if side == SIDE_SELL else 0.0
+        order = engine.submit(apikey, token_id, side, price, shares, TRADING_MARKET, quote_budget=maker_amount)
+    else:
+        if price <= 0 or price >= 1:
+            return _err(10400, "price must be in (0, 1)")
+        shares = taker_amount if side == SIDE_BUY else maker_amount
+        order = engine.submit(apikey, token_id, side, price, shares, TRADING_LIMIT)
+    return _ok({"data": _order_dto(order)})
+
+
+@app.route("/openapi/order/cancel", methods=["POST"])
+def http_cancel_order():
+    body = request.get_json(silent=True) or {}
+    order_id = str(body.get("orderId") or body.get("order_id") or "")
+    order = engine.cancel(order_id)
+    if order is None:
+        return _err(10404, "order not found")
+    return _ok({"data": {"result": order["status"] == STATUS_CANCELED}})
+
+
+@app.route("/openapi/order/<order_id>")
+def http_get_order(order_id: str):
+    order = engine.get(order_id)
+    if order is None:
+        return _err(10404, "order not found")
+    return _ok({"data": _order_dto(order)})
+
+
+@app.route("/openapi/order")
+def http_list_orders():
+    apikey = request.headers.get("apikey", "")
+    with engine._lock:
+        mine = [_order_dto(o) for o in engine.orders.values() if o["apikey"] == apikey]
+    return _ok({"total": len(mine), "list": mine[-50:]})
+
+
+@app.route("/_admin/state")
+def admin_state():
+    books = {}
+    for mid, m in engine.markets.items():
+        books[mid] = engine.orderbook(m["yesTokenId"])
+    return jsonify({"faults": get_faults(), "stats": dict(engine.stats), "markets": list(engine.markets), "books": books})
+
+
+@app.route("/_admin/faults", methods=["POST"])
+def admin_faults():
+    return jsonify(set_faults(**(request.get_json(silent=True) or {})))
+
+
+@app.route("/_admin/seed", methods=["POST"])
+def admin_seed():
+    body = request.get_json(silent=True) or {}
+    mid = int(body.get("marketId") or min(engine.markets))
+    if body.get("asks") or body.get("bids"):
+        n = seed_liquidity(mid, body.get("asks") or [], body.get("bids") or [])
+    else:
+        n = default_seed(mid, float(body.get("mid", 0.5)))
+    return jsonify({"marketId": mid, "orders": n})
+
+
+@app.route("/_admin/reset", methods=["POST"])
+def admin_reset():
+    engine.reset()
+    markets = create_default_markets()
+    default_seed(markets[0]["marketId"])
+    return jsonify({"markets": [m["marketId"] for m in markets]})
+
+
+# ---------- WS ----------
+
+
+class WsHub:
+    """연결별 {"apikey", "depth": 구독 market_id, "user": 구독 market_id}. 엔진 이벤트를 asyncio 루프로 전달."""
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.conns: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_engine_event(self, kind: str, payload: Dict[str, Any]) -> None:
+        if self.loop is None:
+            return
+        f = get_faults()
+        msgs: List[Tuple[Any, str]] = []
+        with self._lock:
+            conns = list(self.conns.items())
+        if kind == "depth":
+            mid = payload["marketId"]
+            msg = json.dumps({"msgType": "market.depth.diff", "marketId": mid, "data": payload})
+            msgs = [(ws, msg) for ws, c in conns if mid in c["depth"]]
+        elif not f["drop_user_events"]:
+            o = payload["order"]
+            if kind == "trade":
+                body = {"msgType": "trade.record.new", "marketId": o["marketId"], "orderId": o["orderId"],
+                        "status": o["status"], "shares": f"{payload['qty']:g}", "tradeNo": f"T{time.time_ns()}"}
+            else:
+                body = {"msgType": "trade.order.update", "marketId": o["marketId"], "orderId": o["orderId"],
+                        "status": o["status"], "orderUpdateType": payload["type"],
+                        "filledShares": f"{o['filled']:g}"}
+            msg = json.dumps(body)
+            msgs = [(ws, msg) for ws, c in conns if c["apikey"] == o["apikey"] and o["marketId"] in c["user"]]
+        delay = f["ws_latency_ms"] / 1000.0
+        for ws, msg in msgs:
+            asyncio.run_coroutine_threadsafe(self._send(ws, msg, delay), self.loop)
+
+    @staticmethod
+    async def _send(ws, msg: str, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            await ws.send(msg)
+        except Exception:
+            pass
+
+    async def handler(self, ws, path: Optional[str] = None) -> None:
+        req_path = path or getattr(getattr(ws, "request", None), "path", "") or getattr(ws, "path", "")
+        apikey = (parse_qs(urlparse(req_path).query).get("apikey") or [""])[0]
+        with self._lock:
+            self.conns[ws] = {"apikey": apikey, "depth": set(), "user": set()}
+        try:
+            async for raw in ws:
+                try:
+                    msg = json.loads(raw)
+                except (TypeError, ValueError):
+                    continue
+                action = (msg.get("action") or "").upper()
+                channel = msg.get("channel") or ""
+                mid = msg.get("marketId")
+                if action == "HEARTBEAT" or mid is None:
+                    continue
+                key = "depth" if channel == "market.depth.diff" else "user"
+                with self._lock:
+                    subs = self.conns[ws][key]
+                    if action == "SUBSCRIBE":
+                        subs.add(int(mid))
+                    elif action == "UNSUBSCRIBE":
+                        subs.discard(int(mid))
+        finally:
+            with self._lock:
+                self.conns.pop(ws, None)
+
+    def run(self, host: str, port: int) -> None:
+        try:
+            import websockets
+        except ImportError:
+            logger.warning("websockets 미설치 → WS 피드 없이 HTTP만 제공")
+            return
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+        async def _main():
+            async with websockets.serve(self.handler, host, port):
+                await asyncio.Future()
+
+        self.loop.run_until_complete(_main())
+
+
+ws_hub = WsHub()
+engine.listeners.append(ws_hub.on_engine_event)
+
+
+def start_in_background(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    ws_port: int = 8766,
+    seed: bool = True,
+) -> Dict[str, str]:
+    """벤치 스크립트용: 같은 프로세스 데몬 스레드로 HTTP·WS 서버 시작. 반환: 앱에 넣을 환경변수."""
+    markets = create_default_markets()
+    if seed:
+        default_seed(markets[0]["marketId"])
+    threading.Thread(target=ws_hub.run, args=(host, ws_port), daemon=True, name="local-clob-ws").start()
+    threading.Thread(
+        target=lambda: app.run(host=host, port=port, threaded=True, use_reloader=False),
+        daemon=True,
+        name="local-clob-http",
+    ).start()
+    return {
+        "OPINION_API_BASE": f"http://{host}:{port}/openapi",
+        "OPINION_CLOB_HOST": f"http://{host}:{port}",
+        "OPINION_WS_BASE": f"ws://{host}:{ws_port}",
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="로컬 Opinion CLOB 대역 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--ws-port", type=int, default=8766)
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="HTTP 응답 전 고정 지연")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="추가 무작위 지연 상한")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="요청 실패 확률 0~1")
+    ap.add_argument("--fail-mode", choices=("http500", "errno", "timeout"), default="http500")
+    ap.add_argument("--ws-latency-ms", type=float, default=0.0, help="WS 이벤트 전달 지연")
+    ap.add_argument("--drop-user-events", action="store_true", help="사용자 채널 이벤트 미전송 (폴링 폴백 확인용)")
+    ap.add_argument("--no-seed", action="store_true", help="시작 시 유동성 사다리 배치 안 함")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    set_faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        fail_rate=args.fail_rate,
+        fail_mode=args.fail_mode,
+        ws_latency_ms=args.ws_latency_ms,
+        drop_user_events=args.drop_user_events,
+    )
+    env = start_in_background(args.host, args.port, args.ws_port, seed=not args.no_seed)
+    for k, v in env.items():
+        print(f"{k}={v}")
+    print("markets:", ", ".join(f"{m['marketId']} {m['marketTitle']}" for m in engine.markets.values()))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
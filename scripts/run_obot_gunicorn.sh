@@ -1,20 +1,15 @@
 #!/usr/bin/env bash
-# BSC RPC가 프록시를 쓰도록 HTTPS_PROXY를 설정한 뒤 gunicorn 실행.
+# .env 보조 변수(MULTISIG)를 채운 뒤 gunicorn 실행.
+# BSC RPC 프록시는 앱이 계정별로 주입함 (HTTPS_PROXY 전역 설정 안 함 → 다른 요청까지 프록시로 나가지 않음).
 # 사용: systemd ExecStart=/home/ubuntu/O-Bot/scripts/run_obot_gunicorn.sh
 set -e
 cd "$(dirname "$0")/.."
-# systemd EnvironmentFile로 안 들어왔으면 .env에서 읽기 (PROXY, MULTISIG)
+# systemd EnvironmentFile로 안 들어왔으면 .env에서 읽기 (MULTISIG)
 if [ -f .env ]; then
-  [ -z "$OPINION_PROXY" ] && OPINION_PROXY=$(grep -E '^OPINION_PROXY=' .env | head -1 | cut -d= -f2- | tr -d '"' | xargs) || true
   v1=$(grep -E '^OPINION_MULTISIG_1=' .env | head -1 | cut -d= -f2- | tr -d '"' | xargs); [ -n "$v1" ] && export OPINION_MULTISIG_1="$v1"
   v2=$(grep -E '^OPINION_MULTISIG_2=' .env | head -1 | cut -d= -f2- | tr -d '"' | xargs); [ -n "$v2" ] && export OPINION_MULTISIG_2="$v2"
 fi
-# OPINION_PROXY=IP:PORT:USER:PASS → http://USER:PASS@IP:PORT
-if [ -n "$OPINION_PROXY" ]; then
-  IFS=: read -r px_ip px_port px_user px_pass <<< "$OPINION_PROXY"
-  if [ -n "$px_ip" ] && [ -n "$px_port" ] && [ -n "$px_user" ] && [ -n "$px_pass" ]; then
-    export HTTPS_PROXY="http://${px_user}:${px_pass}@${px_ip}:${px_port}"
-    export HTTP_PROXY="http://${px_user}:${px_pass}@${px_ip}:${px_port}"
-  fi
-fi
-exec ./venv/bin/gunicorn -w 2 -b 127.0.0.1:5000 --timeout 120 app:app
+# 워커 프로세스는 반드시 1개: 분할·다중 페어 작업 상태/중지 이벤트와 계정 락(account_locks)이 프로세스 메모리에 있음.
+# 워커가 2개 이상이면 작업 조회·중지가 다른 워커로 가서 404가 나고, 같은 계정이 두 자전거래에 동시에 쓰일 수 있음.
+# 동시 요청은 스레드(--threads)로 처리.
+exec ./venv/bin/gunicorn -w 1 --threads 8 -b 127.0.0.1:5000 --timeout 120 app:app
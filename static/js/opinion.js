@@ -352,7 +352,10 @@ async function loadBtcUpDown(forceRefresh) {
         }
         if (data.success && (data.result !== undefined || data.topicId)) {
             renderBtcUpDownCard(data);
-            if (data.market_ended) {
+            // 롤오버 시각에 맞춰 다시 불러오기 (다음 마켓은 서버 카탈로그가 미리 준비 → refresh 불필요)
+            if (data.reloadAfterSec != null && data.reloadAfterSec > 0) {
+                _marketEndedRetryTimer = setTimeout(function () { loadBtcUpDown(false); }, data.reloadAfterSec * 1000);
+            } else if (data.market_ended) {
                 _marketEndedRetryTimer = setTimeout(function () { loadBtcUpDown(true); }, 60000);
             }
         } else {